@@ -2,7 +2,6 @@ import json
 import logging
 import shutil
 import time
-from copy import deepcopy
 from pathlib import Path
 from typing import Callable, Optional
 
@@ -14,6 +13,7 @@ from atopile.errors import UserException, UserPickError
 from atopile.front_end import DeprecatedException
 from faebryk.core.module import Module
 from faebryk.core.parameter import Parameter
+from faebryk.core.pathfinder import INDIV_MEASURE, Counters
 from faebryk.core.solver.defaultsolver import DefaultSolver
 from faebryk.core.solver.nullsolver import NullSolver
 from faebryk.core.solver.solver import Solver
@@ -61,11 +61,13 @@ from faebryk.libs.kicad.fileformats import (
     C_kicad_pcb_file,
 )
 from faebryk.libs.picker.picker import PickError, pick_part_recursively
+from faebryk.libs.sexp.dataclass_sexp import get_changed_fields, get_field_hashes
 from faebryk.libs.util import ConfigFlag, KeyErrorAmbiguous
 
 logger = logging.getLogger(__name__)
 
 SKIP_SOLVING = ConfigFlag("SKIP_SOLVING", default=False)
+SOLVER_CACHE_FOLDER = Path("cache/solver")
 
 
 def _get_solver() -> Solver:
@@ -73,13 +75,17 @@ def _get_solver() -> Solver:
         logger.warning("Assertion checking is disabled")
         return NullSolver()
     else:
-        return DefaultSolver()
+        return DefaultSolver(
+            cache_path=config.project.paths.build / SOLVER_CACHE_FOLDER
+        )
 
 
 def build(app: Module) -> None:
     """Build the project."""
     G = app.get_graph()
     solver = _get_solver()
+    if INDIV_MEASURE:
+        Counters.reset_aggregated()
 
     logger.info("Resolving bus parameters")
     try:
@@ -100,7 +106,8 @@ def build(app: Module) -> None:
     consolidate_footprints(app)
 
     # Load PCB / cached --------------------------------------------------------
-    pcb = C_kicad_pcb_file.loads(config.build.paths.layout)
+    # copper and graphics are only decoded if the transformer touches them
+    pcb = C_kicad_pcb_file.loads(config.build.paths.layout, lazy=True)
     transformer = PCB_Transformer(pcb.kicad_pcb, G, app)
     load_designators(G, attach=True)
 
@@ -142,7 +149,8 @@ def build(app: Module) -> None:
 
     # Update PCB --------------------------------------------------------------
     logger.info("Updating PCB")
-    original_pcb = deepcopy(pcb)
+    # Only remember a hash per decoded section instead of copying the tree
+    original_hashes = get_field_hashes(pcb.kicad_pcb)
     transformer.apply_design(config.build.paths.fp_lib_table)
     transformer.check_unattached_fps()
 
@@ -155,7 +163,7 @@ def build(app: Module) -> None:
     transformer.move_footprints()
     apply_routing(app, transformer)
 
-    if pcb == original_pcb:
+    if not get_changed_fields(pcb.kicad_pcb, original_hashes):
         if config.build.frozen:
             logger.info("No changes to layout. Passed --frozen check.")
         else:
@@ -167,8 +175,9 @@ def build(app: Module) -> None:
             ".original.kicad_pcb"
         )
         updated_path = config.build.paths.output_base.with_suffix(".updated.kicad_pcb")
-        original_pcb.dumps(original_path)
-        pcb.dumps(updated_path)
+        # the layout file hasn't been written yet
+        C_kicad_pcb_file.loads(config.build.paths.layout, lazy=True).dump(original_path)
+        pcb.dump(updated_path)
 
         # TODO: make this a real util
         def _try_relative(path: Path) -> Path:
@@ -198,7 +207,7 @@ def build(app: Module) -> None:
             backup_file.write_bytes(f.read())
 
         logger.info(f"Updating layout {config.build.paths.layout}")
-        pcb.dumps(config.build.paths.layout)
+        pcb.dump(config.build.paths.layout)
 
     # Build targets -----------------------------------------------------------
     logger.info("Building targets")
@@ -230,6 +239,11 @@ def build(app: Module) -> None:
         f"for '{config.build.name}' config"
     )
 
+    if INDIV_MEASURE:
+        stats_path = config.build.paths.output_base.with_suffix(".pathfinder.json")
+        Counters.aggregated().dump_json(stats_path)
+        logger.info(f"Wrote pathfinder stats to {stats_path}")
+
 
 TargetType = Callable[[Module, Solver], None]
 
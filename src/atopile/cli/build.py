@@ -40,6 +40,13 @@ def build(
     open_layout: Annotated[
         bool | None, typer.Option("--open", envvar="ATO_OPEN_LAYOUT")
     ] = None,
+    offline: Annotated[
+        bool | None,
+        typer.Option(
+            help="Pick parts only from cached queries, without the components API",
+            envvar="ATO_OFFLINE",
+        ),
+    ] = None,
 ):
     """
     Build the specified --target(s) or the targets specified by the build config.
@@ -65,6 +72,9 @@ def build(
     if open_layout is not None:
         config.project.open_layout_on_build = open_layout
 
+    if offline is not None:
+        config.project.services.components.offline = offline
+
     for build_cfg in config.project.builds.values():
         if keep_picked_parts is not None:
             build_cfg.keep_picked_parts = keep_picked_parts
@@ -444,6 +444,9 @@ class ServicesConfig(BaseConfigModel):
         url: str = Field(default="https://components.atopileapi.com")
         """Components URL"""
 
+        offline: bool = Field(default=False)
+        """Only pick parts from previously cached queries"""
+
     class Packages(BaseConfigModel):
         url: str = Field(default="https://packages.atopileapi.com")
         """Packages URL"""
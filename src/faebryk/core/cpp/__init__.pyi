@@ -5,9 +5,13 @@
 # Do not edit this file directly; edit the corresponding
 # C++ file instead.
 import enum
-from collections.abc import Callable, Sequence, Set
+from collections.abc import Callable, Iterator, Sequence, Set
 from typing import overload
 
+class ChildIterator(Iterator[Node]):
+    def __iter__(self) -> ChildIterator: ...
+    def __next__(self) -> Node: ...
+
 class Counter:
     @property
     def in_cnt(self) -> int: ...
@@ -22,6 +26,8 @@ class Counter:
     @property
     def time_spent_s(self) -> float: ...
     @property
+    def memory_bytes(self) -> int: ...
+    @property
     def hide(self) -> bool: ...
     @property
     def name(self) -> str: ...
@@ -46,13 +52,22 @@ class Graph:
     def node_count(self) -> int: ...
     @property
     def edge_count(self) -> int: ...
+    @property
+    def version(self) -> int: ...
     def node_projection(self) -> set[Node]: ...
+    def nodes_of_type(self, type: type) -> set[Node]: ...
+    def nodes_of_types(self, types: Sequence[type]) -> set[Node]: ...
     def nodes_by_names(self, arg: Set[str], /) -> list[tuple[Node, str]]: ...
     def bfs_visit(
         self,
         filter: Callable[[Sequence[GraphInterface], Link], bool],
         start: Sequence[GraphInterface],
     ) -> set[GraphInterface]: ...
+    def same_bus(self, a: Node, b: Node) -> bool | None: ...
+    def get_bus(self, node: Node) -> set[Node] | None: ...
+    def get_buses(self, type: type) -> tuple[list[set[Node]], set[Node]]: ...
+    @staticmethod
+    def split_off(nodes: Sequence[Node]) -> Graph: ...
     def __repr__(self) -> str: ...
 
 class GraphInterface:
@@ -169,6 +184,20 @@ class Node:
         f_filter: Callable[[Node], bool] | None = None,
         sort: bool = True,
     ) -> list[Node]: ...
+    def iter_children(
+        self,
+        direct_only: bool,
+        types: Sequence[type] | None = None,
+        include_root: bool = False,
+        f_filter: Callable[[Node], bool] | None = None,
+    ) -> ChildIterator: ...
+    def get_first_child(
+        self,
+        types: Sequence[type] | None = None,
+        direct_only: bool = False,
+        include_root: bool = False,
+        f_filter: Callable[[Node], bool] | None = None,
+    ) -> Node | None: ...
     def get_parent(self) -> tuple[Node, str] | None: ...
     def get_parent_force(self) -> tuple[Node, str]: ...
     def get_name(self, accept_no_parent: bool = False) -> str: ...
@@ -179,6 +208,7 @@ class Node:
     @overload
     def isinstance(self, types: Sequence[type]) -> bool: ...
     def bfs_node(self, filter: Callable[[Path], bool]) -> set[Node]: ...
+    def get_trait_fast(self, trait: type) -> list[Node]: ...
     @property
     def no_include_parents_in_full_name(self) -> bool: ...
     @no_include_parents_in_full_name.setter
@@ -191,6 +221,18 @@ class NodeException(Exception):
 class NodeNoParent(Exception):
     pass
 
+class PathFinderStats:
+    @property
+    def calls(self) -> int: ...
+    @property
+    def time_spent_s(self) -> float: ...
+    @property
+    def cache_hits(self) -> int: ...
+    @property
+    def cache_misses(self) -> int: ...
+    @property
+    def counters(self) -> list[Counter]: ...
+
 class Path:
     def __repr__(self) -> str: ...
     def __len__(self) -> int: ...
@@ -205,8 +247,16 @@ def add(i: int, j: int = 1) -> int:
     """A function that adds two numbers"""
 
 def call_python_function(func: Callable[[], int]) -> int: ...
+def find_all_buses(mifs: Sequence[Node]) -> list[int]: ...
 def find_paths(src: Node, dst: Sequence[Node]) -> tuple[list[Path], list[Counter]]: ...
+def find_paths_batch(
+    srcs: Sequence[Node], dsts: Sequence[Sequence[Node]]
+) -> list[tuple[list[Path], list[Counter]]]: ...
+def find_paths_cached(src: Node) -> tuple[list[Path], list[Counter]]: ...
+def get_pathfinder_stats() -> PathFinderStats: ...
 def print_obj(obj: object) -> None: ...
+def reset_pathfinder_stats() -> None: ...
 def set_indiv_measure(value: bool) -> None: ...
 def set_leak_warnings(value: bool) -> None: ...
 def set_max_paths(arg0: int, arg1: int, arg2: int, /) -> None: ...
+def set_max_threads(max_threads: int) -> None: ...
@@ -5,6 +5,7 @@
 #pragma once
 
 #include "util.hpp"
+#include <deque>
 #include <nanobind/stl/function.h>
 #include <nanobind/stl/optional.h>
 #include <nanobind/stl/pair.h>
@@ -14,6 +15,7 @@
 #include <nanobind/stl/unordered_map.h>
 #include <nanobind/stl/unordered_set.h>
 #include <nanobind/stl/vector.h>
+#include <span>
 #include <sstream>
 #include <vector>
 
@@ -70,10 +72,15 @@ class Node {
       private:
         nb::handle type;
         std::unordered_set<uint64_t> mro_ids{};
+        /** trait impls: ids of the implemented trait and its bases */
+        std::vector<uint64_t> trait_ids{};
 
       public:
         Type(nb::handle type);
         bool operator==(const Type &other) const;
+        uint64_t get_id() const;
+        const std::vector<uint64_t> &get_trait_ids() const;
+        const std::unordered_set<uint64_t> &get_mro_ids() const;
         std::string get_name();
         // Needed because ModuleInterface is not a C++ class atm
         bool is_moduleinterface();
@@ -83,6 +90,28 @@ class Node {
         bool is_subclass(std::vector<nb::type_object> types);
     };
 
+    /**
+     * Breadth first walk over the children, filtered on the fly.
+     * Unsorted, children are only looked up once the walk reaches them.
+     */
+    class ChildIterator {
+        std::deque<Node_ref> queue;
+        std::optional<Node_ref> root;
+        bool direct_only;
+        /** empty: no type filter */
+        std::vector<uint64_t> type_ids;
+        std::function<bool(Node_ref)> f_filter;
+
+        void push_children(Node &node);
+        bool matches(Node &node);
+
+      public:
+        ChildIterator(Node &node, bool direct_only,
+                      std::optional<std::vector<nb::type_object>> types,
+                      bool include_root, std::function<bool(Node_ref)> f_filter);
+        std::optional<Node_ref> next();
+    };
+
   private:
     std::optional<nb::object> py_handle{};
     std::optional<Type> type{};
@@ -94,6 +123,9 @@ class Node {
     std::shared_ptr<GraphInterfaceHierarchical> children;
     std::shared_ptr<GraphInterfaceHierarchical> parent;
 
+    /** trait id -> direct children implementing it, kept in sync by the graph */
+    Map<uint64_t, std::vector<Node *>> trait_impls;
+
   public:
     /**
      * Don't call this constructor directly from C++ if you don't know what you're
@@ -117,6 +149,8 @@ class Node {
     std::string repr();
 
     Type get_type();
+    /** Empty until the py_handle is set */
+    const std::unordered_set<uint64_t> &get_mro_ids();
     std::string get_type_name();
     // TODO replace with constructor
     void set_py_handle(nb::object handle);
@@ -139,7 +173,22 @@ class Node {
                  bool include_root = true,
                  std::function<bool(Node_ref)> f_filter = nullptr, bool sort = true);
 
+    ChildIterator iter_children(bool direct_only,
+                                std::optional<std::vector<nb::type_object>> types = {},
+                                bool include_root = false,
+                                std::function<bool(Node_ref)> f_filter = nullptr);
+    /** Closest child (by depth) matching types and f_filter */
+    std::optional<Node_ref>
+    get_first_child(std::optional<std::vector<nb::type_object>> types = {},
+                    bool direct_only = false, bool include_root = false,
+                    std::function<bool(Node_ref)> f_filter = nullptr);
+
     std::unordered_set<Node_ref> bfs_node(std::function<bool(Path)> filter);
+
+    void add_trait_impl(Node *child);
+    void remove_trait_impl(Node *child);
+    /** Direct children implementing the trait, without calling into python */
+    std::vector<Node_ref> get_trait_fast(nb::type_object trait);
 };
 
 class GraphInterface {
@@ -157,7 +206,7 @@ class GraphInterface {
 
     template <typename T> static std::shared_ptr<T> factory();
     std::unordered_set<GI_ref_weak> get_gif_edges();
-    Map<GI_ref_weak, Link_ref> &get_edges();
+    const Map<GI_ref_weak, Link_ref> &get_edges();
     std::optional<Link_ref> is_connected(GI_ref_weak to);
     Graph_ref get_graph();
     std::unordered_set<Node_ref> get_connected_nodes(std::vector<nb::type_object> types);
@@ -168,6 +217,7 @@ class GraphInterface {
     // TODO replace with set_node(Node_ref node, std::string name)
     void set_node(Node_ref node);
     Node_ref get_node();
+    bool has_node();
     void set_name(std::string name);
     std::string get_name();
     std::string get_full_name(bool types = false);
@@ -239,6 +289,138 @@ class Path {
     std::string str() const;
 };
 
+/**
+ * Incrementally maintained union-find over the ModuleInterfaces of a graph.
+ *
+ * Follows the pathfinder semantics for unconditional links:
+ *  - interfaces linked via their module connection gifs are on the same bus
+ *  - connected interfaces of the same type connect their children of the same name
+ *  - interfaces of the same type whose children are all connected are connected
+ *    (hierarchical split)
+ * Conditional links can't be resolved without running their filters, so regions
+ * (hierarchy + links) containing them are left to the pathfinder.
+ *
+ * Unlike the pathfinder, buses are always symmetric and transitive. With shorts
+ * (different children of one interface on the same bus) the pathfinder can miss
+ * connections that go through the short, or only find them from one end, e.g.
+ * for p1 ~ p2, p1.hv ~ p2.hv and p1.hv ~ p1.lv it finds p2.lv -> p1.hv but not
+ * p1.hv -> p2.lv. The index reports both. Callers that need the pathfinder
+ * semantics have to use it directly.
+ *
+ * Maintained on edge insertion, rebuilt lazily on the next query after edge/node
+ * removals or hierarchy changes of indexed interfaces.
+ */
+class ConnectivityIndex {
+    struct UplinkKey {
+        uint64_t parent_type;
+        std::string name;
+
+        bool operator==(const UplinkKey &other) const = default;
+    };
+
+    struct UplinkKeyHash {
+        size_t operator()(const UplinkKey &key) const;
+    };
+
+    struct Bus {
+        std::vector<Node *> members;
+        /** One member per type, children of same typed members are connected */
+        Map<uint64_t, Node *> representatives;
+        /** MIF parents of members by parent type and member name */
+        std::unordered_map<UplinkKey, std::vector<Node *>, UplinkKeyHash> uplinks;
+    };
+
+    Map<Node *, Node *> bus_parent;
+    Map<Node *, Bus> buses;
+    Map<Node *, Node *> region_parent;
+    Set<Node *> conditional_regions;
+    bool dirty = false;
+
+    static Node *find(Map<Node *, Node *> &parents, Node *node);
+    static Map<std::string, Node *> get_mif_children(Node *node);
+
+    void ensure(Node *node);
+    void add_connection(Node *a, Node *b, Link_ref link);
+    void union_regions(Node *a, Node *b);
+    void union_buses(Node *a, Node *b);
+    bool children_connected(Node *a, Node *b);
+    bool is_exact(Node *node);
+    void rebuild(Graph &g);
+
+  public:
+    void on_edge_added(GI_ref_weak from, GI_ref_weak to, Link_ref link);
+    void invalidate();
+    void merge(ConnectivityIndex &other);
+
+    /** nullopt if the pathfinder is needed to decide */
+    std::optional<bool> same_bus(Graph &g, Node *a, Node *b);
+    /** All interfaces of the exact type of node on its bus, including itself */
+    std::optional<std::vector<Node *>> get_bus(Graph &g, Node *node);
+    /**
+     * Representative shared by all interfaces on the bus of node.
+     * nullopt if the pathfinder is needed to decide.
+     */
+    std::optional<Node *> get_bus_root(Graph &g, Node *node);
+};
+
+/**
+ * Nodes of a graph bucketed by every type of their mro.
+ *
+ * Self gifs are held before their node is set up, so they are only bucketed on
+ * the first query after being held.
+ * Merges are incremental, removals drop the index until the next query.
+ */
+class NodeTypeIndex {
+    Map<uint64_t, std::vector<Node *>> buckets;
+    /** Self gifs held since the last query */
+    std::vector<GI_ref_weak> pending;
+    bool dirty = false;
+
+    void flush();
+    void rebuild(Graph &g);
+
+  public:
+    void on_hold(GI_ref_weak gi);
+    void invalidate();
+    void merge(NodeTypeIndex &other);
+
+    /** Nodes that are instances of any of the types */
+    std::vector<Node *> get(Graph &g, const std::vector<uint64_t> &type_ids);
+};
+
+/**
+ * Snapshot of the edges of a graph in compressed sparse row layout.
+ *
+ * Neighbours of a gif are contiguous and indexed by its v_i, so iterating them
+ * needs neither hashing nor copying.
+ * After mutations, snapshots share the last full CSR and only copy the neighbours
+ * of the gifs whose edges changed since into an overlay.
+ * Snapshots are immutable, users keep them alive while iterating, so mutating the
+ * graph in between (e.g. from a python filter) is safe.
+ */
+class Adjacency {
+  public:
+    using Entry = std::pair<GI_ref_weak, Link_ref>;
+
+  private:
+    struct Csr {
+        std::vector<size_t> offsets;
+        std::vector<Entry> entries;
+    };
+
+    std::shared_ptr<const Csr> csr;
+    /** Neighbours of the gifs that changed since csr was built */
+    Map<GI_ref_weak, std::vector<Entry>> overlay;
+
+  public:
+    const uint64_t version;
+
+    Adjacency(Graph &g);
+    /** Shares the CSR of base, the neighbours of dirty gifs are copied */
+    Adjacency(Graph &g, const Adjacency &base, const Set<GI_ref_weak> &dirty);
+    std::span<const Entry> get(GI_ref_weak from) const;
+};
+
 class Graph {
     Set<GI_ref> v;
     std::vector<std::tuple<GI_ref_weak, GI_ref_weak, Link_ref>> e;
@@ -246,6 +428,30 @@ class Graph {
     Map<GI_ref_weak, Map<GI_ref_weak, Link_ref>> e_cache = {};
     Map<GI_ref_weak, Set<GI_ref_weak>> e_cache_simple = {};
     bool invalidated = false;
+    uint64_t version = 0;
+    ConnectivityIndex connectivity;
+    NodeTypeIndex type_index;
+    /**
+     * Updated lazily on the first query after a mutation.
+     * The CSR is only rebuilt once more than 1/ADJACENCY_REBUILD_RATIO of the
+     * gifs changed since the last rebuild, or when v_i are reassigned.
+     */
+    std::shared_ptr<const Adjacency> adjacency;
+    /** Gifs whose edges changed since the CSR of adjacency was built */
+    Set<GI_ref_weak> adjacency_dirty;
+    static constexpr size_t ADJACENCY_REBUILD_RATIO = 16;
+    /** Full pathfinder results per source, valid for path_cache_version */
+    Map<Node *, std::vector<Path>> path_cache;
+    uint64_t path_cache_version = 0;
+
+    friend class ConnectivityIndex;
+    friend class NodeTypeIndex;
+    friend class Adjacency;
+
+    void move_gifs(Graph_ref target, const Set<GI_ref_weak> &gifs);
+    void reindex();
+    void bump_version();
+    void mark_adjacency_dirty(GI_ref_weak gif);
 
   public:
     void hold(GI_ref gi);
@@ -253,9 +459,17 @@ class Graph {
     static void add_edge(Link_ref link);
     static void remove_edge(Link_ref link);
     static Graph_ref merge_graphs(Graph_ref g1, Graph_ref g2);
+    /**
+     * Moves the nodes (with all their sibling gifs) out of their graphs into a new
+     * graph. Edges between moved and remaining gifs are removed.
+     */
+    static Graph_ref split_off(std::vector<Node_ref> nodes);
 
     std::unordered_set<GI_ref_weak> get_gif_edges(GI_ref_weak from);
-    Map<GI_ref_weak, Link_ref> &get_edges(GI_ref_weak from);
+    const Map<GI_ref_weak, Link_ref> &get_edges(GI_ref_weak from);
+    std::shared_ptr<const Adjacency> get_adjacency();
+    /** Dropped on the first access after a mutation */
+    Map<Node *, std::vector<Path>> &get_path_cache();
 
     Graph();
     ~Graph();
@@ -265,6 +479,12 @@ class Graph {
     void invalidate();
     int node_count();
     int edge_count();
+    /**
+     * Changes on every node/edge addition or removal and on merges.
+     * Drawn from a counter shared by all graphs, so a version identifies the
+     * graph as well as its state.
+     */
+    uint64_t get_version();
 
     std::string repr();
 
@@ -273,11 +493,25 @@ class Graph {
 
     // Algorithms
     std::unordered_set<Node_ref> node_projection();
+    std::unordered_set<Node_ref> nodes_of_type(nb::type_object type);
+    std::unordered_set<Node_ref> nodes_of_types(std::vector<nb::type_object> types);
     std::vector<std::pair<Node_ref, std::string>>
     nodes_by_names(std::unordered_set<std::string> names);
     std::unordered_set<GI_ref_weak>
     bfs_visit(std::function<bool(std::vector<GI_ref_weak> &, Link_ref)> filter,
               std::vector<GI_ref_weak> start);
+
+    // Connectivity
+    /** nullopt if only the pathfinder can decide */
+    std::optional<bool> same_bus(Node_ref a, Node_ref b);
+    std::optional<std::unordered_set<Node_ref>> get_bus(Node_ref node);
+    std::optional<Node *> get_bus_root(Node_ref node);
+    /**
+     * Buses of all interfaces that are instances of type.
+     * Interfaces that need the pathfinder are returned separately.
+     */
+    std::pair<std::vector<std::unordered_set<Node_ref>>, std::unordered_set<Node_ref>>
+    get_buses(nb::type_object type);
 };
 
 template <typename T> inline std::shared_ptr<T> GraphInterface::factory() {
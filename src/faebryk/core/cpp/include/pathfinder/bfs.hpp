@@ -6,6 +6,7 @@
 
 #include "graph/graph.hpp"
 #include "graph/graphinterfaces.hpp"
+#include <memory>
 #include <optional>
 #include <string>
 #include <tuple>
@@ -55,7 +56,53 @@ template <> struct hash<Path> {
 };
 } // namespace std
 
-class BFSPath : public Path, public std::enable_shared_from_this<BFSPath> {
+/**
+ * @brief Immutable path element, shared by all paths extending it
+ *
+ * Paths are stored as linked list from the head back to the root, so extending a
+ * path is O(1) instead of copying the whole path.
+ */
+struct PathSegment {
+    /*const*/ GI_ref_weak gif;
+    const PathSegment *prev;
+    /** Link from prev to gif, looked up once on extension */
+    /*const*/ Link_weak_ref link;
+    uint32_t size;
+    /** Path contains a conditional link that has to be checked on every extension */
+    bool recheck;
+    /**
+     * @brief Bloom filter of all gifs up to here
+     *
+     * Membership checks only need to walk the path if the bit of the gif is set.
+     */
+    uint64_t bloom;
+
+    static uint64_t bloom_bit(/*const*/ GI_ref_weak gif);
+};
+
+/**
+ * @brief Allocator for the path segments of one search
+ *
+ * Segments are never freed individually, the arena lives as long as any path of
+ * the search.
+ */
+class PathArena {
+    static constexpr size_t BLOCK_SIZE = 4096;
+    std::vector<std::unique_ptr<PathSegment[]>> blocks;
+    size_t block_used = BLOCK_SIZE;
+    size_t count = 0;
+
+  public:
+    const PathSegment *make(/*const*/ GI_ref_weak gif, const PathSegment *prev,
+                            /*const*/ Link_weak_ref link);
+    size_t size() const;
+    size_t memory_bytes() const;
+};
+
+class BFSPath : public std::enable_shared_from_this<BFSPath> {
+    std::shared_ptr<PathArena> arena;
+    const PathSegment *head;
+    /*const*/ GI_ref_weak root;
     std::shared_ptr<PathData> path_data;
 
   public:
@@ -96,15 +143,41 @@ class BFSPath : public Path, public std::enable_shared_from_this<BFSPath> {
      */
     bool strong_signal = false;
 
-    BFSPath(/*const*/ GI_ref_weak path_head);
+    BFSPath(/*const*/ GI_ref_weak path_head, std::shared_ptr<PathArena> arena);
     BFSPath(const BFSPath &other);
-    BFSPath(const BFSPath &other, /*const*/ GI_ref_weak new_head);
+    BFSPath(const BFSPath &other, /*const*/ GI_ref_weak new_head,
+            /*const*/ Link_weak_ref link);
     BFSPath(BFSPath &&other) = delete;
-    std::shared_ptr<BFSPath> operator+(/*const*/ GI_ref_weak gif);
+    /** link: between last() and gif */
+    std::shared_ptr<BFSPath> extend(/*const*/ GI_ref_weak gif,
+                                    /*const*/ Link_weak_ref link);
 
     PathData &get_path_data_mut();
     PathData &get_path_data() /*const*/;
     bool strong() /*const*/;
+
+    // Path interface
+    /*const*/ GI_ref_weak last() const;
+    /*const*/ GI_ref_weak first() const;
+    size_t size() const;
+    bool contains(/*const*/ GI_ref_weak gif) const;
+    std::optional<Edge> last_edge() const;
+    std::optional<TriEdge> last_tri_edge() const;
+    bool starts_with(const Path &other) const;
+    const PathSegment *get_head() const;
+    /**
+     * @brief Materializes the path
+     *
+     * O(path length), avoid in hot paths.
+     */
+    GI_refs_weak get_path() const;
+    Path to_path() const;
+    std::string str() const;
 };
 
-void bfs_visit(/*const*/ GI_ref_weak root, std::function<void(BFSPath &)> visitor);
+/**
+ * @brief Visits all paths starting at root
+ *
+ * @return bytes used to store the paths
+ */
+size_t bfs_visit(/*const*/ GI_ref_weak root, std::function<void(BFSPath &)> visitor);
@@ -7,7 +7,11 @@
 #include <cstddef>
 #include <vector>
 
-inline bool INDIV_MEASURE = true;
+/**
+ * Profiling switch, off: only the total counter counts paths, nothing is timed
+ * or aggregated
+ */
+inline bool INDIV_MEASURE = false;
 
 inline void set_indiv_measure(bool v) {
     INDIV_MEASURE = v;
@@ -23,6 +27,8 @@ struct Counter {
     size_t out_stronger = 0;
     size_t out_cnt = 0;
     double time_spent_s = 0;
+    /** bytes used to store paths, only set on total counter */
+    size_t memory_bytes = 0;
 
     bool hide = false;
     const char *name = "";
@@ -34,4 +40,29 @@ struct Counter {
     exec_multi(PathFinder *pf,
                std::vector<BFSPath> (PathFinder::*filter)(std::vector<BFSPath> &),
                std::vector<BFSPath> &p);
-};
\ No newline at end of file
+
+    void merge(const Counter &other);
+};
+
+/**
+ * Counters of all pathfinder runs since the last reset.
+ *
+ * Only collected while INDIV_MEASURE is set.
+ * Runs of a batch report concurrently, access goes through the functions below.
+ */
+struct PathFinderStats {
+    size_t calls = 0;
+    double time_spent_s = 0;
+    /** of find_paths_cached, counted regardless of INDIV_MEASURE */
+    size_t cache_hits = 0;
+    size_t cache_misses = 0;
+    /** merged by name */
+    std::vector<Counter> counters;
+
+    void add(const std::vector<Counter> &counters, double time_spent_s);
+};
+
+PathFinderStats get_pathfinder_stats();
+void reset_pathfinder_stats();
+void add_pathfinder_stats(const std::vector<Counter> &counters, double time_spent_s);
+void add_path_cache_lookup(bool hit);
\ No newline at end of file
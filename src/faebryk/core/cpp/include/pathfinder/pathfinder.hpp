@@ -29,6 +29,13 @@ inline void set_max_paths(uint32_t absolute, uint32_t no_new_weak, uint32_t no_w
     PATH_LIMITS.no_weak = no_weak;
 }
 
+/** 0: one per core */
+inline uint32_t MAX_THREADS = 0;
+
+inline void set_max_threads(uint32_t max_threads) {
+    MAX_THREADS = max_threads;
+}
+
 class PathFinder;
 
 struct Filter {
@@ -106,3 +113,31 @@ class PathFinder {
     std::pair<std::vector<Path>, std::vector<Counter>>
     find_paths(Node_ref src, std::vector<Node_ref> dst);
 };
+
+/**
+ * find_paths without dsts, memoised per graph until its next mutation.
+ *
+ * Counters are empty on cache hits.
+ */
+std::pair<std::vector<Path>, std::vector<Counter>> find_paths_cached(Node_ref src);
+
+/**
+ * Run independent searches of the srcs (each with its dsts) concurrently.
+ *
+ * The GIL is released while searching, conditional link filters implemented in
+ * python acquire it themselves.
+ * The graphs of the srcs must not be modified until all searches are done.
+ * Results are in order of srcs.
+ */
+std::vector<std::pair<std::vector<Path>, std::vector<Counter>>>
+find_paths_batch(std::vector<Node_ref> srcs, std::vector<std::vector<Node_ref>> dsts);
+
+/**
+ * Partition interfaces into buses.
+ *
+ * Returns a dense bus id per interface, equal ids mean connected.
+ * Resolved via the connectivity index of the graphs, only interfaces near
+ * conditional links need a pathfinder run, which searches all remaining of them
+ * at once.
+ */
+std::vector<size_t> find_all_buses(std::vector<Node_ref> mifs);
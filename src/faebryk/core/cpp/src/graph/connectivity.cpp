@@ -0,0 +1,350 @@
+/* This file is part of the faebryk project
+ * SPDX-License-Identifier: MIT
+ */
+
+#include "graph/graph.hpp"
+#include "graph/graphinterfaces.hpp"
+#include "graph/links.hpp"
+
+static bool is_mif(Node *node) {
+    return node->isinstance(Node::Type::get_moduleinterface_type());
+}
+
+static bool is_mif_connection(GI_ref_weak from, GI_ref_weak to) {
+    return dynamic_cast<GraphInterfaceModuleConnection *>(from) &&
+           dynamic_cast<GraphInterfaceModuleConnection *>(to) && from->has_node() &&
+           to->has_node() && is_mif(from->get_node().get()) &&
+           is_mif(to->get_node().get());
+}
+
+size_t ConnectivityIndex::UplinkKeyHash::operator()(const UplinkKey &key) const {
+    return std::hash<uint64_t>{}(key.parent_type) ^
+           (std::hash<std::string>{}(key.name) << 1);
+}
+
+Node *ConnectivityIndex::find(Map<Node *, Node *> &parents, Node *node) {
+    auto it = parents.find(node);
+    if (it == parents.end()) {
+        return node;
+    }
+
+    Node *root = node;
+    while (parents[root] != root) {
+        root = parents[root];
+    }
+    // path compression
+    while (parents[node] != root) {
+        node = std::exchange(parents[node], root);
+    }
+    return root;
+}
+
+Map<std::string, Node *> ConnectivityIndex::get_mif_children(Node *node) {
+    Map<std::string, Node *> out;
+    for (auto &[child, name] : node->get_children_gif()->get_children_with_names()) {
+        if (is_mif(child.get())) {
+            out.emplace(name, child.get());
+        }
+    }
+    return out;
+}
+
+void ConnectivityIndex::ensure(Node *node) {
+    if (this->bus_parent.contains(node)) {
+        return;
+    }
+    this->bus_parent[node] = node;
+    this->region_parent[node] = node;
+    auto &bus = this->buses[node];
+    bus.members.push_back(node);
+    bus.representatives[node->get_type().get_id()] = node;
+
+    auto parent = node->get_parent();
+    if (!parent || !is_mif(parent->first.get())) {
+        return;
+    }
+    auto parent_node = parent->first.get();
+    bus.uplinks[UplinkKey{parent_node->get_type().get_id(), parent->second}].push_back(
+        parent_node);
+
+    // paths can go up the hierarchy, so ancestors share the region
+    this->ensure(parent_node);
+    this->union_regions(node, parent_node);
+}
+
+void ConnectivityIndex::union_regions(Node *a, Node *b) {
+    auto ra = find(this->region_parent, a);
+    auto rb = find(this->region_parent, b);
+    if (ra == rb) {
+        return;
+    }
+    this->region_parent[rb] = ra;
+    if (this->conditional_regions.erase(rb)) {
+        this->conditional_regions.insert(ra);
+    }
+}
+
+bool ConnectivityIndex::children_connected(Node *a, Node *b) {
+    auto children_a = get_mif_children(a);
+    auto children_b = get_mif_children(b);
+    if (children_a.empty() || children_a.size() != children_b.size()) {
+        return false;
+    }
+    for (auto &[name, child_a] : children_a) {
+        auto child_b = children_b.find(name);
+        if (child_b == children_b.end()) {
+            return false;
+        }
+        if (find(this->bus_parent, child_a) != find(this->bus_parent, child_b->second)) {
+            return false;
+        }
+    }
+    return true;
+}
+
+void ConnectivityIndex::union_buses(Node *a, Node *b) {
+    std::vector<std::pair<Node *, Node *>> pending{{a, b}};
+    // parents that might be connected by a split
+    std::vector<std::pair<Node *, Node *>> split_candidates;
+
+    while (!pending.empty() || !split_candidates.empty()) {
+        if (pending.empty()) {
+            auto [p, q] = split_candidates.back();
+            split_candidates.pop_back();
+            if (find(this->bus_parent, p) != find(this->bus_parent, q) &&
+                this->children_connected(p, q)) {
+                pending.emplace_back(p, q);
+            }
+            continue;
+        }
+
+        auto [x, y] = pending.back();
+        pending.pop_back();
+        this->ensure(x);
+        this->ensure(y);
+        this->union_regions(x, y);
+
+        auto rx = find(this->bus_parent, x);
+        auto ry = find(this->bus_parent, y);
+        if (rx == ry) {
+            continue;
+        }
+        if (this->buses[rx].members.size() < this->buses[ry].members.size()) {
+            std::swap(rx, ry);
+        }
+        auto &big = this->buses[rx];
+        auto small = std::move(this->buses[ry]);
+        this->buses.erase(ry);
+        this->bus_parent[ry] = rx;
+
+        for (auto &[key, parents] : small.uplinks) {
+            auto &big_parents = big.uplinks[key];
+            for (auto p : parents) {
+                for (auto q : big_parents) {
+                    split_candidates.emplace_back(p, q);
+                }
+            }
+            big_parents.insert(big_parents.end(), parents.begin(), parents.end());
+        }
+
+        for (auto &[type_id, rep] : small.representatives) {
+            auto big_rep = big.representatives.find(type_id);
+            if (big_rep == big.representatives.end()) {
+                big.representatives.emplace(type_id, rep);
+                continue;
+            }
+            auto children_big = get_mif_children(big_rep->second);
+            for (auto &[name, child] : get_mif_children(rep)) {
+                auto other = children_big.find(name);
+                if (other != children_big.end()) {
+                    pending.emplace_back(child, other->second);
+                }
+            }
+        }
+
+        big.members.insert(big.members.end(), small.members.begin(),
+                           small.members.end());
+    }
+}
+
+void ConnectivityIndex::add_connection(Node *a, Node *b, Link_ref link) {
+    if (dynamic_cast<LinkDirectConditional *>(link.get())) {
+        this->ensure(a);
+        this->ensure(b);
+        this->union_regions(a, b);
+        this->conditional_regions.insert(find(this->region_parent, a));
+        return;
+    }
+    this->union_buses(a, b);
+}
+
+void ConnectivityIndex::on_edge_added(GI_ref_weak from, GI_ref_weak to, Link_ref link) {
+    if (this->dirty) {
+        return;
+    }
+
+    if (auto parent_link = dynamic_cast<LinkParent *>(link.get())) {
+        // late hierarchy changes of indexed interfaces can't be applied incrementally
+        for (auto gif : {static_cast<GI_ref_weak>(parent_link->get_parent()),
+                         static_cast<GI_ref_weak>(parent_link->get_child())}) {
+            if (gif->has_node() && this->bus_parent.contains(gif->get_node().get())) {
+                this->invalidate();
+                return;
+            }
+        }
+        return;
+    }
+
+    if (!is_mif_connection(from, to)) {
+        return;
+    }
+    this->add_connection(from->get_node().get(), to->get_node().get(), link);
+}
+
+void ConnectivityIndex::invalidate() {
+    this->dirty = true;
+    this->bus_parent.clear();
+    this->buses.clear();
+    this->region_parent.clear();
+    this->conditional_regions.clear();
+}
+
+void ConnectivityIndex::merge(ConnectivityIndex &other) {
+    if (this->dirty || other.dirty) {
+        this->invalidate();
+        other.invalidate();
+        return;
+    }
+    this->bus_parent.merge(other.bus_parent);
+    this->buses.merge(other.buses);
+    this->region_parent.merge(other.region_parent);
+    this->conditional_regions.merge(other.conditional_regions);
+    other.invalidate();
+}
+
+void ConnectivityIndex::rebuild(Graph &g) {
+    this->invalidate();
+    this->dirty = false;
+    for (auto &[from, to, link] : g.e) {
+        if (!is_mif_connection(from, to)) {
+            continue;
+        }
+        this->add_connection(from->get_node().get(), to->get_node().get(), link);
+    }
+}
+
+bool ConnectivityIndex::is_exact(Node *node) {
+    // unindexed interfaces share the region of their closest indexed ancestor
+    Node *current = node;
+    while (!this->region_parent.contains(current)) {
+        auto parent = current->get_parent();
+        if (!parent || !is_mif(parent->first.get())) {
+            // not connected to anything
+            return true;
+        }
+        current = parent->first.get();
+    }
+    return !this->conditional_regions.contains(find(this->region_parent, current));
+}
+
+std::optional<bool> ConnectivityIndex::same_bus(Graph &g, Node *a, Node *b) {
+    if (this->dirty) {
+        this->rebuild(g);
+    }
+    if (a == b) {
+        return true;
+    }
+    if (!(a->get_type() == b->get_type())) {
+        return false;
+    }
+    if (find(this->bus_parent, a) == find(this->bus_parent, b)) {
+        return true;
+    }
+    if (!this->is_exact(a) || !this->is_exact(b)) {
+        return {};
+    }
+    return false;
+}
+
+std::optional<std::vector<Node *>> ConnectivityIndex::get_bus(Graph &g, Node *node) {
+    if (this->dirty) {
+        this->rebuild(g);
+    }
+    if (!this->is_exact(node)) {
+        return {};
+    }
+    if (!this->bus_parent.contains(node)) {
+        return std::vector{node};
+    }
+
+    auto type = node->get_type();
+    std::vector<Node *> out;
+    for (auto member : this->buses[find(this->bus_parent, node)].members) {
+        if (member->get_type() == type) {
+            out.push_back(member);
+        }
+    }
+    return out;
+}
+
+std::optional<Node *> ConnectivityIndex::get_bus_root(Graph &g, Node *node) {
+    if (this->dirty) {
+        this->rebuild(g);
+    }
+    if (!this->is_exact(node)) {
+        return {};
+    }
+    return find(this->bus_parent, node);
+}
+
+std::optional<bool> Graph::same_bus(Node_ref a, Node_ref b) {
+    return this->connectivity.same_bus(*this, a.get(), b.get());
+}
+
+std::optional<std::unordered_set<Node_ref>> Graph::get_bus(Node_ref node) {
+    auto bus = this->connectivity.get_bus(*this, node.get());
+    if (!bus) {
+        return {};
+    }
+    std::unordered_set<Node_ref> out;
+    for (auto member : *bus) {
+        out.insert(member->get_self_gif()->get_node());
+    }
+    return out;
+}
+
+std::optional<Node *> Graph::get_bus_root(Node_ref node) {
+    return this->connectivity.get_bus_root(*this, node.get());
+}
+
+std::pair<std::vector<std::unordered_set<Node_ref>>, std::unordered_set<Node_ref>>
+Graph::get_buses(nb::type_object type) {
+    std::vector<std::unordered_set<Node_ref>> buses;
+    std::unordered_set<Node_ref> unresolved;
+    // bus root -> type id -> index in buses
+    Map<Node *, Map<uint64_t, size_t>> bus_indices;
+
+    for (auto &gif : this->v) {
+        if (!dynamic_cast<GraphInterfaceSelf *>(gif.get()) || !gif->has_node()) {
+            continue;
+        }
+        auto node = gif->get_node();
+        if (!node->isinstance(type) || !is_mif(node.get())) {
+            continue;
+        }
+        auto root = this->get_bus_root(node);
+        if (!root) {
+            unresolved.insert(node);
+            continue;
+        }
+        // same bus and exact same type
+        auto [it, inserted] =
+            bus_indices[*root].try_emplace(node->get_type().get_id(), buses.size());
+        if (inserted) {
+            buses.emplace_back();
+        }
+        buses[it->second].insert(node);
+    }
+
+    return {buses, unresolved};
+}
@@ -4,9 +4,29 @@
 
 #include "graph/graph.hpp"
 #include "graph/links.hpp"
+#include <atomic>
 #include <queue>
 
+// keeps the trait index of parent nodes in sync with their children
+static void update_trait_impls(Link *link, bool added) {
+    auto parent_link = dynamic_cast<LinkParent *>(link);
+    if (!parent_link) {
+        return;
+    }
+    auto parent = parent_link->get_parent();
+    auto child = parent_link->get_child();
+    if (!parent->has_node() || !child->has_node()) {
+        return;
+    }
+    if (added) {
+        parent->get_node()->add_trait_impl(child->get_node().get());
+    } else {
+        parent->get_node()->remove_trait_impl(child->get_node().get());
+    }
+}
+
 Graph::Graph() {
+    this->bump_version();
 }
 
 Graph::~Graph() {
@@ -17,6 +37,17 @@ Graph::~Graph() {
 
 void Graph::hold(GI_ref gi) {
     this->v.insert(gi);
+    this->type_index.on_hold(gi.get());
+    this->bump_version();
+}
+
+void Graph::bump_version() {
+    static std::atomic<uint64_t> version_counter{0};
+    this->version = ++version_counter;
+}
+
+uint64_t Graph::get_version() {
+    return this->version;
 }
 
 Graph_ref Graph::merge_graphs(Graph_ref g1, Graph_ref g2) {
@@ -40,6 +71,96 @@ Graph_ref Graph::merge_graphs(Graph_ref g1, Graph_ref g2) {
     return G_target;
 }
 
+Graph_ref Graph::split_off(std::vector<Node_ref> nodes) {
+    auto G_target = std::make_shared<Graph>();
+
+    Set<GI_ref_weak> gifs;
+    Set<Graph_ref> sources;
+    for (auto &node : nodes) {
+        auto self_gif = node->get_self_gif().get();
+        gifs.insert(self_gif);
+        sources.insert(self_gif->G);
+        for (auto &[gif, link] : self_gif->get_edges()) {
+            if (std::dynamic_pointer_cast<LinkSibling>(link)) {
+                gifs.insert(gif);
+            }
+        }
+    }
+
+    for (auto &G_source : sources) {
+        G_source->move_gifs(G_target, gifs);
+        G_source->reindex();
+        if (G_source->node_count() == 0) {
+            G_source->invalidate();
+        }
+    }
+    G_target->reindex();
+
+    return G_target;
+}
+
+void Graph::move_gifs(Graph_ref target, const Set<GI_ref_weak> &gifs) {
+    // edges
+    for (auto &from : gifs) {
+        if (from->G.get() != this) {
+            continue;
+        }
+        auto edges = this->e_cache.find(from);
+        if (edges == this->e_cache.end()) {
+            continue;
+        }
+        for (auto &[to, link] : edges->second) {
+            if (gifs.contains(to)) {
+                target->e_cache[from][to] = link;
+                target->e_cache_simple[from].insert(to);
+                continue;
+            }
+            this->e_cache.find(to)->second.erase(from);
+            this->e_cache_simple.find(to)->second.erase(from);
+            update_trait_impls(link.get(), false);
+        }
+        this->e_cache.erase(edges);
+        this->e_cache_simple.erase(from);
+    }
+    for (auto &edge : this->e) {
+        if (gifs.contains(std::get<0>(edge)) && gifs.contains(std::get<1>(edge))) {
+            target->e.push_back(edge);
+        }
+    }
+    std::erase_if(this->e, [&gifs](const auto &edge) {
+        return gifs.contains(std::get<0>(edge)) || gifs.contains(std::get<1>(edge));
+    });
+
+    // nodes
+    for (auto it = this->v.begin(); it != this->v.end();) {
+        if (!gifs.contains(it->get())) {
+            ++it;
+            continue;
+        }
+        (*it)->G = target;
+        target->v.insert(*it);
+        it = this->v.erase(it);
+    }
+
+    this->connectivity.invalidate();
+    target->connectivity.invalidate();
+    this->type_index.invalidate();
+    target->type_index.invalidate();
+    this->bump_version();
+    target->bump_version();
+}
+
+void Graph::reindex() {
+    // keep v_i dense, bfs uses it to index into visited vectors
+    size_t v_i = 0;
+    for (auto &gif : this->v) {
+        gif->v_i = v_i++;
+    }
+    // the CSR is indexed by v_i
+    this->adjacency.reset();
+    this->adjacency_dirty.clear();
+}
+
 void Graph::add_edge(Link_ref link) {
     auto [from, to] = link->get_connections();
 
@@ -56,6 +177,11 @@ void Graph::add_edge(Link_ref link) {
     G->e_cache[from][to] = link;
     G->e_cache[to][from] = link;
     G->e.push_back(std::make_tuple(from, to, link));
+    G->mark_adjacency_dirty(from);
+    G->mark_adjacency_dirty(to);
+    G->connectivity.on_edge_added(from, to, link);
+    update_trait_impls(link.get(), true);
+    G->bump_version();
 }
 
 void Graph::remove_edge(Link_ref link) {
@@ -77,6 +203,11 @@ void Graph::remove_edge(Link_ref link) {
     std::erase_if(G->e, [link](const auto &edge) {
         return std::get<2>(edge) == link;
     });
+    G->mark_adjacency_dirty(from);
+    G->mark_adjacency_dirty(to);
+    update_trait_impls(link.get(), false);
+    G->connectivity.invalidate();
+    G->bump_version();
 
     // TODO
     if (G->e_cache_simple[from].empty()) {
@@ -88,18 +219,117 @@ void Graph::remove_edge(Link_ref link) {
 }
 
 void Graph::merge(Graph &other) {
+    // merged gifs got v_i past the CSR
+    for (auto &gif : other.v) {
+        this->mark_adjacency_dirty(gif.get());
+    }
     this->v.merge(other.v);
     this->e.insert(this->e.end(), other.e.begin(), other.e.end());
     this->e_cache.merge(other.e_cache);
     this->e_cache_simple.merge(other.e_cache_simple);
+    this->connectivity.merge(other.connectivity);
+    this->type_index.merge(other.type_index);
+    this->bump_version();
 }
 
 std::unordered_set<GI_ref_weak> Graph::get_gif_edges(GI_ref_weak from) {
-    return this->e_cache_simple[from];
+    auto edges = this->e_cache_simple.find(from);
+    if (edges == this->e_cache_simple.end()) {
+        return {};
+    }
+    return edges->second;
+}
+
+const Map<GI_ref_weak, Link_ref> &Graph::get_edges(GI_ref_weak from) {
+    // don't insert, lookups have to be safe from concurrent readers
+    static const Map<GI_ref_weak, Link_ref> empty;
+    auto edges = this->e_cache.find(from);
+    if (edges == this->e_cache.end()) {
+        return empty;
+    }
+    return edges->second;
+}
+
+void Graph::mark_adjacency_dirty(GI_ref_weak gif) {
+    if (!this->adjacency) {
+        return;
+    }
+    this->adjacency_dirty.insert(gif);
+    // too many changes to patch, rebuild on the next query
+    if (this->adjacency_dirty.size() * ADJACENCY_REBUILD_RATIO > this->v.size()) {
+        this->adjacency.reset();
+        this->adjacency_dirty.clear();
+    }
 }
 
-Map<GI_ref_weak, Link_ref> &Graph::get_edges(GI_ref_weak from) {
-    return this->e_cache[from];
+std::shared_ptr<const Adjacency> Graph::get_adjacency() {
+    if (!this->adjacency) {
+        this->adjacency = std::make_shared<const Adjacency>(*this);
+    } else if (this->adjacency->version != this->version) {
+        this->adjacency = std::make_shared<const Adjacency>(*this, *this->adjacency,
+                                                            this->adjacency_dirty);
+    }
+    return this->adjacency;
+}
+
+Map<Node *, std::vector<Path>> &Graph::get_path_cache() {
+    if (this->path_cache_version != this->version) {
+        this->path_cache.clear();
+        this->path_cache_version = this->version;
+    }
+    return this->path_cache;
+}
+
+Adjacency::Adjacency(Graph &g)
+  : version(g.version) {
+    size_t v_cnt = 0;
+    for (auto &gif : g.v) {
+        v_cnt = std::max(v_cnt, gif->v_i + 1);
+    }
+
+    auto csr = std::make_shared<Csr>();
+    auto &offsets = csr->offsets;
+    offsets.assign(v_cnt + 1, 0);
+    for (auto &[from, tos] : g.e_cache) {
+        assert(from->v_i < v_cnt);
+        offsets[from->v_i + 1] = tos.size();
+    }
+    for (size_t i = 0; i < v_cnt; i++) {
+        offsets[i + 1] += offsets[i];
+    }
+
+    csr->entries.resize(offsets.back());
+    for (auto &[from, tos] : g.e_cache) {
+        std::copy(tos.begin(), tos.end(), csr->entries.begin() + offsets[from->v_i]);
+    }
+    this->csr = std::move(csr);
+}
+
+Adjacency::Adjacency(Graph &g, const Adjacency &base, const Set<GI_ref_weak> &dirty)
+  : csr(base.csr)
+  , version(g.version) {
+    for (auto gif : dirty) {
+        auto &entries = this->overlay[gif];
+        auto tos = g.e_cache.find(gif);
+        if (tos != g.e_cache.end()) {
+            entries.assign(tos->second.begin(), tos->second.end());
+        }
+    }
+}
+
+std::span<const Adjacency::Entry> Adjacency::get(GI_ref_weak from) const {
+    if (!this->overlay.empty()) {
+        auto entries = this->overlay.find(from);
+        if (entries != this->overlay.end()) {
+            return entries->second;
+        }
+    }
+    auto &offsets = this->csr->offsets;
+    if (from->v_i + 1 >= offsets.size()) {
+        return {};
+    }
+    return std::span(this->csr->entries)
+        .subspan(offsets[from->v_i], offsets[from->v_i + 1] - offsets[from->v_i]);
 }
 
 void Graph::remove_node(GI_ref node) {
@@ -115,17 +345,28 @@ void Graph::remove_node(GI_ref node) {
 
     for (auto &[to, link] : this->e_cache[node_ptr]) {
         this->e_cache[to].erase(node_ptr);
+        this->mark_adjacency_dirty(to);
+        update_trait_impls(link.get(), false);
     }
+    this->mark_adjacency_dirty(node_ptr);
     this->e_cache.erase(node_ptr);
 
     std::erase_if(this->e, [node_ptr](const auto &edge) {
         return std::get<0>(edge) == node_ptr || std::get<1>(edge) == node_ptr;
     });
+    this->connectivity.invalidate();
+    this->type_index.invalidate();
+    this->bump_version();
 }
 
 void Graph::invalidate() {
     this->invalidated = true;
     this->v.clear();
+    this->adjacency.reset();
+    this->adjacency_dirty.clear();
+    this->connectivity.invalidate();
+    this->type_index.invalidate();
+    this->bump_version();
 }
 
 int Graph::node_count() {
@@ -157,6 +398,22 @@ std::unordered_set<Node_ref> Graph::node_projection() {
     return nodes;
 }
 
+std::unordered_set<Node_ref> Graph::nodes_of_type(nb::type_object type) {
+    return this->nodes_of_types({type});
+}
+
+std::unordered_set<Node_ref> Graph::nodes_of_types(std::vector<nb::type_object> types) {
+    std::vector<uint64_t> type_ids;
+    for (auto &type : types) {
+        type_ids.push_back((uint64_t)type.ptr());
+    }
+    std::unordered_set<Node_ref> nodes;
+    for (auto node : this->type_index.get(*this, type_ids)) {
+        nodes.insert(node->get_self_gif()->get_node());
+    }
+    return nodes;
+}
+
 std::vector<std::pair<Node_ref, std::string>>
 Graph::nodes_by_names(std::unordered_set<std::string> names) {
     std::vector<std::pair<Node_ref, std::string>> nodes;
@@ -175,6 +432,7 @@ Graph::bfs_visit(std::function<bool(std::vector<GI_ref_weak> &, Link_ref)> filte
     std::unordered_set<GI_ref_weak> visited;
     std::queue<std::vector<GI_ref_weak>> queue;
     queue.push(start);
+    auto adjacency = this->get_adjacency();
 
     while (!queue.empty()) {
         auto path = queue.front();
@@ -182,7 +440,7 @@ Graph::bfs_visit(std::function<bool(std::vector<GI_ref_weak> &, Link_ref)> filte
 
         auto current = path.back();
 
-        for (auto &[next, link] : this->e_cache[current]) {
+        for (auto &[next, link] : adjacency->get(current)) {
             if (visited.contains(next)) {
                 continue;
             }
@@ -21,6 +21,10 @@ Node_ref GraphInterface::get_node() {
     return this->node;
 }
 
+bool GraphInterface::has_node() {
+    return bool(this->node);
+}
+
 void GraphInterface::set_name(std::string name) {
     assert(this->name.empty());
     this->name = name;
@@ -111,15 +115,15 @@ Set<GI_ref_weak> GraphInterface::get_gif_edges() {
     return this->G->get_gif_edges(this);
 }
 
-Map<GI_ref_weak, Link_ref> &GraphInterface::get_edges() {
+const Map<GI_ref_weak, Link_ref> &GraphInterface::get_edges() {
     return this->G->get_edges(this);
 }
 
 std::unordered_set<Node_ref>
 GraphInterface::get_connected_nodes(std::vector<nb::type_object> types) {
-    auto edges = this->get_edges();
+    auto &edges = this->get_edges();
     std::unordered_set<Node_ref> nodes;
-    for (auto [to, link] : edges) {
+    for (auto &[to, link] : edges) {
         if (auto direct_link = std::dynamic_pointer_cast<LinkDirect>(link)) {
             auto node = to->get_node();
             if (node->isinstance(types)) {
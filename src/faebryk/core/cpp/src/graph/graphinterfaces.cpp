@@ -15,9 +15,9 @@ bool GraphInterfaceHierarchical::get_is_parent() {
 std::vector<Node_ref> GraphInterfaceHierarchical::get_children() {
     assert(this->is_parent);
 
-    auto edges = this->get_edges();
+    auto &edges = this->get_edges();
     std::vector<Node_ref> children;
-    for (auto [to, link] : edges) {
+    for (auto &[to, link] : edges) {
         if (auto named_link = std::dynamic_pointer_cast<LinkParent>(link)) {
             children.push_back(to->get_node());
         }
@@ -28,9 +28,9 @@ std::vector<Node_ref> GraphInterfaceHierarchical::get_children() {
 std::vector<HierarchicalNodeRef> GraphInterfaceHierarchical::get_children_with_names() {
     assert(this->is_parent);
 
-    auto edges = this->get_edges();
+    auto &edges = this->get_edges();
     std::vector<HierarchicalNodeRef> children;
-    for (auto [to, link] : edges) {
+    for (auto &[to, link] : edges) {
         if (auto named_link = dynamic_cast<LinkNamedParent *>(link.get())) {
             children.push_back(std::make_pair(to->get_node(), named_link->get_name()));
         }
@@ -42,8 +42,8 @@ std::optional<std::shared_ptr<LinkParent>>
 GraphInterfaceHierarchical::get_parent_link() {
     assert(!this->is_parent);
 
-    auto edges = this->get_edges();
-    for (auto [to, link] : edges) {
+    auto &edges = this->get_edges();
+    for (auto &[to, link] : edges) {
         if (auto parent_link = std::dynamic_pointer_cast<LinkParent>(link)) {
             return parent_link;
         }
@@ -98,8 +98,8 @@ bool GraphInterfaceHierarchical::is_downlink(GI_ref_weak from, GI_ref_weak to) {
 
 // GraphInterfaceReference -------------------------------------------------------------
 GraphInterfaceSelf *GraphInterfaceReference::get_referenced_gif() {
-    auto edges = this->get_edges();
-    for (auto [to, link] : edges) {
+    auto &edges = this->get_edges();
+    for (auto &[to, link] : edges) {
         if (auto pointer_link = std::dynamic_pointer_cast<LinkPointer>(link)) {
             if (!std::dynamic_pointer_cast<LinkSibling>(link)) {
                 return pointer_link->get_pointee();
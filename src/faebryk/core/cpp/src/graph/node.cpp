@@ -137,18 +137,26 @@ Node::Type Node::get_type() {
     return *this->type;
 }
 
+const std::unordered_set<uint64_t> &Node::get_mro_ids() {
+    static const std::unordered_set<uint64_t> empty;
+    if (!this->type) {
+        return empty;
+    }
+    return this->type->get_mro_ids();
+}
+
 bool Node::isinstance(nb::type_object type) {
     if (!this->type) {
         return false;
     }
-    return this->get_type().is_subclass(type);
+    return this->type->is_subclass(type);
 }
 
 bool Node::isinstance(std::vector<nb::type_object> types) {
     if (!this->type) {
         return false;
     }
-    return this->get_type().is_subclass(types);
+    return this->type->is_subclass(types);
 }
 
 std::optional<nb::object> Node::get_py_handle() {
@@ -234,6 +242,85 @@ Node::get_children(bool direct_only, std::optional<std::vector<nb::type_object>>
     return children_filtered;
 }
 
+Node::ChildIterator::ChildIterator(Node &node, bool direct_only,
+                                   std::optional<std::vector<nb::type_object>> types,
+                                   bool include_root,
+                                   std::function<bool(Node_ref)> f_filter)
+  : direct_only(direct_only)
+  , f_filter(f_filter) {
+    if (types) {
+        auto type_h = nb::type<Node>();
+        for (auto &type : *types) {
+            // always true if Node in types
+            if (type.ptr() == type_h.ptr()) {
+                this->type_ids.clear();
+                break;
+            }
+            this->type_ids.push_back((uint64_t)type.ptr());
+        }
+    }
+    if (include_root) {
+        this->root = node.self->get_node();
+    }
+    this->push_children(node);
+}
+
+void Node::ChildIterator::push_children(Node &node) {
+    for (auto &[to, link] : node.children->get_edges()) {
+        if (dynamic_cast<LinkParent *>(link.get())) {
+            this->queue.push_back(to->get_node());
+        }
+    }
+}
+
+bool Node::ChildIterator::matches(Node &node) {
+    if (this->type_ids.empty()) {
+        return true;
+    }
+    auto &mro_ids = node.get_mro_ids();
+    return std::any_of(this->type_ids.begin(), this->type_ids.end(),
+                       [&mro_ids](auto type_id) {
+                           return mro_ids.contains(type_id);
+                       });
+}
+
+std::optional<Node_ref> Node::ChildIterator::next() {
+    if (this->root) {
+        auto root = *std::exchange(this->root, std::nullopt);
+        if (this->matches(*root) && (!this->f_filter || this->f_filter(root))) {
+            return root;
+        }
+    }
+    while (!this->queue.empty()) {
+        auto node = std::move(this->queue.front());
+        this->queue.pop_front();
+        if (!this->direct_only) {
+            this->push_children(*node);
+        }
+        if (!this->matches(*node)) {
+            continue;
+        }
+        if (this->f_filter && !this->f_filter(node)) {
+            continue;
+        }
+        return node;
+    }
+    return {};
+}
+
+Node::ChildIterator
+Node::iter_children(bool direct_only, std::optional<std::vector<nb::type_object>> types,
+                    bool include_root, std::function<bool(Node_ref)> f_filter) {
+    return ChildIterator(*this, direct_only, types, include_root, f_filter);
+}
+
+std::optional<Node_ref>
+Node::get_first_child(std::optional<std::vector<nb::type_object>> types,
+                      bool direct_only, bool include_root,
+                      std::function<bool(Node_ref)> f_filter) {
+    return this->iter_children(direct_only, types, include_root, f_filter).next();
+}
+
 std::unordered_set<Node_ref> Node::bfs_node(std::function<bool(Path)> filter) {
     std::unordered_set<Node_ref> out;
 
@@ -257,3 +344,41 @@ void Node::setter_no_include_parents_in_full_name(bool no_include_parents_in_ful
 bool Node::getter_no_include_parents_in_full_name() const {
     return this->no_include_parents_in_full_name;
 }
+
+void Node::add_trait_impl(Node *child) {
+    if (!child->type) {
+        return;
+    }
+    for (auto trait_id : child->type->get_trait_ids()) {
+        this->trait_impls[trait_id].push_back(child);
+    }
+}
+
+void Node::remove_trait_impl(Node *child) {
+    if (!child->type) {
+        return;
+    }
+    for (auto trait_id : child->type->get_trait_ids()) {
+        auto impls = this->trait_impls.find(trait_id);
+        if (impls == this->trait_impls.end()) {
+            continue;
+        }
+        std::erase(impls->second, child);
+        if (impls->second.empty()) {
+            this->trait_impls.erase(impls);
+        }
+    }
+}
+
+std::vector<Node_ref> Node::get_trait_fast(nb::type_object trait) {
+    auto impls = this->trait_impls.find((uint64_t)trait.ptr());
+    if (impls == this->trait_impls.end()) {
+        return {};
+    }
+    std::vector<Node_ref> out;
+    out.reserve(impls->second.size());
+    for (auto impl : impls->second) {
+        out.push_back(impl->get_self_gif()->get_node());
+    }
+    return out;
+}
@@ -6,11 +6,13 @@
 #include "pyutil.hpp"
 
 std::optional<nb::type_object> module_interface_type;
+uint64_t module_interface_type_id = 0;
 
 nb::type_object Node::Type::get_moduleinterface_type() {
     if (!module_interface_type) {
         module_interface_type =
             nb::module_::import_("faebryk.core.moduleinterface").attr("ModuleInterface");
+        module_interface_type_id = (uint64_t)module_interface_type->ptr();
     }
     return *module_interface_type;
 }
@@ -19,7 +21,10 @@ Node::Type::Type(nb::handle type)
   : type(type)
   , mro_ids(nb::hasattr(type, "_mro_ids")
                 ? nb::cast<std::unordered_set<uint64_t>>(type.attr("_mro_ids"))
-                : std::unordered_set<uint64_t>()) {
+                : std::unordered_set<uint64_t>())
+  , trait_ids(nb::hasattr(type, "_trait_ids")
+                  ? nb::cast<std::vector<uint64_t>>(type.attr("_trait_ids"))
+                  : std::vector<uint64_t>()) {
     // Needed because of Node not having it's own id in mro_ids
     this->mro_ids.insert((uint64_t)this->type.ptr());
 }
@@ -39,10 +44,26 @@ bool Node::Type::operator==(const Type &other) const {
     return this->type.ptr() == other.type.ptr();
 }
 
+uint64_t Node::Type::get_id() const {
+    return (uint64_t)this->type.ptr();
+}
+
+const std::vector<uint64_t> &Node::Type::get_trait_ids() const {
+    return this->trait_ids;
+}
+
+const std::unordered_set<uint64_t> &Node::Type::get_mro_ids() const {
+    return this->mro_ids;
+}
+
 std::string Node::Type::get_name() {
     return pyutil::get_name(this->type);
 }
 
 bool Node::Type::is_moduleinterface() {
-    return this->is_subclass(this->get_moduleinterface_type());
+    // by id, to not touch python objects once initialized (GIL released)
+    if (!module_interface_type_id) {
+        get_moduleinterface_type();
+    }
+    return this->mro_ids.contains(module_interface_type_id);
 }
@@ -0,0 +1,93 @@
+/* This file is part of the faebryk project
+ * SPDX-License-Identifier: MIT
+ */
+
+#include "graph/graph.hpp"
+#include "graph/graphinterfaces.hpp"
+
+void NodeTypeIndex::on_hold(GI_ref_weak gi) {
+    if (this->dirty || !dynamic_cast<GraphInterfaceSelf *>(gi)) {
+        return;
+    }
+    this->pending.push_back(gi);
+}
+
+void NodeTypeIndex::flush() {
+    std::vector<GI_ref_weak> not_ready;
+    for (auto gi : this->pending) {
+        if (!gi->has_node()) {
+            not_ready.push_back(gi);
+            continue;
+        }
+        auto node = gi->get_node().get();
+        auto &mro_ids = node->get_mro_ids();
+        if (mro_ids.empty()) {
+            not_ready.push_back(gi);
+            continue;
+        }
+        for (auto type_id : mro_ids) {
+            this->buckets[type_id].push_back(node);
+        }
+    }
+    this->pending = std::move(not_ready);
+}
+
+void NodeTypeIndex::invalidate() {
+    this->dirty = true;
+    this->buckets.clear();
+    this->pending.clear();
+}
+
+void NodeTypeIndex::merge(NodeTypeIndex &other) {
+    if (this->dirty || other.dirty) {
+        this->invalidate();
+        other.invalidate();
+        return;
+    }
+    for (auto &[type_id, nodes] : other.buckets) {
+        auto &bucket = this->buckets[type_id];
+        bucket.insert(bucket.end(), nodes.begin(), nodes.end());
+    }
+    this->pending.insert(this->pending.end(), other.pending.begin(),
+                         other.pending.end());
+    other.invalidate();
+}
+
+void NodeTypeIndex::rebuild(Graph &g) {
+    this->invalidate();
+    this->dirty = false;
+    for (auto &gif : g.v) {
+        this->on_hold(gif.get());
+    }
+}
+
+std::vector<Node *> NodeTypeIndex::get(Graph &g, const std::vector<uint64_t> &type_ids) {
+    if (this->dirty) {
+        this->rebuild(g);
+    }
+    this->flush();
+
+    if (type_ids.size() == 1) {
+        auto bucket = this->buckets.find(type_ids[0]);
+        if (bucket == this->buckets.end()) {
+            return {};
+        }
+        return bucket->second;
+    }
+
+    // nodes can be instances of several of the types
+    Set<Node *> seen;
+    std::vector<Node *> out;
+    for (auto type_id : type_ids) {
+        auto bucket = this->buckets.find(type_id);
+        if (bucket == this->buckets.end()) {
+            continue;
+        }
+        for (auto node : bucket->second) {
+            if (seen.insert(node).second) {
+                out.push_back(node);
+            }
+        }
+    }
+    return out;
+}
@@ -49,13 +49,8 @@ void print_obj_pyptr(PyObject *pyobj) {
 
 std::pair<std::vector<Path>, std::vector<Counter>>
 find_paths(Node_ref src, std::vector<Node_ref> dst) {
-    PerfCounter pc;
-
     PathFinder pf;
-    auto res = pf.find_paths(src, dst);
-
-    printf("TIME: %3.2lf ms C++ find paths\n", pc.ms());
-    return res;
+    return pf.find_paths(src, dst);
 }
 
 PYMOD(m) {
@@ -69,8 +64,15 @@ PYMOD(m) {
     // TODO why this rv_pol needed
     m.def("find_paths", &find_paths, "src"_a, "dst"_a, nb::rv_policy::reference);
     m.def("set_indiv_measure", &set_indiv_measure, "value"_a);
+    m.def("get_pathfinder_stats", &get_pathfinder_stats);
+    m.def("reset_pathfinder_stats", &reset_pathfinder_stats);
+    m.def("find_paths_cached", &find_paths_cached, "src"_a, nb::rv_policy::reference);
+    m.def("find_paths_batch", &find_paths_batch, "srcs"_a, "dsts"_a,
+          nb::rv_policy::reference);
+    m.def("find_all_buses", &find_all_buses, "mifs"_a);
 
     m.def("set_max_paths", &set_max_paths);
+    m.def("set_max_threads", &set_max_threads, "max_threads"_a);
     // Graph
     using GI = GraphInterface;
 
@@ -101,10 +103,17 @@ PYMOD(m) {
         .def("invalidate", &Graph::invalidate)
         .def_prop_ro("node_count", &Graph::node_count)
         .def_prop_ro("edge_count", &Graph::edge_count)
+        .def_prop_ro("version", &Graph::get_version)
         .def("node_projection", &Graph::node_projection)
+        .def("nodes_of_type", &Graph::nodes_of_type, "type"_a)
+        .def("nodes_of_types", &Graph::nodes_of_types, "types"_a)
         .def("nodes_by_names", &Graph::nodes_by_names)
         .def("bfs_visit", &Graph::bfs_visit, "filter"_a, "start"_a,
              nb::rv_policy::reference)
+        .def("same_bus", &Graph::same_bus, "a"_a, "b"_a)
+        .def("get_bus", &Graph::get_bus, "node"_a)
+        .def("get_buses", &Graph::get_buses, "type"_a)
+        .def_static("split_off", &Graph::split_off, "nodes"_a)
         .def("__repr__", &Graph::repr);
 
     nb::exception<LinkExists>(m, "LinkExists");
@@ -170,6 +179,19 @@ PYMOD(m) {
                LinkDirectConditional::FilterResult::FILTER_FAIL_UNRECOVERABLE);
 
     // Node
+    nb::class_<Node::ChildIterator>(m, "ChildIterator")
+        .def("__iter__",
+             [](nb::object self) {
+                 return self;
+             })
+        .def("__next__", [](Node::ChildIterator &self) {
+            auto node = self.next();
+            if (!node) {
+                throw nb::stop_iteration();
+            }
+            return *node;
+        });
+
     nb::class_<Node>(m, "Node")
         .def(nb::init<>())
         .def_static("transfer_ownership", &Node::transfer_ownership)
@@ -180,6 +202,11 @@ PYMOD(m) {
         .def("get_children", &Node::get_children, "direct_only"_a,
              "types"_a = nb::none(), "include_root"_a = false, "f_filter"_a = nb::none(),
              "sort"_a = true)
+        .def("iter_children", &Node::iter_children, "direct_only"_a,
+             "types"_a = nb::none(), "include_root"_a = false, "f_filter"_a = nb::none())
+        .def("get_first_child", &Node::get_first_child, "types"_a = nb::none(),
+             "direct_only"_a = false, "include_root"_a = false,
+             "f_filter"_a = nb::none())
         .def("get_parent", &Node::get_parent)
         .def("get_parent_force", &Node::get_parent_force)
         .def("get_name", &Node::get_name, "accept_no_parent"_a = false)
@@ -191,6 +218,7 @@ PYMOD(m) {
              nb::overload_cast<std::vector<nb::type_object>>(&Node::isinstance),
              "types"_a)
         .def("bfs_node", &Node::bfs_node, "filter"_a)
+        .def("get_trait_fast", &Node::get_trait_fast, "trait"_a)
         .def_prop_rw("no_include_parents_in_full_name",
                      &Node::getter_no_include_parents_in_full_name,
                      &Node::setter_no_include_parents_in_full_name)
@@ -207,11 +235,19 @@ PYMOD(m) {
         .def_ro("out_stronger", &Counter::out_stronger)
         .def_ro("out_cnt", &Counter::out_cnt)
         .def_ro("time_spent_s", &Counter::time_spent_s)
+        .def_ro("memory_bytes", &Counter::memory_bytes)
         .def_ro("hide", &Counter::hide)
         .def_ro("name", &Counter::name)
         .def_ro("multi", &Counter::multi)
         .def_ro("total_counter", &Counter::total_counter);
 
+    nb::class_<PathFinderStats>(m, "PathFinderStats")
+        .def_ro("calls", &PathFinderStats::calls)
+        .def_ro("time_spent_s", &PathFinderStats::time_spent_s)
+        .def_ro("cache_hits", &PathFinderStats::cache_hits)
+        .def_ro("cache_misses", &PathFinderStats::cache_misses)
+        .def_ro("counters", &PathFinderStats::counters);
+
     // Path
     nb::class_<Edge>(m, "Edge")
         .def("__repr__", &Edge::str)
@@ -3,7 +3,7 @@
  */
 
 #include "pathfinder/bfs.hpp"
-#include "perf.hpp"
+#include "graph/links.hpp"
 #include <deque>
 #include <sstream>
 
@@ -38,22 +38,73 @@ std::string UnresolvedStackElement::str() /*const*/ {
     return ss.str();
 }
 
+// PathArena implementations
+uint64_t PathSegment::bloom_bit(/*const*/ GI_ref_weak gif) {
+    // fibonacci hashing, top 6 bits select the bit
+    auto h = reinterpret_cast<uintptr_t>(gif) * 0x9E3779B97F4A7C15ull;
+    return 1ull << (h >> 58);
+}
+
+const PathSegment *PathArena::make(/*const*/ GI_ref_weak gif, const PathSegment *prev,
+                                   /*const*/ Link_weak_ref link) {
+    if (block_used == BLOCK_SIZE) {
+        blocks.emplace_back(std::make_unique<PathSegment[]>(BLOCK_SIZE));
+        block_used = 0;
+    }
+    auto &segment = blocks.back()[block_used++];
+    count++;
+
+    bool recheck = false;
+    if (prev) {
+        assert(link);
+        auto link_conditional = dynamic_cast<LinkDirectConditional *>(link);
+        recheck =
+            prev->recheck ||
+            (link_conditional && !link_conditional->needs_to_check_only_first_in_path());
+    }
+
+    segment = PathSegment{
+        .gif = gif,
+        .prev = prev,
+        .link = link,
+        .size = prev ? prev->size + 1 : 1,
+        .recheck = recheck,
+        .bloom = (prev ? prev->bloom : 0) | PathSegment::bloom_bit(gif),
+    };
+    return &segment;
+}
+
+size_t PathArena::size() const {
+    return count;
+}
+
+size_t PathArena::memory_bytes() const {
+    return blocks.size() * BLOCK_SIZE * sizeof(PathSegment);
+}
+
 // BFSPath implementations
-BFSPath::BFSPath(/*const*/ GI_ref_weak path_head)
-  : Path(path_head)
+BFSPath::BFSPath(/*const*/ GI_ref_weak path_head, std::shared_ptr<PathArena> arena)
+  : arena(arena)
+  , head(arena->make(path_head, nullptr, nullptr))
+  , root(path_head)
   , path_data(std::make_shared<PathData>()) {
 }
 
 BFSPath::BFSPath(const BFSPath &other)
-  : Path(other)
+  : arena(other.arena)
+  , head(other.head)
+  , root(other.root)
   , path_data(std::make_shared<PathData>(*other.path_data))
   , confidence(other.confidence)
   , filtered(other.filtered)
   , stop(other.stop) {
 }
 
-BFSPath::BFSPath(const BFSPath &other, /*const*/ GI_ref_weak new_head)
-  : Path(other.get_path(), new_head)
+BFSPath::BFSPath(const BFSPath &other, /*const*/ GI_ref_weak new_head,
+                 /*const*/ Link_weak_ref link)
+  : arena(other.arena)
+  , head(other.arena->make(new_head, other.head, link))
+  , root(other.root)
   , path_data(other.path_data)
   , confidence(other.confidence)
   , filtered(other.filtered)
@@ -61,9 +112,9 @@ BFSPath::BFSPath(const BFSPath &other, /*const*/ GI_ref_weak new_head)
     assert(!other.filtered);
 }
 
-std::shared_ptr<BFSPath> BFSPath::operator+(/*const*/ GI_ref_weak gif) {
-
-    return std::make_shared<BFSPath>(*this, gif);
+std::shared_ptr<BFSPath> BFSPath::extend(/*const*/ GI_ref_weak gif,
+                                         /*const*/ Link_weak_ref link) {
+    return std::make_shared<BFSPath>(*this, gif, link);
 }
 
 PathData &BFSPath::get_path_data_mut() {
@@ -87,17 +138,83 @@ bool BFSPath::strong() /*const*/ {
     return confidence == 1.0;
 }
 
-void bfs_visit(/*const*/ GI_ref_weak root, std::function<void(BFSPath &)> visitor) {
-    PerfCounterAccumulating pc, pc_search, pc_set_insert, pc_setup, pc_deque_insert,
-        pc_edges, pc_check_visited, pc_filter, pc_new_path;
-    pc_set_insert.pause();
-    pc_search.pause();
-    pc_deque_insert.pause();
-    pc_edges.pause();
-    pc_check_visited.pause();
-    pc_filter.pause();
-    pc_new_path.pause();
+/*const*/ GI_ref_weak BFSPath::last() const {
+    return head->gif;
+}
+
+/*const*/ GI_ref_weak BFSPath::first() const {
+    return root;
+}
+
+size_t BFSPath::size() const {
+    return head->size;
+}
+
+bool BFSPath::contains(/*const*/ GI_ref_weak gif) const {
+    if (!(head->bloom & PathSegment::bloom_bit(gif))) {
+        return false;
+    }
+    for (auto segment = head; segment; segment = segment->prev) {
+        if (segment->gif == gif) {
+            return true;
+        }
+    }
+    return false;
+}
 
+std::optional<Edge> BFSPath::last_edge() const {
+    if (!head->prev) {
+        return {};
+    }
+    return Edge{head->prev->gif, head->gif};
+}
+
+std::optional<TriEdge> BFSPath::last_tri_edge() const {
+    if (!head->prev || !head->prev->prev) {
+        return {};
+    }
+    return std::make_tuple(head->prev->prev->gif, head->prev->gif, head->gif);
+}
+
+bool BFSPath::starts_with(const Path &other) const {
+    if (other.size() > this->size()) {
+        return false;
+    }
+    auto segment = head;
+    while (segment->size > other.size()) {
+        segment = segment->prev;
+    }
+    auto &other_path = other.get_path();
+    for (auto it = other_path.rbegin(); it != other_path.rend(); ++it) {
+        if (segment->gif != *it) {
+            return false;
+        }
+        segment = segment->prev;
+    }
+    return true;
+}
+
+const PathSegment *BFSPath::get_head() const {
+    return head;
+}
+
+GI_refs_weak BFSPath::get_path() const {
+    GI_refs_weak out(head->size);
+    for (auto segment = head; segment; segment = segment->prev) {
+        out[segment->size - 1] = segment->gif;
+    }
+    return out;
+}
+
+Path BFSPath::to_path() const {
+    return Path(this->get_path());
+}
+
+std::string BFSPath::str() const {
+    return this->to_path().str();
+}
+
+size_t bfs_visit(/*const*/ GI_ref_weak root, std::function<void(BFSPath &)> visitor) {
     auto node_count = root->get_graph()->node_count();
     std::vector<bool> visited(node_count, false);
     std::vector<bool> visited_weak(node_count, false);
@@ -105,11 +222,7 @@ void bfs_visit(/*const*/ GI_ref_weak root, std::function<void(BFSPath &)> visito
     std::deque<std::shared_ptr<BFSPath>> hibernated_paths;
 
     auto handle_path = [&](std::shared_ptr<BFSPath> path) {
-        pc.pause();
-        pc_filter.resume();
         visitor(*path);
-        pc_filter.pause();
-        pc.resume();
 
         if (path->stop) {
             open_path_queue.clear();
@@ -133,69 +246,43 @@ void bfs_visit(/*const*/ GI_ref_weak root, std::function<void(BFSPath &)> visito
             return;
         }
 
-        pc_set_insert.resume();
         visited_weak[path->last()->v_i] = true;
 
         if (path->strong_signal) {
-            for (auto &v : path->get_path()) {
-                visited[v->v_i] = true;
+            for (auto segment = path->get_head(); segment; segment = segment->prev) {
+                visited[segment->gif->v_i] = true;
             }
         } else if (path->strong()) {
             visited[path->last()->v_i] = true;
         }
-        pc_set_insert.pause();
 
-        pc_deque_insert.resume();
         if (path->hibernated) {
             hibernated_paths.push_back(path);
         } else {
             open_path_queue.push_back(path);
         }
-        pc_deque_insert.pause();
     };
 
-    pc_setup.pause();
-    handle_path(std::make_shared<BFSPath>(root));
+    auto arena = std::make_shared<PathArena>();
+    // snapshot, stays valid even if filters mutate the graph
+    auto adjacency = root->get_graph()->get_adjacency();
+    handle_path(std::make_shared<BFSPath>(root, arena));
 
-    pc_search.resume();
     while (!open_path_queue.empty()) {
         auto path = open_path_queue.front();
         open_path_queue.pop_front();
 
-        pc_edges.resume();
-        auto edges = path->last()->get_gif_edges();
-        pc_edges.pause();
-        for (auto &neighbour : edges) {
-            pc_check_visited.resume();
+        for (auto &[neighbour, link] : adjacency->get(path->last())) {
             if (visited[neighbour->v_i]) {
-                pc_check_visited.pause();
                 continue;
             }
             if (visited_weak[neighbour->v_i] && path->contains(neighbour)) {
-                pc_check_visited.pause();
                 continue;
             }
-            pc_check_visited.pause();
-
-            pc_new_path.resume();
-            auto new_path = *path + neighbour;
-            pc_new_path.pause();
-            pc_search.pause();
-            handle_path(new_path);
-            pc_search.resume();
+
+            handle_path(path->extend(neighbour, link.get()));
         }
     }
-    pc_set_insert.pause();
-    pc_search.pause();
-    pc.pause();
-
-    printf("   TIME: %3.2lf ms BFS Check Visited\n", pc_check_visited.ms());
-    printf("   TIME: %3.2lf ms BFS Edges\n", pc_edges.ms());
-    printf("   TIME: %3.2lf ms BFS New Path\n", pc_new_path.ms());
-    printf("  TIME: %3.2lf ms BFS Search\n", pc_search.ms());
-    printf("  TIME: %3.2lf ms BFS Setup\n", pc_setup.ms());
-    printf("  TIME: %3.2lf ms BFS Set Insert\n", pc_set_insert.ms());
-    printf("  TIME: %3.2lf ms BFS Deque Insert\n", pc_deque_insert.ms());
-    printf(" TIME: %3.2lf ms BFS Non-filter total\n", pc.ms());
-    printf(" TIME: %3.2lf ms BFS Filter total\n", pc_filter.ms());
+
+    return arena->memory_bytes();
 }
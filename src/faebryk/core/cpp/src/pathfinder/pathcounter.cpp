@@ -6,10 +6,21 @@
 #include "pathfinder/bfs.hpp"
 #include "pathfinder/pathfinder.hpp"
 #include "perf.hpp"
+#include <cstring>
+#include <mutex>
 
 bool Counter::exec(PathFinder *pf, bool (PathFinder::*filter)(BFSPath &), BFSPath &p) {
-    if (!INDIV_MEASURE && !total_counter) {
-        return (pf->*filter)(p);
+    if (!INDIV_MEASURE) {
+        if (!total_counter) {
+            return (pf->*filter)(p);
+        }
+        // path count is needed for the limits, skip timing
+        in_cnt++;
+        bool res = (pf->*filter)(p);
+        if (res) {
+            out_cnt++;
+        }
+        return res;
     }
 
     // perf pre
@@ -60,4 +71,57 @@ Counter::exec_multi(PathFinder *pf,
     out_cnt += res.size();
 
     return res;
-}
\ No newline at end of file
+}
+
+void Counter::merge(const Counter &other) {
+    in_cnt += other.in_cnt;
+    weak_in_cnt += other.weak_in_cnt;
+    out_weaker += other.out_weaker;
+    out_stronger += other.out_stronger;
+    out_cnt += other.out_cnt;
+    time_spent_s += other.time_spent_s;
+    memory_bytes += other.memory_bytes;
+}
+
+void PathFinderStats::add(const std::vector<Counter> &counters, double time_spent_s) {
+    this->calls++;
+    this->time_spent_s += time_spent_s;
+    for (auto &counter : counters) {
+        auto existing = std::find_if(this->counters.begin(), this->counters.end(),
+                                     [&](const Counter &c) {
+                                         return !strcmp(c.name, counter.name);
+                                     });
+        if (existing == this->counters.end()) {
+            this->counters.push_back(counter);
+        } else {
+            existing->merge(counter);
+        }
+    }
+}
+
+static std::mutex stats_mutex;
+static PathFinderStats stats;
+
+PathFinderStats get_pathfinder_stats() {
+    std::lock_guard lock(stats_mutex);
+    return stats;
+}
+
+void reset_pathfinder_stats() {
+    std::lock_guard lock(stats_mutex);
+    stats = PathFinderStats{};
+}
+
+void add_pathfinder_stats(const std::vector<Counter> &counters, double time_spent_s) {
+    std::lock_guard lock(stats_mutex);
+    stats.add(counters, time_spent_s);
+}
+
+void add_path_cache_lookup(bool hit) {
+    std::lock_guard lock(stats_mutex);
+    if (hit) {
+        stats.cache_hits++;
+    } else {
+        stats.cache_misses++;
+    }
+}
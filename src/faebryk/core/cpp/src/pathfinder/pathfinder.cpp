@@ -6,30 +6,44 @@
 #include "graph/links.hpp"
 #include "pathfinder/bfs.hpp"
 #include "pathfinder/pathcounter.hpp"
+#include <atomic>
+#include <exception>
 #include <ranges>
+#include <thread>
 #include <unordered_map>
 #include <unordered_set>
 
 // Debug Util --------------------------------------------------------------------------
-// TODO set to empty
+// split tracing is compiled in with GLOBAL_PRINTF_DEBUG only, it floods stdout on
+// large designs and interleaves across batch worker threads
+#if GLOBAL_PRINTF_DEBUG
 #define printf_split printf
+#else
+#define printf_split(...)
+#endif
 
 // -------------------------------------------------------------------------------------
 
 // Util --------------------------------------------------------------------------------
 GI_refs_weak get_split_children(GI_ref_weak split_point) {
-    // TODO this can be optimized I think
-    auto children = split_point->get_node()->get_children(
-        true, {{Node::Type::get_moduleinterface_type()}}, false);
+    // no python objects involved, runs without the GIL
+    auto children = split_point->get_node()->get_children_gif()->get_children();
     GI_refs_weak out;
     for (auto &c : children) {
+        if (!c->get_type().is_moduleinterface()) {
+            continue;
+        }
         out.push_back(c->get_parent_gif().get());
     }
     return out;
 }
 
 SplitState::SplitState(const BFSPath &path)
-  : split_prefix(std::vector(path.get_path().begin(), path.get_path().end() - 1)) {
+  : split_prefix([&path]() {
+      auto prefix = path.get_path();
+      prefix.pop_back();
+      return prefix;
+  }()) {
     for (auto &gif : get_split_children(split_point())) {
         suffix_complete_paths[gif];
         wait_paths[gif];
@@ -215,10 +229,13 @@ PathFinder::find_paths(Node_ref src, std::vector<Node_ref> dst) {
 
     Counter total_counter{.name = "total", .total_counter = true};
 
-    PerfCounter pc_bfs;
+    std::optional<PerfCounter> pc;
+    if (INDIV_MEASURE) {
+        pc.emplace();
+    }
 
     // Valid paths BFS
-    bfs_visit(src->get_self_gif().get(), [&](BFSPath &p) {
+    total_counter.memory_bytes = bfs_visit(src->get_self_gif().get(), [&](BFSPath &p) {
         bool res = total_counter.exec(this, &PathFinder::run_filters, p);
         if (!res) {
             return;
@@ -241,8 +258,6 @@ PathFinder::find_paths(Node_ref src, std::vector<Node_ref> dst) {
         }
     });
 
-    printf("TIME: %3.2lf ms BFS\n", pc_bfs.ms());
-
     // Complete paths
     Counter incomplete_counter{.name = "incomplete", .total_counter = false};
     std::vector<Path> complete_paths;
@@ -250,7 +265,7 @@ PathFinder::find_paths(Node_ref src, std::vector<Node_ref> dst) {
         if (!incomplete_counter.exec(this, &PathFinder::_filter_incomplete, *p)) {
             continue;
         }
-        complete_paths.push_back(Path(std::move(p->get_path())));
+        complete_paths.push_back(p->to_path());
     }
 
     // Counters
@@ -265,6 +280,10 @@ PathFinder::find_paths(Node_ref src, std::vector<Node_ref> dst) {
     counters.push_back(total_counter);
     counters.push_back(incomplete_counter);
 
+    if (pc) {
+        add_pathfinder_stats(counters, pc->s());
+    }
+
     // Return
     return std::make_pair(complete_paths, counters);
 }
@@ -273,9 +292,11 @@ PathFinder::find_paths(Node_ref src, std::vector<Node_ref> dst) {
 
 bool PathFinder::_count(BFSPath &p) {
     path_cnt++;
+#if GLOBAL_PRINTF_DEBUG
     if (path_cnt % 50000 == 0) {
         printf("path_cnt: %lld\n", path_cnt);
     }
+#endif
     if (path_cnt > PATH_LIMITS.absolute) {
         p.stop = true;
     }
@@ -346,7 +367,9 @@ bool PathFinder::_build_path_stack_and_handle_splits(BFSPath &p) {
     data.not_complete = true;
 
     auto split_point = elem->parent_gif;
-    Path split_prefix(std::vector(p.get_path().begin(), p.get_path().end() - 1));
+    auto split_prefix_gifs = p.get_path();
+    split_prefix_gifs.pop_back();
+    Path split_prefix(split_prefix_gifs);
     auto &splits = this->split[split_point];
 
     printf_split("Split: %s\n", p.str().c_str());
@@ -539,34 +562,208 @@ bool PathFinder::_filter_path_by_dead_end_split(BFSPath &p) {
 }
 
 bool PathFinder::_filter_conditional_link(BFSPath &p) {
-    auto edge = p.last_edge();
-    if (!edge) {
+    auto head = p.get_head();
+    if (!head->prev) {
+        return true;
+    }
+    // links that only check the first edge are done once they are not last anymore
+    if (!head->recheck && !dynamic_cast<LinkDirectConditional *>(head->link)) {
         return true;
     }
-    /*const*/ auto linkobj = p.get_link(*edge);
-    // printf("Path: %s\n", p.str().c_str());
-    // printf("Edge: %s\n", edge->str().c_str());
 
-    bool ok = true;
-    p.iterate_edges([&](Edge &edge) {
-        auto link_conditional = dynamic_cast<LinkDirectConditional *>(p.get_link(edge));
+    std::vector<const PathSegment *> segments;
+    for (auto segment = head; segment->prev; segment = segment->prev) {
+        segments.push_back(segment);
+    }
+
+    auto path = p.to_path();
+    for (auto it = segments.rbegin(); it != segments.rend(); ++it) {
+        auto link_conditional = dynamic_cast<LinkDirectConditional *>((*it)->link);
         if (!link_conditional) {
-            return true;
+            continue;
         }
-        bool is_last_edge = edge.to == p.last();
+        bool is_last_edge = *it == head;
         if (link_conditional->needs_to_check_only_first_in_path() && !is_last_edge) {
-            return true;
+            continue;
         }
-        bool filtered_out = link_conditional->run_filter(p) !=
-                            LinkDirectConditional::FilterResult::FILTER_PASS;
-        ok &= !filtered_out;
-        // no need to iterate further
-        return ok;
-    });
+        if (link_conditional->run_filter(path) !=
+            LinkDirectConditional::FilterResult::FILTER_PASS) {
+            // no need to iterate further
+            return false;
+        }
+    }
 
-    return ok;
+    return true;
 }
 
 bool PathFinder::_filter_incomplete(BFSPath &p) {
     return !p.get_path_data().not_complete;
 }
+
+// Cache -------------------------------------------------------------------------------
+
+std::pair<std::vector<Path>, std::vector<Counter>> find_paths_cached(Node_ref src) {
+    auto G = src->get_graph();
+    auto &cache = G->get_path_cache();
+    if (auto cached = cache.find(src.get()); cached != cache.end()) {
+        add_path_cache_lookup(true);
+        return {cached->second, {}};
+    }
+    add_path_cache_lookup(false);
+
+    auto version = G->get_version();
+    PathFinder pf;
+    auto res = pf.find_paths(src, {});
+
+    // filters could have modified the graph while searching
+    G = src->get_graph();
+    if (G->get_version() == version) {
+        G->get_path_cache().emplace(src.get(), res.first);
+    }
+    return res;
+}
+
+// Batch -------------------------------------------------------------------------------
+
+std::vector<std::pair<std::vector<Path>, std::vector<Counter>>>
+find_paths_batch(std::vector<Node_ref> srcs, std::vector<std::vector<Node_ref>> dsts) {
+    if (srcs.size() != dsts.size()) {
+        throw std::runtime_error("need one dst list per src");
+    }
+    if (srcs.empty()) {
+        return {};
+    }
+
+    // everything that touches python objects or lazily mutates the graph
+    // has to happen before the GIL is released
+    Node::Type::get_moduleinterface_type();
+    for (auto &src : srcs) {
+        src->get_graph()->get_adjacency();
+    }
+
+    std::vector<std::pair<std::vector<Path>, std::vector<Counter>>> results(srcs.size());
+    std::vector<std::exception_ptr> errors(srcs.size());
+    std::atomic<size_t> next = 0;
+
+    auto worker = [&]() {
+        for (size_t i = next++; i < srcs.size(); i = next++) {
+            try {
+                PathFinder pf;
+                results[i] = pf.find_paths(srcs[i], dsts[i]);
+            } catch (...) {
+                errors[i] = std::current_exception();
+            }
+        }
+    };
+
+    size_t thread_cnt = MAX_THREADS ? MAX_THREADS : std::thread::hardware_concurrency();
+    thread_cnt = std::clamp<size_t>(thread_cnt, 1, srcs.size());
+    {
+        nb::gil_scoped_release release;
+        // joined before the GIL is reacquired
+        std::vector<std::jthread> threads;
+        for (size_t i = 1; i < thread_cnt; i++) {
+            threads.emplace_back(worker);
+        }
+        worker();
+    }
+
+    for (auto &error : errors) {
+        if (error) {
+            std::rethrow_exception(error);
+        }
+    }
+    return results;
+}
+
+// Buses -------------------------------------------------------------------------------
+
+std::vector<size_t> find_all_buses(std::vector<Node_ref> mifs) {
+    std::vector<size_t> bus_ids(mifs.size());
+    size_t bus_cnt = 0;
+
+    // bus root -> type id -> bus id
+    Map<Node *, Map<uint64_t, size_t>> root_bus_ids;
+    // keep input order for deterministic ids
+    std::vector<Node_ref> unresolved;
+    Map<Node_ref, std::vector<size_t>> unresolved_indices;
+
+    for (size_t i = 0; i < mifs.size(); i++) {
+        auto &mif = mifs[i];
+        if (!mif->get_type().is_moduleinterface()) {
+            throw std::runtime_error("mif type is not MODULEINTERFACE");
+        }
+        auto root = mif->get_graph()->get_bus_root(mif);
+        if (!root) {
+            auto &indices = unresolved_indices[mif];
+            if (indices.empty()) {
+                unresolved.push_back(mif);
+            }
+            indices.push_back(i);
+            continue;
+        }
+        auto [it, inserted] =
+            root_bus_ids[*root].try_emplace(mif->get_type().get_id(), bus_cnt);
+        if (inserted) {
+            bus_cnt++;
+        }
+        bus_ids[i] = it->second;
+    }
+
+    // searched in rounds of concurrent runs, a src might turn out to be on the bus
+    // of an earlier src of the same round, then its result is dropped
+    size_t round_size = MAX_THREADS ? MAX_THREADS : std::thread::hardware_concurrency();
+    round_size = std::max<size_t>(round_size, 1);
+    auto next = unresolved.begin();
+    while (true) {
+        std::vector<Node_ref> srcs;
+        std::vector<std::vector<Node_ref>> dsts;
+        for (; next != unresolved.end() && srcs.size() < round_size; ++next) {
+            if (!unresolved_indices.contains(*next)) {
+                continue;
+            }
+            srcs.push_back(*next);
+            auto &src_dsts = dsts.emplace_back();
+            for (auto &[mif, _] : unresolved_indices) {
+                if (mif != *next) {
+                    src_dsts.push_back(mif);
+                }
+            }
+        }
+        if (srcs.empty()) {
+            break;
+        }
+
+        // nothing to search for if only one is left
+        std::vector<std::pair<std::vector<Path>, std::vector<Counter>>> results(
+            srcs.size());
+        if (!dsts.front().empty()) {
+            results = find_paths_batch(srcs, dsts);
+        }
+
+        for (size_t j = 0; j < srcs.size(); j++) {
+            auto &src = srcs[j];
+            if (!unresolved_indices.contains(src)) {
+                continue;
+            }
+            std::vector<Node_ref> bus{src};
+            for (auto &path : results[j].first) {
+                bus.push_back(path.last()->get_node());
+            }
+
+            for (auto &mif : bus) {
+                auto indices = unresolved_indices.find(mif);
+                if (indices == unresolved_indices.end()) {
+                    continue;
+                }
+                for (auto i : indices->second) {
+                    bus_ids[i] = bus_cnt;
+                }
+                unresolved_indices.erase(indices);
+            }
+            bus_cnt++;
+        }
+    }
+
+    return bus_ids;
+}
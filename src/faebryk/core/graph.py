@@ -3,7 +3,7 @@
 
 import logging
 from types import UnionType
-from typing import TYPE_CHECKING, overload
+from typing import TYPE_CHECKING, get_args, overload
 
 from faebryk.core.cpp import Graph
 from faebryk.core.node import Node
@@ -27,11 +27,13 @@ class GraphFunctions:
         return list(self.nodes_of_type(Node))
 
     def nodes_with_trait[T: "Trait"](self, trait: type[T]) -> list[tuple["Node", T]]:
-        return [
-            (n, n.get_trait(trait))
-            for n in self.node_projection()
-            if n.has_trait(trait)
-        ]
+        # trait impls are nodes too, their parents are the candidates
+        candidates = {
+            parent[0]
+            for impl in self.graph.nodes_of_type(trait)
+            if (parent := impl.get_parent()) is not None
+        }
+        return [(n, n.get_trait(trait)) for n in candidates if n.has_trait(trait)]
 
     # TODO: Waiting for python to add support for type mapping
     def nodes_with_traits[*Ts](
@@ -44,7 +46,9 @@ class GraphFunctions:
         ]
 
     def nodes_of_type[T: "Node"](self, t: type[T]) -> set[T]:
-        return {n for n in self.graph.node_projection() if isinstance(n, t)}
+        if not (isinstance(t, type) and issubclass(t, Node)):
+            return {n for n in self.graph.node_projection() if isinstance(n, t)}
+        return self.graph.nodes_of_type(t)  # type: ignore
 
     @overload
     def nodes_of_types(self, t: tuple[type["Node"], ...]) -> set["Node"]: ...
@@ -52,4 +56,7 @@ class GraphFunctions:
     def nodes_of_types(self, t: UnionType) -> set["Node"]: ...
 
     def nodes_of_types(self, t):  # type: ignore TODO
-        return {n for n in self.graph.node_projection() if isinstance(n, t)}
+        types = get_args(t) if isinstance(t, UnionType) else t
+        if not all(isinstance(t_, type) and issubclass(t_, Node) for t_ in types):
+            return {n for n in self.graph.node_projection() if isinstance(n, t)}
+        return self.graph.nodes_of_types(types)
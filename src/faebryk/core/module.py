@@ -56,21 +56,22 @@ class Module(Node):
         f_filter: Callable[[T], bool] | None = None,
         sort: bool = True,
     ) -> set[T]:
-        out = self.get_children(
-            direct_only=direct_only,
-            types=types,
-            include_root=include_root,
-            f_filter=f_filter,
-            sort=sort,
+        # results are sets, sorting the children would be wasted
+        out = set(
+            self.iter_children(
+                direct_only=direct_only,
+                types=types,
+                include_root=include_root,
+                f_filter=f_filter,
+            )
         )
         out_specialized = {
             n.get_most_special()
-            for n in self.get_children(
+            for n in self.iter_children(
                 direct_only=direct_only,
                 types=Module,
                 include_root=include_root,
                 f_filter=lambda x: x.get_most_special() != x,
-                sort=sort,
             )
         }
         if most_special:
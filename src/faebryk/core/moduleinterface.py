@@ -12,6 +12,7 @@ from typing import (
 from faebryk.core.cpp import (
     GraphInterfaceModuleConnection,
     Path,
+    find_all_buses,
 )
 from faebryk.core.graphinterface import GraphInterface
 from faebryk.core.link import (
@@ -162,6 +163,38 @@ class ModuleInterface(Node):
             path for path in find_paths(self, [other]) if path[-1] is other.self_gif
         ]
 
+    def same_bus(self, other: "ModuleInterface") -> bool:
+        """
+        Like is_connected_to, but without building the paths.
+        Answered by the connectivity index of the graph, falls back to the
+        pathfinder if conditional links are involved.
+        Unlike the pathfinder, also follows connections through shorted
+        interfaces, from both ends.
+        """
+        if IMPLIED_PATHS:
+            return bool(self.is_connected_to(other))
+        if self.get_graph() is not other.get_graph():
+            return False
+        same = self.get_graph().same_bus(self, other)
+        if same is None:
+            return bool(self.is_connected_to(other))
+        return same
+
+    def get_bus(self, include_self: bool = False) -> set[Self]:
+        """
+        Like get_connected, but without building the paths.
+        Answered by the connectivity index of the graph, falls back to the
+        pathfinder if conditional links are involved.
+        Unlike the pathfinder, also follows connections through shorted
+        interfaces, from both ends.
+        """
+        bus = None if IMPLIED_PATHS else self.get_graph().get_bus(self)
+        if bus is None:
+            bus = set(self.get_connected(include_self=True))
+        if not include_self:
+            bus.discard(self)
+        return cast(set[Self], bus)
+
     def specialize[T: ModuleInterface](self, special: T) -> T:
         logger.debug(f"Specializing MIF {self} with {special}")
 
@@ -238,14 +271,29 @@ class ModuleInterface(Node):
     @staticmethod
     def _group_into_buses[T: ModuleInterface](mifs: Iterable[T]) -> dict[T, set[T]]:
         """
+        Partitions the given mifs by the bus they are on.
+        Other mifs on those buses are not included.
+
         returns dict[BusRepresentative, set[MIFs in Bus]]
+        The representative is the first of its bus in mifs.
         """
-        to_check = set(mifs)
-        buses = {}
-        while to_check:
-            interface = to_check.pop()
-            ifs = interface.get_connected(include_self=True)
-            buses[interface] = ifs
-            to_check.difference_update(ifs.keys())
-
-        return buses
+        mifs = list(dict.fromkeys(mifs))
+        buses: dict[int, set[T]] = {}
+        representatives: dict[int, T] = {}
+
+        if IMPLIED_PATHS:
+            # get_connected is needed to create the implied links
+            to_check = set(mifs)
+            for mif in mifs:
+                if mif not in to_check:
+                    continue
+                bus = mif.get_bus(include_self=True) & to_check
+                to_check.difference_update(bus)
+                buses[len(buses)] = bus
+                representatives[len(representatives)] = mif
+        else:
+            for mif, bus_id in zip(mifs, find_all_buses(mifs)):
+                buses.setdefault(bus_id, set()).add(mif)
+                representatives.setdefault(bus_id, mif)
+
+        return {representatives[bus_id]: bus for bus_id, bus in buses.items()}
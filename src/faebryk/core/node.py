@@ -9,6 +9,7 @@ from typing import (
     Any,
     Callable,
     Iterable,
+    Iterator,
     Self,
     Sequence,
     Type,
@@ -613,17 +614,15 @@ class Node(CNode):
                 )
             trait = trait.__trait__
 
-        out = self.get_children(
-            direct_only=True,
-            types=Trait,
-            f_filter=lambda impl: trait.is_traitimpl(impl)
-            and (cast(TraitImpl, impl).is_implemented() or not only_implemented),
-        )
+        out = [
+            impl
+            for impl in self.get_trait_fast(trait)
+            if not only_implemented or cast(TraitImpl, impl).is_implemented()
+        ]
 
         if len(out) > 1:
-            raise KeyErrorAmbiguous(duplicates=list(out))
-        assert len(out) <= 1
-        return cast_assert(trait, next(iter(out))) if out else None
+            raise KeyErrorAmbiguous(duplicates=out)
+        return cast_assert(trait, out[0]) if out else None
 
     def del_trait(self, trait: type["Trait"]):
         impl = self._find_trait_impl(trait, only_implemented=False)
@@ -671,6 +670,27 @@ class Node(CNode):
             ),
         )
 
+    def iter_children[T: Node](
+        self,
+        direct_only: bool,
+        types: type[T] | tuple[type[T], ...],
+        include_root: bool = False,
+        f_filter: Callable[[T], bool] | None = None,
+    ) -> Iterator[T]:
+        """
+        Like get_children, but unsorted and lazy.
+        Walks the hierarchy breadth first while iterating.
+        """
+        return cast(
+            Iterator[T],
+            super().iter_children(
+                direct_only=direct_only,
+                types=types if isinstance(types, tuple) else (types,),
+                include_root=include_root,
+                f_filter=f_filter,  # type: ignore
+            ),
+        )
+
     def get_tree[T: Node](
         self,
         types: type[T] | tuple[type[T], ...],
@@ -678,13 +698,7 @@ class Node(CNode):
         f_filter: Callable[[T], bool] | None = None,
         sort: bool = True,
     ) -> Tree[T]:
-        out = self.get_children(
-            direct_only=True,
-            types=types,
-            f_filter=f_filter,
-            sort=sort,
-        )
-
+        # children used to be sorted into a set, so sort never affected the order
         tree = Tree[T](
             {
                 n: n.get_tree(
@@ -693,7 +707,9 @@ class Node(CNode):
                     f_filter=f_filter,
                     sort=sort,
                 )
-                for n in out
+                for n in self.iter_children(
+                    direct_only=True, types=types, f_filter=f_filter
+                )
             }
         )
 
@@ -756,11 +772,11 @@ class Node(CNode):
         raise KeyErrorNotFound(f"No parent with trait {trait} found")
 
     def get_first_child_of_type[U: Node](self, child_type: type[U]) -> U:
-        for level in self.get_tree(types=Node).iter_by_depth():
-            for child in level:
-                if isinstance(child, child_type):
-                    return child
-        raise KeyErrorNotFound(f"No child of type {child_type} found")
+        # breadth first, so the closest child wins
+        child = super().get_first_child(types=(child_type,), include_root=True)
+        if child is None:
+            raise KeyErrorNotFound(f"No child of type {child_type} found")
+        return cast(U, child)
 
     # ----------------------------------------------------------------------------------
     def zip_children_by_name_with[N: Node](
@@ -559,6 +559,19 @@ class Expression(ParameterOperatable):
     def get_sorted_operands(self) -> list[ParameterOperatable]:
         return sorted(self.operands, key=hash)
 
+    @once
+    def get_congruence_hash(self) -> int:
+        """
+        Structural hash that is equal for all expressions that are congruent
+        (non-recursively) to this one.
+        Operands contribute their hash (literals by value, operables by identity),
+        commutative operands are order-independent.
+        """
+        operand_hashes = [hash(op) for op in self.operands]
+        if isinstance(self, Commutative):
+            operand_hashes.sort()
+        return hash((type(self), tuple(operand_hashes)))
+
     @once
     def is_congruent_to(
         self,
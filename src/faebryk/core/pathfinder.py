@@ -2,15 +2,27 @@
 # SPDX-License-Identifier: MIT
 
 import io
+import json
 import logging
+import os
 from typing import Sequence
 
 from more_itertools import partition
 from rich.console import Console
 from rich.table import Table
 
-from faebryk.core.cpp import Counter, Path, set_indiv_measure, set_max_paths
+from faebryk.core.cpp import (
+    Counter,
+    Path,
+    get_pathfinder_stats,
+    reset_pathfinder_stats,
+    set_indiv_measure,
+    set_max_paths,
+    set_max_threads,
+)
 from faebryk.core.cpp import find_paths as find_paths_cpp
+from faebryk.core.cpp import find_paths_batch as find_paths_batch_cpp
+from faebryk.core.cpp import find_paths_cached as find_paths_cached_cpp
 from faebryk.core.node import Node
 from faebryk.libs.util import ConfigFlag, ConfigFlagInt
 
@@ -18,7 +30,9 @@ logger = logging.getLogger(__name__)
 
 # Also in C++
 INDIV_MEASURE = ConfigFlag(
-    "INDIV_MEASURE", default=False, descr="Measure individual paths"
+    "INDIV_MEASURE",
+    default=False,
+    descr="Profile the pathfinder, per filter and aggregated over all runs",
 )
 set_indiv_measure(bool(INDIV_MEASURE))
 
@@ -32,21 +46,112 @@ MAX_PATHS_NO_WEAK = ConfigFlagInt(
 )
 set_max_paths(int(MAX_PATHS), int(MAX_PATHS_NO_NEW_WEAK), int(MAX_PATHS_NO_WEAK))
 
+MAX_THREADS = ConfigFlagInt(
+    "PATHFINDER_THREADS",
+    default=0,
+    descr="Threads for batched path searches (0 for one per core)",
+)
+set_max_threads(int(MAX_THREADS))
 
-def find_paths(src: Node, dst: Sequence[Node]) -> Sequence[Path]:
-    paths, counters = find_paths_cpp(src, dst)
 
-    if logger.isEnabledFor(logging.DEBUG):
+def find_paths(src: Node, dst: Sequence[Node]) -> Sequence[Path]:
+    """
+    Searches without dst are memoised until the graph of src changes.
+    """
+    if dst:
+        paths, counters = find_paths_cpp(src, dst)
+    else:
+        paths, counters = find_paths_cached_cpp(src)
+
+    # no counters on cache hits
+    if counters and logger.isEnabledFor(logging.DEBUG):
         logger.debug(Counters(counters))
     return paths
 
 
+def find_paths_batch(
+    srcs: Sequence[Node], dsts: Sequence[Sequence[Node]] | None = None
+) -> list[Sequence[Path]]:
+    """
+    Like find_paths for many independent srcs, searched concurrently.
+    The graphs of srcs must not be modified by conditional link filters meanwhile.
+    """
+    if dsts is None:
+        dsts = [[] for _ in srcs]
+    results = find_paths_batch_cpp(srcs, dsts)
+
+    if logger.isEnabledFor(logging.DEBUG):
+        for _, counters in results:
+            logger.debug(Counters(counters))
+    return [paths for paths, _ in results]
+
+
 class Counters:
-    def __init__(self, counters: list[Counter]):
+    def __init__(
+        self,
+        counters: list[Counter],
+        calls: int = 1,
+        time_spent_s: float | None = None,
+        cache_hits: int = 0,
+        cache_misses: int = 0,
+    ):
         self.counters: dict[str, Counter] = {c.name: c for c in counters}
+        self.calls = calls
+        self.time_spent_s = time_spent_s
+        self.cache_hits = cache_hits
+        self.cache_misses = cache_misses
+
+    @classmethod
+    def aggregated(cls) -> "Counters":
+        """
+        Counters of all pathfinder runs since the last reset.
+        Only collected with INDIV_MEASURE, except for the cache statistics.
+        """
+        stats = get_pathfinder_stats()
+        return cls(
+            stats.counters,
+            stats.calls,
+            stats.time_spent_s,
+            stats.cache_hits,
+            stats.cache_misses,
+        )
+
+    @staticmethod
+    def reset_aggregated() -> None:
+        reset_pathfinder_stats()
+
+    def to_dict(self) -> dict:
+        return {
+            "calls": self.calls,
+            "time_spent_s": self.time_spent_s,
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+            "counters": {
+                name: {
+                    "in": c.in_cnt,
+                    "weak_in": c.weak_in_cnt,
+                    "out": c.out_cnt,
+                    "filtered": c.in_cnt - c.out_cnt,
+                    "out_weaker": c.out_weaker,
+                    "out_stronger": c.out_stronger,
+                    "time_spent_s": c.time_spent_s,
+                    "memory_bytes": c.memory_bytes,
+                }
+                for name, c in self.counters.items()
+            },
+        }
+
+    def dump_json(self, path: str | os.PathLike) -> None:
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
 
     def __repr__(self):
-        table = Table(title="Filter Counters")
+        title = "Filter Counters"
+        if self.calls != 1:
+            title += f" ({self.calls} runs)"
+        table = Table(title=title)
+        if self.cache_hits or self.cache_misses:
+            table.caption = f"cache: {self.cache_hits} hits, {self.cache_misses} misses"
         table.add_column("func", style="cyan", width=20)
         table.add_column("in", style="green", justify="right")
         table.add_column("weak in", style="green", justify="right")
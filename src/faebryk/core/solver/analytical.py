@@ -78,7 +78,7 @@ if S_LOG:
 # TODO: mark destructive=False where applicable
 
 
-@algorithm("Convert inequality with literal to subset")
+@algorithm("Convert inequality with literal to subset", consumes=(GreaterOrEqual,))
 def convert_inequality_with_literal_to_subset(mutator: Mutator):
     # TODO if not! A <= x it can be replaced by A intersect [-inf, a] is {}
     """
@@ -145,13 +145,18 @@ def remove_congruent_expressions(mutator: Mutator):
     # No (Automatic): X1 = A + C, X2 = A + B, C ~ B -> X1 ~ X2
 
     all_exprs = mutator.nodes_of_type(Expression, sort_by_depth=True)
-    exprs_by_type = groupby(all_exprs, type)
     full_eq = EquivalenceClasses[Expression](all_exprs)
 
-    for exprs in exprs_by_type.values():
-        if len(exprs) <= 1:
-            continue
-        # TODO use hash to speed up comparisons
+    # congruent expressions always share a congruence hash
+    # so only compare within buckets instead of all pairs of the same type
+    # uncorrelatable literals prevent congruence, so skip those entirely
+    exprs_by_hash = groupby(
+        (e for e in all_exprs if not e.get_uncorrelatable_literals()),
+        Expression.get_congruence_hash,
+        only_multi=True,
+    )
+
+    for exprs in exprs_by_hash.values():
         for e1, e2 in combinations(exprs, 2):
             # no need for recursive, since subexpr already merged if congruent
             if not full_eq.is_eq(e1, e2) and e1.is_congruent_to(e2, recursive=False):
@@ -304,7 +309,7 @@ def resolve_alias_classes(mutator: Mutator):
         # Repr old expr with new param, but keep old expr around
         # This will implicitly swap out the expr in other exprs with the repr
         for e in alias_class_exprs:
-            copy_expr = mutator.mutate_expression(e)
+            copy_expr = mutator.mutate_expression(e, force_copy=True)
             mutator.create_expression(
                 Is,
                 copy_expr,
@@ -399,7 +404,7 @@ def merge_intersect_subsets(mutator: Mutator):
         subset_to(param, intersected, mutator, from_ops=list(ss_lits.values()))
 
 
-@algorithm("Associative expressions Full")
+@algorithm("Associative expressions Full", consumes=(FullyAssociative,))
 def compress_associative(mutator: Mutator):
     """
     Makes
@@ -433,7 +438,7 @@ def compress_associative(mutator: Mutator):
         )
 
 
-@algorithm("Empty set")
+@algorithm("Empty set", consumes=(Is,))
 def empty_set(mutator: Mutator):
     """
     A is {} -> False
@@ -618,7 +623,7 @@ def predicate_flat_terminate(mutator: Mutator):
         mutator.predicate_terminate(p)
 
 
-@algorithm("Predicate is!! True")
+@algorithm("Predicate is!! True", consumes=(Is,))
 def predicate_terminated_is_true(mutator: Mutator):
     """
     P!! is! True -> P!! is!! True
@@ -887,7 +892,7 @@ def uncorrelated_alias_fold(mutator: Mutator):
         mutator.mutate_expression(expr, operands=expr_resolved_operands, soft_mutate=Is)
 
 
-@algorithm("Reflexive predicates")
+@algorithm("Reflexive predicates", consumes=(Reflexive,))
 def reflexive_predicates(mutator: Mutator):
     """
     A not lit (done by literal_folding)
@@ -909,7 +914,7 @@ def reflexive_predicates(mutator: Mutator):
         alias_is_literal_and_check_predicate_eval(pred, True, mutator)
 
 
-@algorithm("Idempotent deduplicate")
+@algorithm("Idempotent deduplicate", consumes=(IdempotentOperands,))
 def idempotent_deduplicate(mutator: Mutator):
     """
     Or(A, A, B) -> Or(A, B)
@@ -925,7 +930,7 @@ def idempotent_deduplicate(mutator: Mutator):
             mutator.mutate_expression(expr, operands=unique_operands)
 
 
-@algorithm("Idempotent unpack")
+@algorithm("Idempotent unpack", consumes=(IdempotentExpression,))
 def idempotent_unpack(mutator: Mutator):
     """
     Abs(Abs(A)) -> Abs(A)
@@ -941,7 +946,7 @@ def idempotent_unpack(mutator: Mutator):
         mutator.mutate_unpack_expression(expr)
 
 
-@algorithm("Unary identity unpack")
+@algorithm("Unary identity unpack", consumes=(UnaryIdentity,))
 def unary_identity_unpack(mutator: Mutator):
     """
     E(A), A not lit -> A
@@ -961,7 +966,7 @@ def unary_identity_unpack(mutator: Mutator):
             mutator.mutate_unpack_expression(expr)
 
 
-@algorithm("Involutory fold")
+@algorithm("Involutory fold", consumes=(Involutory,))
 def involutory_fold(mutator: Mutator):
     """
     Not(Not(A)) -> A
@@ -0,0 +1,244 @@
+# This file is part of the faebryk project
+# SPDX-License-Identifier: MIT
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from importlib.metadata import PackageNotFoundError, version
+from pathlib import Path
+
+from faebryk.core.graph import Graph, GraphFunctions
+from faebryk.core.parameter import (
+    Commutative,
+    ConstrainableExpression,
+    Expression,
+    Parameter,
+    ParameterOperatable,
+)
+from faebryk.core.solver.utils import S_LOG, SOLVER_CACHE_MAX_ENTRIES
+from faebryk.libs.sets.sets import P_Set
+from faebryk.libs.util import once
+
+logger = logging.getLogger(__name__)
+
+if S_LOG:
+    logger.setLevel(logging.DEBUG)
+
+
+@once
+def _get_solver_hash() -> str:
+    """
+    Hash of the package version and the sources the solver results depend on
+    (solver, parameters and sets), so results of a different solver never get
+    picked up.
+    """
+    solver_dir = Path(__file__).parent
+    core_dir = solver_dir.parent
+    sources = [
+        *solver_dir.glob("*.py"),
+        core_dir / "parameter.py",
+        *(core_dir.parent / "libs" / "sets").glob("*.py"),
+    ]
+
+    h = hashlib.sha256()
+    try:
+        h.update(version("atopile").encode())
+    except PackageNotFoundError:
+        pass
+    for path in sorted(sources):
+        h.update(path.read_bytes())
+    return h.hexdigest()
+
+
+class SolverResultCache:
+    """
+    Content-addressed on-disk store of solver results.
+
+    Results are stored per fingerprint of the parameter graph they were solved from,
+    so any change to a parameter or constraint results in a different key.
+    Supersets are stored per parameter address (path from the root node), which is
+    stable across runs as opposed to the nodes themselves.
+
+    Keys are prefixed with the number of parameter operables in the graph, so graphs
+    of a size that was never persisted are rejected without hashing them.
+    Least recently used entries are evicted beyond `max_entries`.
+    """
+
+    class Unfingerprintable(Exception): ...
+
+    def __init__(
+        self, path: Path, max_entries: int = int(SOLVER_CACHE_MAX_ENTRIES)
+    ) -> None:
+        self.path = path
+        self.max_entries = max_entries
+        self._keys: set[str] | None = None
+
+    @staticmethod
+    def get_address(param: Parameter) -> str:
+        (root, _), *hierarchy = param.get_hierarchy()
+        return ".".join([type(root).__name__, *(name for _, name in hierarchy)])
+
+    @staticmethod
+    def _literal_token(lit) -> str:
+        try:
+            serialized = P_Set.from_value(lit).serialize()
+        except ValueError as e:
+            raise SolverResultCache.Unfingerprintable(str(e)) from e
+        if serialized["data"] is None:
+            raise SolverResultCache.Unfingerprintable(f"Can't serialize {lit}")
+        return json.dumps(serialized, sort_keys=True)
+
+    @staticmethod
+    def _optional_literal_token(lit) -> str | None:
+        return None if lit is None else SolverResultCache._literal_token(lit)
+
+    @classmethod
+    def _param_token(cls, param: Parameter) -> str:
+        domain = param.domain
+        return json.dumps(
+            [
+                "Parameter",
+                cls.get_address(param),
+                type(domain).__name__,
+                repr(sorted(vars(domain).items())),
+                str(param.units),
+                cls._optional_literal_token(param.within),
+                cls._optional_literal_token(param.soft_set),
+                repr(param.guess),
+                repr(param.tolerance_guess),
+                param.likely_constrained,
+            ]
+        )
+
+    @classmethod
+    def _expression_token(
+        cls, expr: Expression, tokens: dict[ParameterOperatable, str]
+    ) -> str:
+        operand_tokens = [
+            tokens[op]
+            if isinstance(op, ParameterOperatable)
+            else cls._literal_token(op)
+            for op in expr.operands
+        ]
+        if isinstance(expr, Commutative):
+            operand_tokens.sort()
+        return json.dumps(
+            [
+                type(expr).__name__,
+                isinstance(expr, ConstrainableExpression) and expr.constrained,
+                operand_tokens,
+            ]
+        )
+
+    @staticmethod
+    def _get_size(g: Graph) -> int:
+        return len(GraphFunctions(g).nodes_of_type(ParameterOperatable))
+
+    @classmethod
+    def fingerprint(cls, g: Graph) -> str | None:
+        """
+        Structural hash of all parameter operables in the graph, prefixed with their
+        count.
+
+        Returns None if the graph can't be fingerprinted reliably, e.g. because
+        parameter addresses are ambiguous or literals are not serializable.
+        """
+        operables = GraphFunctions(g).nodes_of_type(ParameterOperatable)
+        params = [po for po in operables if isinstance(po, Parameter)]
+        if len({cls.get_address(p) for p in params}) != len(params):
+            logger.debug("Ambiguous parameter addresses, can't fingerprint graph")
+            return None
+
+        # tokens are hashed to keep them from growing with the expression depth
+        tokens: dict[ParameterOperatable, str] = {}
+        try:
+            for po in ParameterOperatable.sort_by_depth(operables, ascending=True):
+                if isinstance(po, Parameter):
+                    token = cls._param_token(po)
+                else:
+                    token = cls._expression_token(po, tokens)
+                tokens[po] = hashlib.sha256(token.encode()).hexdigest()
+        except cls.Unfingerprintable as e:
+            logger.debug(f"Can't fingerprint graph: {e}")
+            return None
+
+        digest = hashlib.sha256(
+            "\n".join([_get_solver_hash(), *sorted(tokens.values())]).encode()
+        ).hexdigest()
+        return f"{len(operables)}-{digest}"
+
+    def _get_path(self, fingerprint: str) -> Path:
+        return self.path / f"{fingerprint}.json"
+
+    def _get_keys(self) -> set[str]:
+        """Fingerprints of all persisted results, listed from disk once."""
+        if self._keys is None:
+            self._keys = {p.stem for p in self.path.glob("*-*.json")}
+        return self._keys
+
+    def might_contain(self, g: Graph) -> bool:
+        """
+        Cheap check whether a result for the graph could have been persisted.
+        """
+        prefix = f"{self._get_size(g)}-"
+        return any(key.startswith(prefix) for key in self._get_keys())
+
+    def load(self, fingerprint: str) -> dict[str, P_Set] | None:
+        keys = self._get_keys()
+        if fingerprint not in keys:
+            return None
+
+        path = self._get_path(fingerprint)
+        try:
+            data = json.loads(path.read_text())
+            out = {
+                address: P_Set.deserialize(serialized)
+                for address, serialized in data.items()
+            }
+        except FileNotFoundError:
+            # evicted by a concurrent build
+            keys.discard(fingerprint)
+            return None
+        except (ValueError, KeyError, AttributeError) as e:
+            logger.warning(f"Dropping corrupted solver cache entry {path}: {e}")
+            path.unlink(missing_ok=True)
+            keys.discard(fingerprint)
+            return None
+
+        # mark as recently used
+        path.touch()
+        return out
+
+    def store(self, fingerprint: str, supersets: dict[str, P_Set]) -> None:
+        self.path.mkdir(parents=True, exist_ok=True)
+        data = {address: lit.serialize() for address, lit in supersets.items()}
+
+        # write to a temporary file unique to this write first, so concurrent
+        # writers never see partial data or move each other's files into place
+        path = self._get_path(fingerprint)
+        with tempfile.NamedTemporaryFile(
+            "w", dir=self.path, prefix=f"{path.stem}.", suffix=".tmp", delete=False
+        ) as f:
+            f.write(json.dumps(data))
+        os.replace(f.name, path)
+
+        self._get_keys().add(fingerprint)
+        self._evict()
+
+    def _evict(self) -> None:
+        paths = list(self.path.glob("*.json"))
+        if len(paths) <= self.max_entries:
+            return
+
+        def _mtime(path: Path) -> float:
+            try:
+                return path.stat().st_mtime
+            except FileNotFoundError:
+                return 0
+
+        paths.sort(key=_mtime)
+        for path in paths[: len(paths) - self.max_entries]:
+            path.unlink(missing_ok=True)
+            self._get_keys().discard(path.stem)
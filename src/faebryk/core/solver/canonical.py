@@ -62,6 +62,31 @@ logger = logging.getLogger(__name__)
 NumericLiteralR = (*QuantityLikeR, Quantity_Interval_Disjoint, Quantity_Interval)
 
 
+def to_canonical_literal(operand: ParameterOperatable.Literal) -> P_Set:
+    """
+    - remove units for NumberLike
+    - NumberLike -> Quantity_Interval_Disjoint
+    - bool -> BoolSet
+    - Enum -> P_Set[Enum]
+    """
+    if isinstance(operand, NumericLiteralR):
+        if isinstance(operand, int | float | Quantity) and not isinstance(
+            operand, bool
+        ):
+            return Quantity_Interval_Disjoint.from_value(
+                quantity(operand, dimensionless)
+            )
+        if isinstance(operand, Quantity_Interval_Disjoint):
+            return Quantity_Interval_Disjoint._from_intervals(
+                operand._intervals, dimensionless
+            )
+        if isinstance(operand, Quantity_Interval):
+            return Quantity_Interval_Disjoint(
+                Quantity_Interval._from_interval(operand._interval, dimensionless)
+            )
+    return P_Set.from_value(operand)
+
+
 @algorithm("Constrain within and domain", single=True, destructive=False)
 def constrain_within_domain(mutator: Mutator):
     """
@@ -132,25 +157,8 @@ def convert_to_canonical_literals(mutator: Mutator):
             def mutate(
                 i: int, operand: ParameterOperatable.All
             ) -> ParameterOperatable.All:
-                if isinstance(operand, NumericLiteralR):
-                    if isinstance(operand, int | float | Quantity) and not isinstance(
-                        operand, bool
-                    ):
-                        return Quantity_Interval_Disjoint.from_value(
-                            quantity(operand, dimensionless)
-                        )
-                    if isinstance(operand, Quantity_Interval_Disjoint):
-                        return Quantity_Interval_Disjoint._from_intervals(
-                            operand._intervals, dimensionless
-                        )
-                    if isinstance(operand, Quantity_Interval):
-                        return Quantity_Interval_Disjoint(
-                            Quantity_Interval._from_interval(
-                                operand._interval, dimensionless
-                            )
-                        )
                 if ParameterOperatable.is_literal(operand):
-                    return P_Set.from_value(operand)
+                    return to_canonical_literal(operand)
 
                 assert isinstance(operand, ParameterOperatable)
                 return operand
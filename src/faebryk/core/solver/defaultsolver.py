@@ -1,37 +1,52 @@
 # This file is part of the faebryk project
 # SPDX-License-Identifier: MIT
 
+import io
 import logging
 import time
-from dataclasses import dataclass
+from collections import defaultdict
+from dataclasses import dataclass, field
 from itertools import count
+from pathlib import Path
 from types import SimpleNamespace
-from typing import Any, override
+from typing import Any, Callable, cast, override
+
+from rich.console import Console
+from rich.table import Table
 
 from faebryk.core.graph import Graph, GraphFunctions
 from faebryk.core.parameter import (
+    And,
     ConstrainableExpression,
     Expression,
+    Is,
+    IsSubset,
     Parameter,
     ParameterOperatable,
     Predicate,
 )
 from faebryk.core.solver import analytical, canonical, literal_folding
-from faebryk.core.solver.mutator import REPR_MAP, Mutator
+from faebryk.core.solver.cache import SolverResultCache
+from faebryk.core.solver.mutator import REPR_MAP, AlgoResult, Mutator
 from faebryk.core.solver.solver import LOG_PICK_SOLVE, Solver
 from faebryk.core.solver.utils import (
     ALLOW_PARTIAL_STATE,
+    COMPARE_IN_PLACE,
     MAX_ITERATIONS_HEURISTIC,
+    MUTATE_IN_PLACE,
     PRINT_START,
     S_LOG,
+    SHARED_PREFIX,
+    SOLVER_CACHE,
     TIMEOUT,
+    WORKLIST,
     Contradiction,
     SolverAlgorithm,
     debug_name_mappings,
     get_graphs,
 )
 from faebryk.libs.sets.sets import P_Set
-from faebryk.libs.util import groupby, times_out
+from faebryk.libs.util import groupby, indented_container, times_out
 
 logger = logging.getLogger(__name__)
 
@@ -58,7 +73,6 @@ class DefaultSolver(Solver):
 
     algorithms = SimpleNamespace(
         # TODO: get order from topo sort
-        # and types from decorator
         pre=[
             canonical.convert_to_canonical_literals,
             canonical.convert_to_canonical_operations,
@@ -97,6 +111,10 @@ class DefaultSolver(Solver):
         graphs: list[Graph]
         total_repr_map: Mutator.ReprMap
         repr_since_last_iteration: dict[SolverAlgorithm, REPR_MAP]
+        idle: set[SolverAlgorithm] = field(default_factory=set)
+        """
+        Algorithms that ran and none of their consumed types got dirty since
+        """
 
         def __rich_repr__(self):
             yield "graphs", self.graphs
@@ -111,18 +129,38 @@ class DefaultSolver(Solver):
     class IterationState:
         dirty: bool
 
+    @dataclass
+    class AlgorithmCounter:
+        invocations: int = 0
+        skipped: int = 0
+        dirty: int = 0
+        time: float = 0.0
+
     @dataclass
     class PartialState:
         data: "DefaultSolver.IterationData"
         print_context: ParameterOperatable.ReprContext
 
-    def __init__(self) -> None:
+    def __init__(self, cache_path: Path | None = None) -> None:
+        """
+        Args:
+        - cache_path: directory to persist solver results in across runs
+        """
         super().__init__()
 
         self.superset_cache: dict[Parameter, tuple[int, P_Set]] = {}
+        self.result_cache = (
+            SolverResultCache(cache_path)
+            if cache_path is not None and SOLVER_CACHE
+            else None
+        )
 
         self.partial_state: DefaultSolver.PartialState | None = None
 
+        self.algorithm_counters: dict[str, DefaultSolver.AlgorithmCounter] = (
+            defaultdict(DefaultSolver.AlgorithmCounter)
+        )
+
     def has_no_solution(
         self, total_repr_map: dict[ParameterOperatable, ParameterOperatable.All]
     ) -> bool:
@@ -139,12 +177,21 @@ class DefaultSolver(Solver):
         algos: list[SolverAlgorithm],
         print_context: ParameterOperatable.ReprContext,
         phase_offset: int = 0,
+        in_place: bool = False,
+        counters: dict[str, AlgorithmCounter] | None = None,
     ) -> tuple[IterationState, ParameterOperatable.ReprContext]:
         iteration_state = DefaultSolver.IterationState(dirty=False)
-        iteration_repr_maps: list[REPR_MAP] = []
+        iteration_results: list[AlgoResult] = []
+        if counters is None:
+            counters = defaultdict(DefaultSolver.AlgorithmCounter)
 
         for phase_name, algo in enumerate(algos):
             phase_name = str(phase_name + phase_offset)
+            counter = counters[algo.name]
+
+            if WORKLIST and algo in data.idle:
+                counter.skipped += 1
+                continue
 
             if PRINT_START:
                 logger.debug(
@@ -157,9 +204,15 @@ class DefaultSolver(Solver):
                 algo=algo,
                 print_context=print_context,
                 iteration_repr_map=data.repr_since_last_iteration.get(algo),
+                in_place=in_place,
             )
+            now = time.perf_counter()
             mutator.run()
             algo_result = mutator.close()
+            counter.time += time.perf_counter() - now
+            counter.invocations += 1
+            counter.dirty += algo_result.dirty
+            data.idle.add(algo)
 
             if algo_result.dirty and logger.isEnabledFor(logging.DEBUG):
                 logger.debug(
@@ -179,19 +232,29 @@ class DefaultSolver(Solver):
 
             if algo_result.dirty:
                 data.graphs = algo_result.graphs
-                iteration_repr_maps.append(algo_result.repr_map)
+                iteration_results.append(algo_result)
+                # wake up algorithms that consume the touched operables
+                if algo_result.dirty_operables:
+                    data.idle = {
+                        a
+                        for a in data.idle
+                        if not a.consumes_any(algo_result.dirty_operables)
+                    }
+                else:
+                    data.idle.clear()
                 # append to per-algo iteration repr_map
-                assert algo_result.repr_map
                 for reprs in data.repr_since_last_iteration.values():
                     for old_s, old_d in list(reprs.items()):
-                        new_d = algo_result.repr_map.get(old_d)
+                        new_d = algo_result.get_repr(old_d)
                         if new_d is None:
                             del reprs[old_s]
                             continue
                         reprs[old_s] = new_d
 
-        data.total_repr_map = Mutator.create_concat_repr_map(
-            data.total_repr_map.repr_map, *iteration_repr_maps
+        data.total_repr_map = Mutator.ReprMap(
+            Mutator.concat_algo_results(
+                data.total_repr_map.repr_map, *iteration_results
+            )
         )
 
         return iteration_state, print_context
@@ -210,6 +273,46 @@ class DefaultSolver(Solver):
         if not destructive:
             raise NotImplementedError()
 
+        if COMPARE_IN_PLACE:
+            return self._simplify_symbolically_compare_in_place(g, print_context)
+
+        return self._simplify_symbolically(
+            g, print_context, in_place=bool(MUTATE_IN_PLACE)
+        )
+
+    def _simplify_symbolically_compare_in_place(
+        self,
+        g: Graph,
+        print_context: ParameterOperatable.ReprContext | None,
+    ) -> tuple[Mutator.ReprMap, ParameterOperatable.ReprContext]:
+        out = self._simplify_symbolically(g, print_context, in_place=False)
+        out_in_place = self._simplify_symbolically(g, print_context, in_place=True)
+
+        repr_map, repr_map_in_place = out[0], out_in_place[0]
+        mismatches = [
+            f"{p.get_full_name()}: {lit} != {lit_in_place}"
+            for p in GraphFunctions(g).nodes_of_type(Parameter)
+            if (lit := repr_map.try_get_literal(p, allow_subset=True))
+            != (lit_in_place := repr_map_in_place.try_get_literal(p, allow_subset=True))
+        ]
+        if mismatches:
+            raise AssertionError(
+                f"In-place solver result differs from copying solver: "
+                f"{indented_container(mismatches)}"
+            )
+
+        return out
+
+    def _simplify_symbolically(
+        self,
+        g: Graph,
+        print_context: ParameterOperatable.ReprContext | None,
+        in_place: bool,
+    ) -> tuple[Mutator.ReprMap, ParameterOperatable.ReprContext]:
+        """
+        Args:
+        - in_place: mutate graphs owned by the solver in place instead of copying
+        """
         now = time.time()
         if LOG_PICK_SOLVE:
             logger.info("Phase 1 Solving: Analytical Solving ".ljust(80, "="))
@@ -260,6 +363,11 @@ class DefaultSolver(Solver):
                         if first_iter
                         else self.algorithms.iterative,
                         print_context=self.partial_state.print_context,
+                        # never mutate the original graph
+                        in_place=in_place
+                        and not first_iter
+                        and g not in self.partial_state.data.graphs,
+                        counters=self.algorithm_counters,
                     )
                 )
             except:
@@ -287,12 +395,37 @@ class DefaultSolver(Solver):
                 f"Phase 1 Solving: Analytical Solving done in {iterno} iterations"
                 f" and {time.time() - now:.3f} seconds".ljust(80, "=")
             )
+            self.print_algorithm_counters(print_out=logger.info)
 
         out = self.partial_state.data.total_repr_map, self.partial_state.print_context
         self.partial_state = None
 
         return out
 
+    def print_algorithm_counters(self, print_out: Callable[[str], None] = logger.debug):
+        table = Table(title="Solver algorithms")
+        table.add_column("Algorithm")
+        table.add_column("Runs", justify="right")
+        table.add_column("Skipped", justify="right")
+        table.add_column("Dirty", justify="right")
+        table.add_column("Time", justify="right")
+
+        for name, counter in sorted(
+            self.algorithm_counters.items(), key=lambda x: x[1].time, reverse=True
+        ):
+            table.add_row(
+                name,
+                str(counter.invocations),
+                str(counter.skipped),
+                str(counter.dirty),
+                f"{counter.time * 1000:.2f}ms",
+            )
+
+        if table.rows:
+            console = Console(record=True, width=120, file=io.StringIO())
+            console.print(table)
+            print_out(console.export_text(styles=True))
+
     @override
     def get_any_single(
         self,
@@ -330,37 +463,69 @@ class DefaultSolver(Solver):
     def inspect_get_known_supersets(
         self, param: Parameter, force_update: bool = False
     ) -> P_Set:
+        g_version = param.get_graph().version
+        cached = self.superset_cache.get(param, (None, None))[0]
+        if cached == g_version or (cached is not None and not force_update):
+            return self.superset_cache[param][1]
+
         all_params = GraphFunctions(param.get_graph()).nodes_of_type(
             ParameterOperatable
         )
-        g_hash = hash(tuple(sorted(all_params, key=id)))
-        cached = self.superset_cache.get(param, (None, None))[0]
-        if cached == g_hash or (cached is not None and not force_update):
-            return self.superset_cache[param][1]
 
-        out, repr_map = self._inspect_get_known_supersets(param)
-        self.superset_cache[param] = g_hash, out
+        result_cache = self.result_cache if param.try_get_literal() is None else None
+        fingerprint = None
+        # only hash the graph if a result of its size was persisted
+        if result_cache is not None and result_cache.might_contain(param.get_graph()):
+            fingerprint = SolverResultCache.fingerprint(param.get_graph())
+        if fingerprint is not None:
+            assert result_cache is not None
+            cached_supersets = result_cache.load(fingerprint)
+            address = SolverResultCache.get_address(param)
+            if cached_supersets is not None and address in cached_supersets:
+                for p in all_params:
+                    if not isinstance(p, Parameter):
+                        continue
+                    lit = cached_supersets.get(SolverResultCache.get_address(p))
+                    if lit is not None:
+                        self.superset_cache[p] = g_version, lit
+                return cached_supersets[address]
+
+        out, repr_map, complete = self._inspect_get_known_supersets(param)
+        self.superset_cache[param] = g_version, out
 
         if repr_map:
+            supersets: dict[str, P_Set] = {}
             for p in all_params:
                 if not isinstance(p, Parameter):
                     continue
                 lit = repr_map.try_get_literal(p, allow_subset=True)
                 if lit is None:
                     lit = p.domain_set()
-                self.superset_cache[p] = g_hash, P_Set.from_value(lit)
+                self.superset_cache[p] = g_version, P_Set.from_value(lit)
+                supersets[SolverResultCache.get_address(p)] = self.superset_cache[p][1]
+
+            # don't persist results of a timed out solver run
+            if result_cache is not None and complete:
+                if fingerprint is None:
+                    fingerprint = SolverResultCache.fingerprint(param.get_graph())
+                if fingerprint is not None:
+                    result_cache.store(fingerprint, supersets)
 
         return out
 
     def _inspect_get_known_supersets(
         self, param: Parameter
-    ) -> tuple[P_Set, Mutator.ReprMap | None]:
+    ) -> tuple[P_Set, Mutator.ReprMap | None, bool]:
+        """
+        Returns the superset, the repr_map of the solver run (if any) and whether
+        the solver ran to completion
+        """
         lit = param.try_get_literal()
         if lit is not None:
-            return P_Set.from_value(lit), None
+            return P_Set.from_value(lit), None, True
 
         # run phase 1 solver
-        # TODO caching
+        complete = True
         try:
             repr_map, print_context = self.simplify_symbolically(param.get_graph())
         except TimeoutError:
@@ -369,19 +534,20 @@ class DefaultSolver(Solver):
             if self.partial_state is None:
                 raise
             repr_map = self.partial_state.data.total_repr_map
+            complete = False
 
         if param not in repr_map.repr_map:
             if LOG_PICK_SOLVE:
                 logger.warning(f"Parameter {param} not in repr_map")
-            return param.domain_set(), repr_map
+            return param.domain_set(), repr_map, complete
 
         # check predicates (is, subset), (ge, le covered too)
         literal = repr_map.try_get_literal(param, allow_subset=True)
 
         if literal is None:
-            return param.domain_set(), repr_map
+            return param.domain_set(), repr_map, complete
 
-        return P_Set.from_value(literal), repr_map
+        return P_Set.from_value(literal), repr_map, complete
 
     @override
     def assert_any_predicate[ArgType](
@@ -411,15 +577,26 @@ class DefaultSolver(Solver):
 
         print_context = ParameterOperatable.ReprContext()
 
+        shared = (
+            self._simplify_shared_prefix(predicates) if len(predicates) > 1 else None
+        )
+
         it = iter(predicates)
 
         for p in it:
             pred, _ = p
             assert not pred.constrained
-            pred.constrained = True
+            target = pred
+            if shared is not None:
+                # map onto a copy, so the predicate doesn't stay attached to the
+                # shared graph and get solved again with every later candidate
+                mapped = self._map_predicate_onto(pred, self._copy_shared(shared))
+                if mapped is not None:
+                    target = mapped
+            target.constrained = True
             try:
                 repr_map, print_context_new = self.simplify_symbolically(
-                    pred.get_graph(), print_context=print_context
+                    target.get_graph(), print_context=print_context
                 )
             except Contradiction as e:
                 if LOG_PICK_SOLVE:
@@ -440,12 +617,12 @@ class DefaultSolver(Solver):
                     self.partial_state.print_context,
                 )
             finally:
-                pred.constrained = False
+                target.constrained = False
 
             # FIXME: is this correct?
             # definitely breaks a lot
             new_Gs = get_graphs(repr_map.repr_map.values())
-            repr_pred = repr_map.repr_map.get(pred)
+            repr_pred = repr_map.repr_map.get(target)
 
             # FIXME: workaround for above
             if repr_pred is not None:
@@ -505,3 +682,79 @@ class DefaultSolver(Solver):
             result.true_predicates[0][0].constrain()
 
         return result
+
+    def _simplify_shared_prefix(
+        self, predicates: list["Solver.PredicateWithInfo"]
+    ) -> Mutator.ReprMap | None:
+        """
+        Simplify the graph shared by all predicates once, so every predicate only
+        has to be solved on top of the already simplified graph.
+        """
+        if not SHARED_PREFIX:
+            return None
+        graphs = {pred.get_graph() for pred, _ in predicates}
+        if len(graphs) != 1:
+            return None
+
+        try:
+            repr_map, _ = self.simplify_symbolically(next(iter(graphs)))
+        except (Contradiction, TimeoutError):
+            # let the predicates run into it individually
+            return None
+
+        return repr_map
+
+    @staticmethod
+    def _copy_shared(repr_map: Mutator.ReprMap) -> Mutator.ReprMap:
+        """
+        Copy the simplified graph of the repr_map and return the repr_map onto the
+        copy.
+        """
+        graphs = get_graphs(repr_map.repr_map.values())
+        mutator = Mutator(
+            *graphs,
+            print_context=ParameterOperatable.ReprContext(),
+            algo=SolverAlgorithm(
+                name="Copy shared graph",
+                func=lambda _: None,
+                single=False,
+                destructive=False,
+            ),
+        )
+        for po in ParameterOperatable.sort_by_depth(
+            (
+                po
+                for g in graphs
+                for po in GraphFunctions(g).nodes_of_type(ParameterOperatable)
+            ),
+            ascending=True,
+        ):
+            mutator.get_copy(po)
+
+        return Mutator.ReprMap(
+            Mutator.concat_repr_maps(repr_map.repr_map, mutator.transformations.mutated)
+        )
+
+    @staticmethod
+    def _map_predicate_onto(
+        pred: ConstrainableExpression, repr_map: Mutator.ReprMap
+    ) -> ConstrainableExpression | None:
+        """
+        Rebuild a predicate made of And/Is/IsSubset over parameters and literals
+        on top of the simplified graph of the repr_map.
+        Returns None if the predicate can't be mapped.
+        """
+
+        def _map(op: ParameterOperatable.All) -> ParameterOperatable.All | None:
+            if isinstance(op, Parameter):
+                return repr_map.repr_map.get(op)
+            if isinstance(op, (And, Is, IsSubset)):
+                operands = [_map(o) for o in op.operands]
+                if any(o is None for o in operands):
+                    return None
+                return type(op)(*operands)
+            if isinstance(op, ParameterOperatable):
+                return None
+            return canonical.to_canonical_literal(op)
+
+        return cast(ConstrainableExpression | None, _map(pred))
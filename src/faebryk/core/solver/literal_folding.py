@@ -763,7 +763,7 @@ _CanonicalExpressions = {
 }
 
 fold_algorithms = [
-    algorithm(f"Fold {expr_type.__name__}", destructive=False)(
+    algorithm(f"Fold {expr_type.__name__}", destructive=False, consumes=(expr_type,))(
         _get_fold_func(expr_type)
     )
     for expr_type in _CanonicalExpressions
@@ -777,7 +777,11 @@ def _exec_pure_literal_expressions(expr: CanonicalExpression) -> SolverLiteral:
     return _CanonicalExpressions[type(expr)](*expr.operands)
 
 
-@algorithm("Fold pure literal expressions", destructive=False)
+@algorithm(
+    "Fold pure literal expressions",
+    destructive=False,
+    consumes=tuple(_CanonicalExpressions.keys()),
+)
 def fold_pure_literal_expressions(mutator: Mutator):
     exprs = mutator.nodes_of_types(
         tuple(_CanonicalExpressions.keys()), sort_by_depth=True
@@ -6,7 +6,8 @@ import io
 import logging
 import sys
 from collections import defaultdict
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from itertools import chain
 from types import UnionType
 from typing import Callable, Iterable, Sequence, cast
 
@@ -68,6 +69,22 @@ class AlgoResult:
     repr_map: REPR_MAP
     graphs: list[Graph]
     dirty: bool
+    removed: set[ParameterOperatable] | None = None
+    """
+    Only set for in-place mutation: repr_map is then a sparse delta and every
+    operable that is neither in repr_map nor removed maps to itself
+    """
+    dirty_operables: set[ParameterOperatable] = field(default_factory=set)
+    """
+    Output operables touched by the algorithm and their direct neighbourhood
+    """
+
+    def get_repr(self, po: ParameterOperatable) -> ParameterOperatable | None:
+        if po in self.repr_map:
+            return self.repr_map[po]
+        if self.removed is None or po in self.removed:
+            return None
+        return po
 
 
 # TODO use Mutator everywhere instead of repr_maps
@@ -88,9 +105,17 @@ class Mutator:
         algo: SolverAlgorithm,
         iteration_repr_map: REPR_MAP | None = None,
         repr_map: REPR_MAP | None = None,
+        in_place: bool = False,
     ) -> None:
+        """
+        Args:
+        - in_place: copy-on-write mode, only mutated operables and their dependents
+            are rewritten, untouched operables stay in their graph.
+            Only allowed for graphs owned by the solver.
+        """
         self._G: set[Graph] = set(Gs)
         self.print_context = print_context
+        self.in_place = in_place
 
         if not iteration_repr_map:
             iteration_repr_map = {}
@@ -128,6 +153,8 @@ class Mutator:
         )
 
         self.algo = algo
+        # in-place mode: graphs of the surviving operables, set on close
+        self._output_graphs: list[Graph] = []
 
     @property
     def G(self) -> set[Graph]:
@@ -167,8 +194,15 @@ class Mutator:
         Honestly I don't.
         """
         # TODO not sure this is the best way to handle ghost exprs
-        if po in self.transformations.mutated:
-            self.transformations.created[self.transformations.mutated[po]] = [po]
+        ghost = self.transformations.mutated.get(po)
+        if ghost is po:
+            # in-place no-op mutation, po would stay referenced while going stale
+            raise ValueError(
+                "Overriding repr of in-place mutated operable, "
+                "use mutate_expression(..., force_copy=True)"
+            )
+        if ghost is not None:
+            self.transformations.created[ghost] = [po]
 
         self.transformations.mutated[po] = new_po
 
@@ -218,13 +252,23 @@ class Mutator:
         expression_factory: type[Expression] | None = None,
         soft_mutate: type[Is] | type[IsSubset] | None = None,
         ignore_existing: bool = False,
+        force_copy: bool = False,
     ) -> CanonicalExpression:
+        """
+        Args:
+        - force_copy: always create a new expression, even for a no-op mutation in
+            in-place mode. Needed if the repr of expr gets overridden afterwards,
+            since expr itself goes stale then.
+        """
         if expression_factory is None:
             expression_factory = type(expr)
 
         if operands is None:
             operands = expr.operands
 
+        if force_copy and self.transformations.mutated.get(expr) is expr:
+            del self.transformations.mutated[expr]
+
         if expr in self.transformations.mutated:
             out = self.get_mutated(expr)
             assert isinstance(out, CanonicalExpression)
@@ -252,6 +296,14 @@ class Mutator:
                 return self._mutate(expr, self.get_copy(exists))
 
         new_operands = [self.get_copy(op) for op in operands]
+        if (
+            self.in_place
+            and copy_only
+            and not force_copy
+            and all(new is old for new, old in zip(new_operands, operands))
+        ):
+            return self._mutate(expr, cast(CanonicalExpression, expr))
+
         new_expr = expression_factory(*new_operands)
         new_expr.non_operands = expr.non_operands
 
@@ -341,6 +393,12 @@ class Mutator:
         if self.has_been_mutated(obj):
             return self.get_mutated(obj)
 
+        if self.in_place:
+            if self.is_removed(obj):
+                raise ValueError("Object marked removed")
+            # dependents of mutated operables get rewritten on close
+            return obj
+
         # purely for debug
         self.transformations.copied.add(obj)
 
@@ -421,6 +479,61 @@ class Mutator:
             for p in GraphFunctions(g).nodes_of_type(ParameterOperatable):
                 self.transformations.mutated[p] = p
 
+    def _resolve_mutation_chains(self):
+        """
+        ```
+        A -> B, B -> C => A -> C, B -> C
+        ```
+        """
+        mutated = self.transformations.mutated
+        for k, v in mutated.items():
+            seen = {k}
+            while v in mutated and mutated[v] is not v and v not in seen:
+                seen.add(v)
+                v = mutated[v]
+            mutated[k] = v
+
+    def _rewrite_dependents(self) -> set[ParameterOperatable]:
+        """
+        In-place mode: Rewrite all expressions that (transitively) depend on mutated
+        or removed operables and detach the stale operables from their graphs.
+
+        Returns the stale operables.
+        """
+        mutated = self.transformations.mutated
+        self._resolve_mutation_chains()
+
+        stale = {k for k, v in mutated.items() if k is not v}
+        stale.update(self.transformations.removed)
+
+        frontier: list[ParameterOperatable] = list(stale)
+        while frontier:
+            dependents: set[Expression] = set()
+            while frontier:
+                for e in frontier.pop().get_operations():
+                    if e in stale or e in dependents:
+                        continue
+                    dependents.add(e)
+                    frontier.append(e)
+
+            for e in ParameterOperatable.sort_by_depth(dependents, ascending=True):
+                # no-op mutation got outdated by mutation of an operand
+                if mutated.get(e) is e:
+                    del mutated[e]
+                self.mutate_expression(e)
+
+            stale.update(dependents)
+            # a rewrite can pick up a mutation target that only went stale later
+            # in the same pass, so rewrite those rewrites again
+            frontier = list(dependents)
+
+        self._resolve_mutation_chains()
+
+        if stale:
+            Graph.split_off(list(stale))
+
+        return stale
+
     def register_created_parameter(
         self, param: Parameter, from_ops: Sequence[ParameterOperatable] | None = None
     ) -> Parameter:
@@ -463,6 +576,8 @@ class Mutator:
         added = post_mut_nodes.difference(
             self._starting_operables, self.transformations.created
         )
+        if self.in_place:
+            added.difference_update(self.transformations.mutated.values())
         removed_compact = [op.compact_repr(self.print_context) for op in removed]
         added_compact = [op.compact_repr(self.print_context) for op in added]
         assert not removed, (
@@ -474,6 +589,10 @@ class Mutator:
             f"{indented_container(added_compact)}"
         )
 
+        # in-place mutation does not create new graphs
+        if self.in_place:
+            return
+
         # don't need to check original graph, done above seperately
         all_new_graphs = get_graphs(self.transformations.mutated.values())
         all_new_params = {
@@ -502,7 +621,33 @@ class Mutator:
             dirty=self.dirty,
         )
 
-        if result.dirty:
+        # needs to happen before the removed operables get detached
+        removed_operands = {
+            op
+            for e in self.transformations.removed
+            if isinstance(e, Expression)
+            for op in e.operatable_operands
+        }
+
+        if result.dirty and self.in_place:
+            self.check_no_illegal_mutations()
+            stale = self._rewrite_dependents()
+
+            result.repr_map = {
+                k: v for k, v in self.transformations.mutated.items() if k is not v
+            }
+            result.removed = self.transformations.removed
+            result.graphs = get_graphs(
+                p
+                for p in chain(
+                    self._starting_operables,
+                    result.repr_map.values(),
+                    self.transformations.created,
+                )
+                if p not in stale
+            )
+            self._output_graphs = result.graphs
+        elif result.dirty:
             touched = self._touched_graphs
             self.check_no_illegal_mutations()
             self._copy_unmutated()
@@ -514,8 +659,47 @@ class Mutator:
             # allowed if no copy was needed for graph
             assert not (touched & set(result.graphs))
 
+        if result.dirty:
+            result.dirty_operables = self._get_dirty_operables(result, removed_operands)
+
         return result
 
+    def _get_dirty_operables(
+        self, result: AlgoResult, removed_operands: Iterable[ParameterOperatable]
+    ) -> set[ParameterOperatable]:
+        """
+        Output operables that got mutated, created, terminated or lost a dependent,
+        together with their operands and the dependents of both.
+        """
+
+        def _out(po: ParameterOperatable) -> ParameterOperatable | None:
+            if self.is_removed(po):
+                return None
+            return result.repr_map.get(po, po)
+
+        tf = self.transformations
+        dirty = {
+            out
+            for k, v in tf.mutated.items()
+            if k is not v and k not in tf.copied and (out := _out(v)) is not None
+        }
+        dirty.update(
+            out
+            for po in chain(tf.created, tf.terminated, removed_operands)
+            if (out := _out(po)) is not None
+        )
+
+        neighbourhood = set(dirty)
+        for po in dirty:
+            neighbourhood.update(po.get_operations())
+            if not isinstance(po, Expression):
+                continue
+            for op in po.operatable_operands:
+                neighbourhood.add(op)
+                neighbourhood.update(op.get_operations())
+
+        return neighbourhood
+
     def predicate_terminate(self, pred: ConstrainableExpression):
         assert pred.constrained
         if pred._solver_terminated:
@@ -539,9 +723,15 @@ class Mutator:
         if not self.dirty:
             return self._starting_operables
 
+        # in-place mutations are sparse, creating or terminating mutates nothing
+        graphs = (
+            self._output_graphs
+            if self.in_place
+            else get_graphs(self.transformations.mutated.values())
+        )
         return {
             op
-            for g in get_graphs(self.transformations.mutated.values())
+            for g in graphs
             for op in GraphFunctions(g).nodes_of_type(ParameterOperatable)
         }
 
@@ -853,6 +1043,22 @@ class Mutator:
                 concatenated[original_obj] = chain_end
         return concatenated
 
+    @staticmethod
+    def concat_algo_results(repr_map: REPR_MAP, *results: AlgoResult) -> REPR_MAP:
+        if all(r.removed is None for r in results):
+            return Mutator.concat_repr_maps(repr_map, *(r.repr_map for r in results))
+
+        # sparse (in-place) results, unmapped operables map to themselves
+        concatenated = {}
+        for original_obj, chain_end in repr_map.items():
+            for r in results:
+                chain_end = r.get_repr(chain_end)
+                if chain_end is None:
+                    break
+            else:
+                concatenated[original_obj] = chain_end
+        return concatenated
+
     class ReprMap:
         def __init__(self, repr_map: REPR_MAP):
             self.repr_map = repr_map
@@ -9,7 +9,7 @@ from dataclasses import dataclass
 from functools import wraps
 from itertools import pairwise
 from statistics import median
-from types import NoneType
+from types import NoneType, UnionType
 from typing import TYPE_CHECKING, Callable, Iterable, Sequence, TypeGuard, cast
 
 from rich.console import Console
@@ -63,6 +63,36 @@ MAX_ITERATIONS_HEURISTIC = int(
 )
 TIMEOUT = ConfigFlagFloat("STIMEOUT", default=120, descr="Solver timeout").get()
 ALLOW_PARTIAL_STATE = ConfigFlag("SPARTIAL", default=True, descr="Allow partial state")
+MUTATE_IN_PLACE = ConfigFlag(
+    "SINPLACE",
+    default=False,
+    descr="Mutate solver-owned graphs in place instead of copying them",
+)
+COMPARE_IN_PLACE = ConfigFlag(
+    "SINPLACE_COMPARE",
+    default=False,
+    descr="Solve in copying and in-place mode and compare the results",
+)
+SOLVER_CACHE = ConfigFlag(
+    "SCACHE",
+    default=True,
+    descr="Persist solver results in the build directory",
+)
+SOLVER_CACHE_MAX_ENTRIES = ConfigFlagInt(
+    "SCACHE_MAX_ENTRIES",
+    default=256,
+    descr="Number of persisted solver results to keep",
+)
+SHARED_PREFIX = ConfigFlag(
+    "SSHARED_PREFIX",
+    default=True,
+    descr="Simplify the graph shared by a batch of predicates only once",
+)
+WORKLIST = ConfigFlag(
+    "SWORKLIST",
+    default=True,
+    descr="Only rerun algorithms whose consumed types got dirty",
+)
 # --------------------------------------------------------------------------------------
 
 if S_LOG:
@@ -529,6 +559,7 @@ def find_congruent_expression[T: CanonicalExpression](
                 expr_factory, created_only=False, include_terminated=True
             )
             if is_literal_expression(op)
+            and not mutator.is_removed(op)
             # check congruence
             and Expression.are_pos_congruent(
                 op.operands,
@@ -542,7 +573,9 @@ def find_congruent_expression[T: CanonicalExpression](
 
     # TODO: might have to check in repr_map
     candidates = [
-        expr for expr in non_lits[0].get_operations() if isinstance(expr, expr_factory)
+        expr
+        for expr in non_lits[0].get_operations()
+        if isinstance(expr, expr_factory) and not mutator.is_removed(expr)
     ]
     for c in candidates:
         # TODO congruence check instead
@@ -665,15 +698,22 @@ class SolverAlgorithm:
     func: SolverAlgorithmFunc
     single: bool
     destructive: bool
+    consumes: tuple[type[ParameterOperatable] | UnionType, ...] = (ParameterOperatable,)
 
     def __call__(self, *args, **kwargs):
         return self.func(*args, **kwargs)
 
+    def consumes_any(self, operables: Iterable[ParameterOperatable]) -> bool:
+        return any(isinstance(po, self.consumes) for po in operables)
+
 
 def algorithm(
     name: str,
     single: bool = False,
     destructive: bool = True,
+    consumes: tuple[type[ParameterOperatable] | UnionType, ...] = (
+        ParameterOperatable,
+    ),
 ) -> Callable[[SolverAlgorithmFunc], SolverAlgorithm]:
     """
     Decorator to wrap an algorithm function
@@ -682,6 +722,8 @@ def algorithm(
     - single: if True, the algorithm is only applied once in the beginning.
         All other algorithms assume this one ran before
     - destructive: Results are invalid if graph is mutated after solver is run
+    - consumes: types of operables the algorithm reads. The algorithm is only
+        rerun if an operable of one of those types got dirty since its last run.
     """
 
     if not hasattr(algorithm, "_registered_algorithms"):
@@ -697,6 +739,7 @@ def algorithm(
             func=wrapped,
             single=single,
             destructive=destructive,
+            consumes=consumes,
         )
         algorithm._registered_algorithms.append(out)
 
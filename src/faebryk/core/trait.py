@@ -50,6 +50,8 @@ class TraitUnbound(NodeException):
 
 class Trait(Node):
     __decless_trait__: bool = False
+    # ids of the implemented trait and its bases, indexed by the parent in C++
+    _trait_ids: tuple[int, ...] = ()
 
     # TODO once
     @classmethod
@@ -111,10 +113,21 @@ class Trait(Node):
         # this should be outside the class def to prevent
         # __init_subclass__ from overwriting it
         _Impl.__trait__ = cls
+        _Impl._trait_ids = _Impl._get_trait_ids()
         _Impl.__name__ = f"{cls.__name__}Impl"
 
         return _Impl
 
+    def __init_subclass__(cls, *, init: bool = True) -> None:
+        super().__init_subclass__(init=init)
+        cls._trait_ids = cls._get_trait_ids()
+
+    @classmethod
+    def _get_trait_ids(cls) -> tuple[int, ...]:
+        if not TraitImpl.is_traitimpl_type(cls):
+            return ()
+        return tuple(id(c) for c in cls.__trait__.__mro__)
+
     def __new__(cls, *args, **kwargs):
         if not TraitImpl.is_traitimpl_type(cls):
             raise TypeError(f"Don't instantiate Trait [{cls}] use Trait.impl instead")
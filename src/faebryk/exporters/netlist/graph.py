@@ -74,15 +74,22 @@ def ensure_ref_and_value(c: Module):
 
 
 def add_or_get_nets(*interfaces: F.Electrical):
-    buses = ModuleInterface._group_into_buses(interfaces)
+    # existing nets are on the bus via their part_of interface
+    net_mifs = {
+        net.part_of: net
+        for G in {mif.get_graph() for mif in interfaces}
+        for net in GraphFunctions(G).nodes_of_type(F.Net)
+    }
+    buses = ModuleInterface._group_into_buses([*interfaces, *net_mifs])
     nets_out = set()
+    interface_set = set(interfaces)
 
     for bus_repr, connected_mifs in buses.items():
-        nets_on_bus = {
-            net
-            for mif in connected_mifs
-            if (net := F.Net.find_from_part_of_mif(mif)) is not None
-        }
+        # interfaces go first, so they represent their bus
+        if bus_repr not in interface_set:
+            continue
+
+        nets_on_bus = {net_mifs[mif] for mif in connected_mifs if mif in net_mifs}
 
         if not nets_on_bus:
             net = F.Net()
@@ -48,7 +48,7 @@ from faebryk.libs.kicad.fileformats import (
     gen_uuid as _gen_uuid,
 )
 from faebryk.libs.kicad.fileformats_common import C_pts
-from faebryk.libs.sexp.dataclass_sexp import dataclass_dfs
+from faebryk.libs.sexp.dataclass_sexp import dataclass_dfs, get_undecoded
 from faebryk.libs.util import (
     FuncSet,
     KeyErrorNotFound,
@@ -1623,6 +1623,17 @@ class PCB_Transformer:
         self.pcb.nets.append(net)
         return net
 
+    def _may_reference_net(self, field: str, net: Net) -> bool:
+        """
+        Whether items of the pcb field could be on net.
+        Checks the text of lazily loaded fields instead of decoding them.
+        """
+        raw = get_undecoded(self.pcb, field)
+        if raw is None:
+            return True
+        pattern = re.compile(rf"\(net\s+{net.number}\)")
+        return any(pattern.search(v.dumps()) for v in raw)
+
     def remove_net(self, net: Net):
         """Remove a net from the pcb"""
         self.pcb.nets.remove(net)
@@ -1635,15 +1646,19 @@ class PCB_Transformer:
                     pad.net.number = 0
 
         # Disconnect zones
-        for zone in self.pcb.zones:
-            if zone.net == net.number and zone.net_name == net.name:
-                zone.net_name = ""
-                zone.net = 0
+        if self._may_reference_net("zones", net):
+            for zone in self.pcb.zones:
+                if zone.net == net.number and zone.net_name == net.name:
+                    zone.net_name = ""
+                    zone.net = 0
 
         # Disconnect vias, and routing
-        for route in self.pcb.segments + self.pcb.arcs + self.pcb.vias:
-            if route.net == net.number:
-                route.net = 0
+        for field in ("segments", "arcs", "vias"):
+            if not self._may_reference_net(field, net):
+                continue
+            for route in getattr(self.pcb, field):
+                if route.net == net.number:
+                    route.net = 0
 
     def rename_net(self, net: Net, new_name: str):
         """Rename a new, including all it's connected pads"""
@@ -1657,9 +1672,10 @@ class PCB_Transformer:
                     pad.net.name = new_name
 
         # Update zone names
-        for zone in self.pcb.zones:
-            if zone.net == net.number:
-                zone.net_name = new_name
+        if self._may_reference_net("zones", net):
+            for zone in self.pcb.zones:
+                if zone.net == net.number:
+                    zone.net_name = new_name
 
         # Vias and routing are attached only via number,
         # so we don't need to do anything
@@ -12,7 +12,7 @@ class Electrical(ModuleInterface):
 
         nets = {
             net
-            for mif in self.get_connected()
+            for mif in self.get_bus()
             if (net := mif.get_parent_of_type(Net)) is not None
         }
 
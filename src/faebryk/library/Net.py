@@ -25,7 +25,7 @@ class Net(Module):
     def get_connected_interfaces(self):
         return {
             mif
-            for mif in self.part_of.get_connected()
+            for mif in self.part_of.get_bus()
             # TODO: this should be removable since,
             # only mifs of the same type can connect
             if isinstance(mif, type(self.part_of))
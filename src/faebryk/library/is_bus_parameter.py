@@ -10,7 +10,7 @@ from faebryk.core.moduleinterface import ModuleInterface
 from faebryk.core.node import NodeException
 from faebryk.core.parameter import Expression, Parameter
 from faebryk.libs.test.times import Times
-from faebryk.libs.util import assert_once, cast_assert, find, groupby, not_none, once
+from faebryk.libs.util import assert_once, cast_assert, groupby, not_none, once
 
 logger = logging.getLogger(__name__)
 
@@ -125,41 +125,23 @@ class is_bus_parameter(Parameter.TraitT.decless()):
 
         times = Times()
 
-        busses: list[set[ModuleInterface]] = []
-
         params_grouped_by_mif = groupby(bus_parameters, lambda p: p[1].mif_parent())
 
         # find for all busses a mif that represents it, and puts its dynamic params here
         # we use the that connected mifs are the same type and thus have the same params
         # TODO: limitation: specialization (need to subgroup by type) (see exception)
-        param_bus_representatives: set[tuple[Parameter, is_bus_parameter]] = set()
+        busses = ModuleInterface._group_into_buses(params_grouped_by_mif)
 
-        while params_grouped_by_mif:
-            bus_representative_mif, bus_representative_params = (
-                params_grouped_by_mif.popitem()
-            )
-            # expensive call
-            paths = bus_representative_mif.get_connected(include_self=True)
-            connections = set(paths.keys())
+        times.add("get parameter connections")
 
-            busses.append(connections)
-            if len(set(map(type, connections))) > 1:
+        # exec resolution
+        for bus_representative_mif, param_bus in busses.items():
+            if len(set(map(type, param_bus))) > 1:
                 raise NotImplementedError(
                     "No support for specialized bus with dynamic params"
                 )
-
-            for m in connections:
-                if m in params_grouped_by_mif:
-                    del params_grouped_by_mif[m]
-            param_bus_representatives |= set(bus_representative_params)
-
-        times.add("get parameter connections")
-
-        # exec resolution
-        for _, trait in param_bus_representatives:
-            bus_representative_mif = trait.mif_parent()
-            param_bus = find(busses, lambda bus: bus_representative_mif in bus)
-            trait.resolve(param_bus)
+            for _, trait in params_grouped_by_mif[bus_representative_mif]:
+                trait.resolve(param_bus)
 
         times.add("merge parameters")
         if logger.isEnabledFor(logging.DEBUG):
@@ -175,7 +175,7 @@ def simple_erc(G: Graph, voltage_limit=1e5 * P.V):
 
                         other_sources = [
                             other
-                            for other in ep.get_connected()
+                            for other in ep.get_bus()
                             if isinstance(other, F.ElectricPower)
                             and other.has_trait(F.Power.is_power_source)
                         ]
@@ -197,7 +197,7 @@ def simple_erc(G: Graph, voltage_limit=1e5 * P.V):
             with accumulator.collect():
                 collisions = {
                     p[0]
-                    for mif in net.part_of.get_connected()
+                    for mif in net.part_of.get_bus()
                     if (p := mif.get_parent()) and isinstance(p[0], F.Net)
                 }
 
@@ -17,7 +17,13 @@ from faebryk.libs.kicad.fileformats_common import (
     C_xyz,
     gen_uuid,
 )
-from faebryk.libs.sexp.dataclass_sexp import JSON_File, SEXP_File, SymEnum, sexp_field
+from faebryk.libs.sexp.dataclass_sexp import (
+    JSON_File,
+    LazyField,
+    SEXP_File,
+    SymEnum,
+    sexp_field,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -1156,27 +1162,33 @@ class C_kicad_pcb_file(SEXP_File):
         footprints: list[C_pcb_footprint] = field(
             **sexp_field(multidict=True), default_factory=list
         )
-        vias: list[C_via] = field(**sexp_field(multidict=True), default_factory=list)
-        zones: list[C_zone] = field(**sexp_field(multidict=True), default_factory=list)
+        vias: list[C_via] = field(
+            **sexp_field(multidict=True, lazy=True), default=LazyField()
+        )
+        zones: list[C_zone] = field(
+            **sexp_field(multidict=True, lazy=True), default=LazyField()
+        )
         segments: list[C_segment] = field(
-            **sexp_field(multidict=True), default_factory=list
+            **sexp_field(multidict=True, lazy=True), default=LazyField()
         )
         arcs: list[C_arc_segment] = field(
-            **sexp_field(multidict=True), default_factory=list
+            **sexp_field(multidict=True, lazy=True), default=LazyField()
         )
 
         gr_lines: list[C_line] = field(
-            **sexp_field(multidict=True), default_factory=list
+            **sexp_field(multidict=True, lazy=True), default=LazyField()
+        )
+        gr_arcs: list[C_arc] = field(
+            **sexp_field(multidict=True, lazy=True), default=LazyField()
         )
-        gr_arcs: list[C_arc] = field(**sexp_field(multidict=True), default_factory=list)
         gr_circles: list[C_circle] = field(
-            **sexp_field(multidict=True), default_factory=list
+            **sexp_field(multidict=True, lazy=True), default=LazyField()
         )
         gr_rects: list[C_rect] = field(
-            **sexp_field(multidict=True), default_factory=list
+            **sexp_field(multidict=True, lazy=True), default=LazyField()
         )
         gr_texts: list[C_text] = field(
-            **sexp_field(multidict=True), default_factory=list
+            **sexp_field(multidict=True, lazy=True), default=LazyField()
         )
         groups: list[C_group] = field(
             **sexp_field(multidict=True), default_factory=list
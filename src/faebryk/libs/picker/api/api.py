@@ -3,24 +3,37 @@
 
 import json
 import logging
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Sequence
 
 import requests
 
 from atopile.config import config
+from faebryk.libs.exceptions import UserException
+from faebryk.libs.picker.api.cache import QueryCache
 from faebryk.libs.picker.api.models import (
     BaseParams,
     Component,
     LCSCParams,
     ManufacturerPartParams,
 )
-from faebryk.libs.util import once
+from faebryk.libs.util import ConfigFlagInt, once
 
 logger = logging.getLogger(__name__)
 
 DEFAULT_API_TIMEOUT_SECONDS = 30
 
+QUERY_CACHE_FOLDER = Path("cache/picker")
+QUERY_CACHE_TTL = ConfigFlagInt(
+    "PICKER_CACHE_TTL",
+    default=24 * 60 * 60,
+    descr="Seconds after which cached part queries are revalidated in the background",
+)
+
 
 class ApiError(Exception): ...
 
@@ -28,10 +41,22 @@ class ApiError(Exception): ...
 class ApiNotConfiguredError(ApiError): ...
 
 
+class ApiOfflineError(ApiError, UserException):
+    def __init__(self, message: str):
+        super().__init__(message, title="Not available offline")
+
+
 class ApiHTTPError(ApiError):
     def __init__(self, error: requests.exceptions.HTTPError):
         super().__init__()
         self.response = error.response
+        self.errors: list[dict | None] | None = None
+        """Per-query errors of a rejected multi-query request"""
+        if self.response.status_code == 400:
+            try:
+                self.errors = self.response.json().get("detail", {}).get("errors")
+            except Exception:
+                pass
 
     def __str__(self) -> str:
         status_code = self.response.status_code
@@ -50,6 +75,11 @@ class ApiClient:
 
     def __init__(self):
         self._client = requests.Session()
+        # background revalidation of stale cache entries, with its own session
+        self._revalidation_client = requests.Session()
+        self._revalidation_executor: ThreadPoolExecutor | None = None
+        self._revalidating: set[str] = set()
+        self._revalidating_lock = threading.Lock()
 
     @property
     @once
@@ -61,7 +91,12 @@ class ApiClient:
     def _headers(self) -> dict[str, str]:
         return {"Authorization": f"Bearer {self._cfg.api_key}"}
 
+    def _check_online(self, url: str) -> None:
+        if config.project.services.components.offline:
+            raise ApiOfflineError(f"Can't query `{url}` in offline mode")
+
     def _get(self, url: str, timeout: float = 10) -> requests.Response:
+        self._check_online(url)
         try:
             response = self._client.get(
                 f"{self._cfg.api_url}{url}", timeout=timeout, headers=self._headers
@@ -78,11 +113,16 @@ class ApiClient:
         return response
 
     def _post(
-        self, url: str, data: dict, timeout: float = DEFAULT_API_TIMEOUT_SECONDS
+        self,
+        url: str,
+        data: dict,
+        timeout: float = DEFAULT_API_TIMEOUT_SECONDS,
+        session: requests.Session | None = None,
     ) -> requests.Response:
+        self._check_online(url)
         now = time.time()
         try:
-            response = self._client.post(
+            response = (session or self._client).post(
                 f"{self._cfg.api_url}{url}",
                 json=data,
                 timeout=timeout,
@@ -116,25 +156,138 @@ class ApiClient:
         response = self._post(f"/v0/query/{method}", params.serialize())
         return [Component.from_dict(part) for part in response.json()["components"]]  # type: ignore
 
+    @property
     @once
-    def fetch_parts(self, params: BaseParams) -> list["Component"]:
-        assert params.endpoint
-        return self.query_parts(params.endpoint, params)
+    def _cache(self) -> QueryCache:
+        return QueryCache(config.project.paths.build / QUERY_CACHE_FOLDER)
 
-    def fetch_parts_multiple(
-        self, params: list[BaseParams | LCSCParams | ManufacturerPartParams]
+    def _fetch_cached(
+        self,
+        params: Sequence[BaseParams | LCSCParams | ManufacturerPartParams],
+        fetch: Callable[[list[dict], requests.Session], list[list[dict]]],
     ) -> list[list["Component"]]:
-        response = self._post("/v0/query", {"queries": [p.serialize() for p in params]})
-        results = [
-            [Component.from_dict(part) for part in result["components"]]  # type: ignore
-            for result in response.json()["results"]
+        """
+        Answer queries from the persistent cache and fetch only the missing ones.
+
+        Expired entries are still used, but refreshed in the background.
+        In offline mode missing entries are an error instead.
+        """
+        queries = [p.serialize() for p in params]
+        cached = {
+            i: entry for i, q in enumerate(queries) if (entry := self._cache.load(q))
+        }
+        missing = [i for i in range(len(queries)) if i not in cached]
+
+        if config.project.services.components.offline:
+            if missing:
+                missing_str = "\n".join(params[i].pretty_str() for i in missing)
+                raise ApiOfflineError(
+                    f"{len(missing)} part queries not cached for offline mode:\n"
+                    f"{missing_str}"
+                )
+        elif missing:
+            try:
+                fetched = fetch([queries[i] for i in missing], self._client)
+            except ApiHTTPError as e:
+                # errors refer to the sent queries, map them back to all queries
+                if e.errors is not None and len(e.errors) == len(missing):
+                    errors: list[dict | None] = [None] * len(queries)
+                    for i, error in zip(missing, e.errors):
+                        errors[i] = error
+                    e.errors = errors
+                raise
+            for i, components in zip(missing, fetched):
+                self._cache.store(queries[i], components)
+                cached[i] = (components, 0.0)
+
+        ttl = int(QUERY_CACHE_TTL)
+        if not config.project.services.components.offline:
+            if stale := [queries[i] for i, (_, age) in cached.items() if age > ttl]:
+                self._schedule_revalidation(stale, fetch)
+
+        return [
+            [Component.from_dict(part) for part in cached[i][0]]  # type: ignore
+            for i in range(len(queries))
         ]
 
-        if len(results) != len(params):
-            raise ApiError(f"Expected {len(params)} results, got {len(results)}")
+    def _schedule_revalidation(
+        self,
+        queries: list[dict],
+        fetch: Callable[[list[dict], requests.Session], list[list[dict]]],
+    ) -> None:
+        """
+        Refresh the queries in the background, each at most once at a time.
+        """
+        with self._revalidating_lock:
+            keys = {QueryCache.get_key(q) for q in queries} - self._revalidating
+            if not keys:
+                return
+            self._revalidating |= keys
+            if self._revalidation_executor is None:
+                self._revalidation_executor = ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix="picker-revalidation"
+                )
+            queries = [q for q in queries if QueryCache.get_key(q) in keys]
+            self._revalidation_executor.submit(self._revalidate, queries, keys, fetch)
+
+    def _revalidate(
+        self,
+        queries: list[dict],
+        keys: set[str],
+        fetch: Callable[[list[dict], requests.Session], list[list[dict]]],
+    ) -> None:
+        try:
+            fetched = fetch(queries, self._revalidation_client)
+        except (ApiError, requests.exceptions.RequestException) as e:
+            logger.debug(f"Failed to revalidate {len(queries)} cached queries: {e}")
+            return
+        else:
+            for query, components in zip(queries, fetched):
+                self._cache.store(query, components)
+        finally:
+            with self._revalidating_lock:
+                self._revalidating -= keys
+
+    def finish_revalidation(self) -> None:
+        """
+        Wait for all background revalidations to be written to the cache.
+        """
+        with self._revalidating_lock:
+            executor, self._revalidation_executor = self._revalidation_executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    @once
+    def fetch_parts(self, params: BaseParams) -> list["Component"]:
+        assert params.endpoint
+        endpoint = params.endpoint
+
+        def _fetch(queries: list[dict], session: requests.Session) -> list[list[dict]]:
+            return [
+                self._post(f"/v0/query/{endpoint}", query, session=session).json()[
+                    "components"
+                ]
+                for query in queries
+            ]
+
+        return self._fetch_cached([params], _fetch)[0]
+
+    def _query_multiple(
+        self, queries: list[dict], session: requests.Session
+    ) -> list[list[dict]]:
+        response = self._post("/v0/query", {"queries": queries}, session=session)
+        results = [result["components"] for result in response.json()["results"]]
+
+        if len(results) != len(queries):
+            raise ApiError(f"Expected {len(queries)} results, got {len(results)}")
 
         return results
 
+    def fetch_parts_multiple(
+        self, params: list[BaseParams | LCSCParams | ManufacturerPartParams]
+    ) -> list[list["Component"]]:
+        return self._fetch_cached(params, self._query_multiple)
+
 
 @once
 def get_api_client() -> ApiClient:
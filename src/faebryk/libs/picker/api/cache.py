@@ -0,0 +1,60 @@
+# This file is part of the faebryk project
+# SPDX-License-Identifier: MIT
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+
+class QueryCache:
+    """
+    On-disk store of raw component query responses.
+
+    Responses are stored per hash of the serialized query, together with the time
+    they were fetched, so callers can decide whether to revalidate them.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+
+    @staticmethod
+    def get_key(query: dict) -> str:
+        return hashlib.sha256(json.dumps(query, sort_keys=True).encode()).hexdigest()
+
+    def _get_path(self, query: dict) -> Path:
+        return self.path / f"{self.get_key(query)}.json"
+
+    def load(self, query: dict) -> tuple[list[dict], float] | None:
+        """
+        Returns the cached components of the query and their age in seconds.
+        """
+        path = self._get_path(query)
+        if not path.exists():
+            return None
+
+        try:
+            data = json.loads(path.read_text())
+            return data["components"], time.time() - data["timestamp"]
+        except (ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Dropping corrupted query cache entry {path}: {e}")
+            path.unlink(missing_ok=True)
+            return None
+
+    def store(self, query: dict, components: list[dict]) -> None:
+        self.path.mkdir(parents=True, exist_ok=True)
+        data = {"timestamp": time.time(), "query": query, "components": components}
+
+        # write to a temporary file unique to this write first, so concurrent
+        # writers never see partial data or move each other's files into place
+        path = self._get_path(query)
+        with tempfile.NamedTemporaryFile(
+            "w", dir=self.path, prefix=f"{path.stem}.", suffix=".tmp", delete=False
+        ) as f:
+            f.write(json.dumps(data))
+        os.replace(f.name, path)
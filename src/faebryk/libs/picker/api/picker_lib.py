@@ -1,13 +1,15 @@
 # This file is part of the faebryk project
 # SPDX-License-Identifier: MIT
 
+import json
 import logging
 import re
-from dataclasses import fields
+from dataclasses import dataclass, fields
 from textwrap import indent
 from typing import Iterable
 
 import more_itertools
+import numpy as np
 
 import faebryk.library._F as F
 from faebryk.core.module import Module
@@ -35,12 +37,18 @@ from faebryk.libs.picker.lcsc import (
     attach,
     check_attachable,
     get_raw,
+    prefetch_raw,
 )
 from faebryk.libs.picker.picker import PickError, does_not_require_picker_check
+from faebryk.libs.sets.numeric_sets import EPSILON_REL
+from faebryk.libs.sets.quantity_sets import (
+    Quantity_Interval,
+    Quantity_Interval_Disjoint,
+)
 from faebryk.libs.sets.sets import P_Set
 from faebryk.libs.util import (
+    ConfigFlagInt,
     Tree,
-    cast_assert,
     groupby,
     not_none,
 )
@@ -54,6 +62,27 @@ type SIvalue = str
 # TODO add way for user to specify quantity of PCBAs
 qty: int = 1
 
+CHECK_BATCH_SIZE = int(
+    ConfigFlagInt(
+        "PICKER_CHECK_BATCH",
+        default=8,
+        descr="Number of candidates checked against the design in one solver call",
+    )
+)
+
+
+@dataclass
+class QueryCounter:
+    modules: int = 0
+    queries: int = 0
+
+    @property
+    def saved(self) -> int:
+        return self.modules - self.queries
+
+
+query_counter = QueryCounter()
+
 
 class PickerUnboundedParameterError(Exception):
     pass
@@ -153,8 +182,18 @@ def _find_modules(
     modules: Tree[Module], solver: Solver
 ) -> dict[Module, list[Component]]:
     params = {m: _prepare_query(m, solver) for m in modules}
-    grouped = groupby(params.items(), lambda p: p[1])
-    queries = list(grouped.keys())
+    # modules with identical literal supersets share one query
+    grouped = groupby(
+        params.items(), lambda p: json.dumps(p[1].serialize(), sort_keys=True)
+    )
+    queries = [ms[0][1] for ms in grouped.values()]
+
+    query_counter.modules += len(params)
+    query_counter.queries += len(queries)
+    logger.info(
+        f"Querying {len(queries)} unique parts for {len(params)} modules"
+        f" ({query_counter.saved} queries saved in total)"
+    )
 
     def _map_response[T](results: list[T]) -> dict[Module, T]:
         assert len(results) == len(queries)
@@ -163,23 +202,23 @@ def _find_modules(
     try:
         results = client.fetch_parts_multiple(queries)
     except ApiHTTPError as e:
-        if e.response.status_code == 400:
-            response = cast_assert(dict, e.response.json())
-            if errors := response.get("detail", {}).get("errors", None):
-                raise ExceptionGroup(
-                    "Failed to fetch one or more parts",
-                    [
-                        PickError(f"{error['message']}\n{query.pretty_str()}", module)
-                        for module, (query, error) in _map_response(
-                            list(zip(queries, errors))
-                        ).items()
-                        if error is not None
-                    ],
-                ) from e
-            else:
-                raise
+        if e.errors:
+            raise ExceptionGroup(
+                "Failed to fetch one or more parts",
+                [
+                    PickError(f"{error['message']}\n{query.pretty_str()}", module)
+                    for module, (query, error) in _map_response(
+                        list(zip(queries, e.errors))
+                    ).items()
+                    if error is not None
+                ],
+            ) from e
         raise e
 
+    # usually the first candidate of every module passes the EasyEDA check, fetch
+    # those upfront; `find_compatible_parts` fetches the rest batch by batch
+    prefetch_raw(r[0].lcsc_display for r in results if r)
+
     return {m: _process_candidates(m, r) for m, r in _map_response(results).items()}
 
 
@@ -191,8 +230,7 @@ def get_candidates(
     empty = set()
 
     while candidates:
-        # TODO deduplicate parts with same literals
-        new_parts = _find_modules(modules, solver)
+        new_parts = _find_modules(candidates, solver)
         parts.update({m: p for m, p in new_parts.items() if p})
         empty = {m for m, p in new_parts.items() if not p}
         for m in parts:
@@ -219,16 +257,9 @@ def filter_by_module_params_and_attach(
     Find a component with matching parameters
     """
     # FIXME: should take the desired qty and respect it
-    tried = []
-
-    def parts_gen():
-        for part in parts:
-            if check_compatible_parameters([(cmp, part)], solver):
-                tried.append(part)
-                yield part
 
     try:
-        try_attach(cmp, parts_gen(), qty=1)
+        try_attach(cmp, find_compatible_parts(cmp, parts, solver), qty=1)
     except PickError as ex:
         cmp_descr = f"{cmp.get_full_name()}<{cmp.pretty_params(solver)}>"
         attr_str = "\n".join(
@@ -345,6 +376,116 @@ def get_compatible_parameters(
     return {p: c_range for p, c_range in param_mapping}
 
 
+def _prune_by_known_supersets(
+    module: Module, parts: list[Component], solver: Solver
+) -> list[Component]:
+    """
+    Vectorised pre-filter dropping all parts that have a numeric attribute outside
+    of the known superset of the corresponding design parameter.
+    Only drops parts that get_compatible_parameters would reject as well.
+    """
+    if not parts or not module.has_trait(F.is_pickable_by_type):
+        return parts
+
+    keep = np.ones(len(parts), dtype=bool)
+    design_params = module.get_trait(F.is_pickable_by_type).get_parameters()
+    for name, param in design_params.items():
+        if param.has_trait(does_not_require_picker_check):
+            continue
+        known_superset = solver.inspect_get_known_supersets(param, force_update=False)
+        if not isinstance(known_superset, Quantity_Interval_Disjoint):
+            continue
+        known = known_superset._intervals.intervals
+        if not known:
+            continue
+        known_min = np.array([r._min for r in known])
+        known_max = np.array([r._max for r in known])
+
+        # only single intervals with compatible units, the rest is left to the solver
+        idxs, c_min, c_max = [], [], []
+        for i, part in enumerate(parts):
+            c_range = part.attribute_literals.get(name)
+            if isinstance(c_range, Quantity_Interval_Disjoint):
+                if len(c_range._intervals.intervals) != 1:
+                    continue
+                interval = c_range._intervals.intervals[0]
+            elif isinstance(c_range, Quantity_Interval):
+                interval = c_range._interval
+            else:
+                continue
+            if not c_range.units.is_compatible_with(known_superset.units):
+                continue
+            idxs.append(i)
+            c_min.append(interval._min)
+            c_max.append(interval._max)
+        if not idxs:
+            continue
+        c_min_arr, c_max_arr = np.array(c_min), np.array(c_max)
+
+        # the containing interval is the last one starting below c_min, or the one
+        # after it if c_min is just below its start
+        below = np.searchsorted(known_min, c_min_arr, side="right") - 1
+        contained = np.zeros(len(idxs), dtype=bool)
+        for j in (below, below + 1):
+            j = np.clip(j, 0, len(known) - 1)
+            # purely relative like math.isclose in the sets, values are in base units
+            starts_before = (known_min[j] <= c_min_arr) | np.isclose(
+                known_min[j], c_min_arr, rtol=EPSILON_REL, atol=0
+            )
+            ends_after = (c_max_arr <= known_max[j]) | np.isclose(
+                c_max_arr, known_max[j], rtol=EPSILON_REL, atol=0
+            )
+            contained |= starts_before & ends_after
+
+        keep[np.array(idxs)[~contained]] = False
+
+    if LOG_PICK_SOLVE:
+        logger.info(
+            f"Pruned {len(parts) - keep.sum()}/{len(parts)} parts for `{module}`"
+            " by known supersets"
+        )
+
+    return [part for part, k in zip(parts, keep) if k]
+
+
+def find_compatible_parts(
+    module: Module, parts: list[Component], solver: Solver
+) -> Iterable[Component]:
+    """
+    Yields the parts compatible with the design in order.
+    Parts are checked in batches, each in a single solver query.
+    """
+    remaining = _prune_by_known_supersets(module, parts, solver)
+
+    while remaining:
+        batch, remaining = remaining[:CHECK_BATCH_SIZE], remaining[CHECK_BATCH_SIZE:]
+        # only reached while no earlier part was compatible
+        prefetch_raw(part.lcsc_display for part in batch)
+        predicates = []
+        for part in batch:
+            try:
+                mapping = get_compatible_parameters(module, part, solver)
+            except NotCompatibleException:
+                continue
+            predicates.append(
+                (And(*(Is(p, c_range) for p, c_range in mapping.items())), part)
+            )
+
+        while predicates:
+            if LOG_PICK_SOLVE:
+                logger.info(
+                    f"Solving for module: {module} with {len(predicates)} candidates"
+                )
+            result = solver.assert_any_predicate(predicates, lock=False)
+            if not result.true_predicates:
+                break
+            true_pred = result.true_predicates[0]
+            yield true_pred[1]
+            # only the predicates after the compatible one are left unchecked
+            checked = next(i for i, p in enumerate(predicates) if p is true_pred)
+            predicates = predicates[checked + 1 :]
+
+
 def check_compatible_parameters(
     module_candidates: list[tuple[Module, Component]], solver: Solver
 ):
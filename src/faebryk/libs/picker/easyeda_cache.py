@@ -0,0 +1,184 @@
+# This file is part of the faebryk project
+# SPDX-License-Identifier: MIT
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+
+class EasyedaCache:
+    """
+    Per-user store of raw EasyEDA component data, shared between projects.
+
+    Entries are zlib-compressed JSON in a single SQLite database in WAL mode, so
+    parallel builds can read while another one writes.
+    Entries are only decoded when requested and the most recent `max_decoded` are
+    memoised per process.
+    Access times are only written back once they are older than
+    `ACCESS_RESOLUTION` seconds, so reads rarely write.
+    Once the store exceeds `max_size` bytes the least recently used entries are
+    evicted.
+    Parts without data are only remembered per process, so they are looked up
+    again by the next build instead of being cached forever.
+    """
+
+    ACCESS_RESOLUTION = 3600
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS parts (
+            lcsc_id TEXT PRIMARY KEY,
+            data BLOB NOT NULL,
+            size INTEGER NOT NULL,
+            last_access REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS parts_last_access ON parts (last_access);
+    """
+
+    def __init__(self, path: Path, max_size: int, max_decoded: int = 256) -> None:
+        self.path = path
+        self.max_size = max_size
+        self.max_decoded = max_decoded
+        self._local = threading.local()
+        self._decoded: OrderedDict[str, dict] = OrderedDict()
+        self._decoded_lock = threading.Lock()
+        # running estimate of the store size, counted exactly when exceeded
+        self._size: int | None = None
+        self._size_lock = threading.Lock()
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(self._SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        # sqlite connections can't be shared between threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _get_decoded(self, lcsc_id: str) -> dict | None:
+        with self._decoded_lock:
+            data = self._decoded.get(lcsc_id)
+            if data is not None:
+                self._decoded.move_to_end(lcsc_id)
+            return data
+
+    def _set_decoded(self, lcsc_id: str, data: dict | None) -> None:
+        with self._decoded_lock:
+            if data is None:
+                self._decoded.pop(lcsc_id, None)
+                return
+            self._decoded[lcsc_id] = data
+            self._decoded.move_to_end(lcsc_id)
+            while len(self._decoded) > self.max_decoded:
+                self._decoded.popitem(last=False)
+
+    def __contains__(self, lcsc_id: str) -> bool:
+        if self._get_decoded(lcsc_id) is not None:
+            return True
+        row = (
+            self._connect()
+            .execute("SELECT 1 FROM parts WHERE lcsc_id = ?", (lcsc_id,))
+            .fetchone()
+        )
+        return row is not None
+
+    def get(self, lcsc_id: str) -> dict | None:
+        if (data := self._get_decoded(lcsc_id)) is not None:
+            return data
+
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT data, last_access FROM parts WHERE lcsc_id = ?", (lcsc_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        blob, last_access = row
+        if (now := time.time()) - last_access > self.ACCESS_RESOLUTION:
+            with conn:
+                conn.execute(
+                    "UPDATE parts SET last_access = ? WHERE lcsc_id = ?",
+                    (now, lcsc_id),
+                )
+
+        data = json.loads(zlib.decompress(blob))
+        self._set_decoded(lcsc_id, data)
+        return data
+
+    def put(self, lcsc_id: str, data: dict) -> None:
+        if not data:
+            self._set_decoded(lcsc_id, data)
+            return
+        self.put_serialized(lcsc_id, json.dumps(data))
+
+    def put_serialized(self, lcsc_id: str, serialized: str) -> None:
+        blob = zlib.compress(serialized.encode())
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO parts VALUES (?, ?, ?, ?)",
+                (lcsc_id, blob, len(blob), time.time()),
+            )
+            self._evict(conn, len(blob))
+        self._set_decoded(lcsc_id, None)
+
+    def _evict(self, conn: sqlite3.Connection, added: int) -> None:
+        with self._size_lock:
+            if self._size is not None and self._size + added <= self.max_size:
+                self._size += added
+                return
+
+            # other processes write to the store too, count exactly
+            (total,) = conn.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM parts"
+            ).fetchone()
+            if total > self.max_size:
+                evicted = []
+                for lcsc_id, size in conn.execute(
+                    "SELECT lcsc_id, size FROM parts ORDER BY last_access ASC"
+                ).fetchall():
+                    if total <= self.max_size:
+                        break
+                    evicted.append((lcsc_id,))
+                    total -= size
+                conn.executemany("DELETE FROM parts WHERE lcsc_id = ?", evicted)
+                logger.debug(f"Evicted {len(evicted)} parts from EasyEDA cache")
+            self._size = total
+
+    def migrate(self, folder: Path) -> int:
+        """
+        Import a legacy cache folder of one JSON file per part and remove it.
+
+        Returns the number of imported parts.
+        """
+        count = 0
+        for file in folder.iterdir():
+            if not file.is_file() or file.suffix:
+                continue
+            serialized = file.read_text()
+            # parts without data are looked up again instead
+            if file.name not in self and json.loads(serialized):
+                self.put_serialized(file.name, serialized)
+                count += 1
+            file.unlink()
+
+        # leftover temporary files of interrupted downloads
+        for file in folder.glob("*.tmp"):
+            file.unlink(missing_ok=True)
+        try:
+            folder.rmdir()
+        except OSError:
+            pass
+
+        if count:
+            logger.info(f"Migrated {count} parts to shared EasyEDA cache {self.path}")
+        return count
@@ -1,10 +1,15 @@
 # This file is part of the faebryk project
 # SPDX-License-Identifier: MIT
 
-import json
 import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Iterable, override
 
+import httpx
+import requests
+from easyeda2kicad.easyeda import easyeda_api
 from easyeda2kicad.easyeda.easyeda_api import EasyedaApi
 from easyeda2kicad.easyeda.easyeda_importer import (
     Easyeda3dModelImporter,
@@ -19,12 +24,13 @@ from easyeda2kicad.kicad.export_kicad_symbol import ExporterSymbolKicad, KicadVe
 import faebryk.library._F as F
 from atopile.config import config
 from faebryk.core.module import Module
+from faebryk.libs.picker.easyeda_cache import EasyedaCache
 from faebryk.libs.picker.picker import (
     Part,
     PickerOption,
     Supplier,
 )
-from faebryk.libs.util import ConfigFlag
+from faebryk.libs.util import ConfigFlag, ConfigFlagInt, ConfigFlagString, once
 
 logger = logging.getLogger(__name__)
 
@@ -32,6 +38,24 @@ CRAWL_DATASHEET = ConfigFlag(
     "LCSC_DATASHEET", default=False, descr="Crawl for datasheet on LCSC"
 )
 
+PREFETCH_WORKERS = ConfigFlagInt(
+    "LCSC_PREFETCH_WORKERS",
+    default=16,
+    descr="Concurrent connections used to prefetch EasyEDA data (0 to disable)",
+)
+
+EASYEDA_CACHE_PATH = ConfigFlagString(
+    "EASYEDA_CACHE",
+    default="",
+    descr="Shared EasyEDA component cache (default: ~/.cache/atopile/easyeda.db)",
+)
+EASYEDA_CACHE_MAX_MB = ConfigFlagInt(
+    "EASYEDA_CACHE_MAX_MB",
+    default=512,
+    descr="Size limit of the shared EasyEDA component cache in MB",
+)
+
+# legacy per-project cache, migrated into the shared cache on first use
 EASYEDA_CACHE_FOLDER = Path("cache/easyeda")
 
 EXPORT_NON_EXISTING_MODELS = False
@@ -82,20 +106,110 @@ class LCSC_NoDataException(LCSCException): ...
 class LCSC_PinmapException(LCSCException): ...
 
 
+@once
+def _get_shared_cache() -> EasyedaCache:
+    if path := EASYEDA_CACHE_PATH.get():
+        cache_path = Path(path)
+    else:
+        cache_path = (
+            Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache"))
+            / "atopile"
+            / "easyeda.db"
+        )
+    return EasyedaCache(cache_path, max_size=int(EASYEDA_CACHE_MAX_MB) * 1024 * 1024)
+
+
+def get_cache() -> EasyedaCache:
+    cache = _get_shared_cache()
+    legacy_folder = config.project.paths.build / EASYEDA_CACHE_FOLDER
+    if legacy_folder.is_dir():
+        cache.migrate(legacy_folder)
+    return cache
+
+
+class _PooledEasyedaApi(EasyedaApi):
+    """
+    `EasyedaApi` that sends all component requests through one client, so
+    connections are reused across parts.
+    Endpoint, headers and TLS setup are easyeda2kicad's.
+    """
+
+    def __init__(self, max_connections: int) -> None:
+        super().__init__()
+        self.client = httpx.Client(
+            headers=self.headers,
+            verify=self._ssl_context,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+        )
+
+    @override
+    def get_info_from_easyeda_api(self, lcsc_id: str) -> dict:
+        r = self.client.get(url=easyeda_api.API_ENDPOINT.format(lcsc_id=lcsc_id))
+        # don't cache server errors as parts without data
+        r.raise_for_status()
+
+        api_response = r.json()
+        if not api_response or (
+            "code" in api_response and api_response["success"] is False
+        ):
+            return {}
+        return api_response
+
+
+def prefetch_raw(lcsc_ids: Iterable[str], max_workers: int | None = None) -> int:
+    """
+    Download the EasyEDA data of all uncached parts concurrently into the shared
+    cache used by `get_raw`.
+
+    Failed downloads are skipped, so `get_raw` retries and reports them on use.
+    Returns the number of parts fetched.
+    """
+    if max_workers is None:
+        max_workers = int(PREFETCH_WORKERS)
+    lcsc_ids = set(lcsc_ids)
+    if not lcsc_ids or max_workers <= 0 or config.project.services.components.offline:
+        return 0
+    cache = get_cache()
+    missing = {lcsc_id for lcsc_id in lcsc_ids if lcsc_id not in cache}
+    if not missing:
+        return 0
+
+    logger.debug(f"Prefetching {len(missing)} components from EasyEDA")
+
+    api = _PooledEasyedaApi(max_connections=max_workers)
+
+    def _fetch(lcsc_id: str) -> bool:
+        try:
+            data = api.get_cad_data_of_component(lcsc_id=lcsc_id)
+        except (httpx.HTTPError, ValueError, KeyError) as e:
+            logger.debug(f"Failed to prefetch {lcsc_id}: {e}")
+            return False
+        cache.put(lcsc_id, data)
+        return True
+
+    with api.client, ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return sum(executor.map(_fetch, missing))
+
+
 def get_raw(lcsc_id: str):
-    api = EasyedaApi()
+    cache = get_cache()
 
-    cache_base = config.project.paths.build / EASYEDA_CACHE_FOLDER
-    cache_base.mkdir(parents=True, exist_ok=True)
+    data = cache.get(lcsc_id)
+    if data is None:
+        if config.project.services.components.offline:
+            # circular import
+            from faebryk.libs.picker.api.api import ApiOfflineError
 
-    comp_path = cache_base.joinpath(lcsc_id)
-    if not comp_path.exists():
+            raise ApiOfflineError(
+                f"EasyEDA data of part {lcsc_id} not cached for offline mode"
+            )
         logger.debug(f"Did not find component {lcsc_id} in cache, downloading...")
-        cad_data = api.get_cad_data_of_component(lcsc_id=lcsc_id)
-        serialized = json.dumps(cad_data)
-        comp_path.write_text(serialized)
-
-    data = json.loads(comp_path.read_text())
+        api = EasyedaApi()
+        data = api.get_cad_data_of_component(lcsc_id=lcsc_id)
+        cache.put(lcsc_id, data)
 
     # API returned no data
     if not data:
@@ -204,8 +318,6 @@ def get_datasheet_url(part: EeSymbol):
 
     import re
 
-    import requests
-
     url = part.info.datasheet
     if not url:
         return None
@@ -234,7 +234,7 @@ def get_pick_tree(module: Module | ModuleInterface) -> Tree[Module]:
         merge_tree = Tree()
         tree[module] = merge_tree
 
-    for child in module.get_children(
+    for child in module.iter_children(
         direct_only=True, types=(Module, ModuleInterface), include_root=False
     ):
         child_tree = get_pick_tree(child)
@@ -386,3 +386,9 @@ def pick_part_recursively(module: Module, solver: Solver):
                 f"Params:\n{indent(m.pretty_params(solver), prefix=' '*4)}"
             )
         raise
+    finally:
+        # circular import
+        from faebryk.libs.picker.api.api import get_api_client
+
+        # don't lose refreshed cache entries of stale queries
+        get_api_client().finish_revalidation()
@@ -1,21 +1,32 @@
 from __future__ import annotations
 
+import io
 import logging
 from dataclasses import Field, dataclass, fields, is_dataclass
 from enum import Enum, IntEnum, StrEnum
 from os import PathLike
 from pathlib import Path
 from types import UnionType
-from typing import TYPE_CHECKING, Any, Callable, Iterator, Union, get_args, get_origin
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Iterable,
+    Iterator,
+    Union,
+    get_args,
+    get_origin,
+)
 
-import sexpdata
 from dataclasses_json import CatchAll
 from dataclasses_json.utils import CatchAllVar
 from sexpdata import Symbol
 
 from faebryk.libs.exceptions import UserResourceException
-from faebryk.libs.sexp.util import prettify_sexp_string
-from faebryk.libs.util import cast_assert, duplicates, groupby, zip_non_locked
+from faebryk.libs.sexp import parser as sexp_parser
+from faebryk.libs.sexp.parser import RawSexp
+from faebryk.libs.sexp.util import write_pretty_sexp
+from faebryk.libs.util import cast_assert, duplicates, once, zip_non_locked
 
 if TYPE_CHECKING:
     from _typeshed import DataclassInstance
@@ -47,6 +58,9 @@ class sexp_field(dict[str, Any]):
     :param int order: Order of the field in the sexp, lower is first,
     can be less than 0. Only used if not positional.
     :param Callable[[Any], Any] | None preprocessor: Run before conversion
+    :param bool lazy: When loaded with lazy=True, keep the raw sexp of this
+    multidict list and only decode it on first access. Only used for fields of
+    the root expression. The field default has to be a LazyField.
     """
 
     positional: bool = False
@@ -55,11 +69,13 @@ class sexp_field(dict[str, Any]):
     assert_value: Any | None = None
     order: int = 0
     preprocessor: Callable[[Any], Any] | None = None
+    lazy: bool = False
 
     def __post_init__(self):
         super().__init__({"metadata": {"sexp": self}})
 
         assert not (self.positional and self.multidict)
+        assert not self.lazy or self.multidict, "Lazy only supported for multidict"
         assert (self.key is None) or self.multidict, "Key only supported for multidict"
 
     @classmethod
@@ -82,6 +98,137 @@ def _prettify_stack(stack: list[tuple[str, type]] | None) -> str:
     return ".".join(s[0] for s in stack)
 
 
+@once
+def _type_info(t) -> tuple[Any, tuple, bool]:
+    return get_origin(t), get_args(t), is_dataclass(t)
+
+
+class _DataclassCodec:
+    """
+    Field lookups of a dataclass type for _decode and _encode.
+    Built once per type instead of for every decoded/encoded node.
+    """
+
+    def __init__(self, t: type):
+        # check if t is dataclass type
+        if not hasattr(t, "__dataclass_fields__"):
+            # is_dataclass(t) trips mypy
+            raise TypeError(f"{t} is not a dataclass type")
+
+        self.fields = fields(t)
+        self.sps = {f.name: sexp_field.from_field(f) for f in self.fields}
+        self.origins = {f.name: get_origin(f.type) for f in self.fields}
+        self.args = {f.name: get_args(f.type) for f in self.fields}
+
+        self.key_fields = {
+            f.name: f for f in self.fields if not self.sps[f.name].positional
+        }
+        self.positional_fields = {
+            i: f for i, f in enumerate(self.fields) if self.sps[f.name].positional
+        }
+        # sexp key -> key field, plural fields collect their singular keys
+        self.key_groups = {
+            k: k + "s" if k + "s" in self.key_fields else k
+            for k in [
+                *self.key_fields,
+                *(name.removesuffix("s") for name in self.key_fields),
+            ]
+        }
+
+        catch_all_fields = [
+            f for f in self.fields if f.type is CatchAllVar or f.type is CatchAll
+        ]
+        if len(catch_all_fields) > 1:
+            raise ValueError(
+                f"Multiple catch-all fields not allowed: {catch_all_fields}"
+            )
+        self.catch_all_field = catch_all_fields[0] if catch_all_fields else None
+
+        # positional StrEnum fields that can be missing
+        self.empty_enum_fields = {
+            f.name
+            for f in self.fields
+            if isinstance(f.type, type) and issubclass(f.type, StrEnum) and "" in f.type
+        }
+        self.assertions = [
+            (f.name, sp.assert_value)
+            for f in self.fields
+            if (sp := self.sps[f.name]).assert_value is not None
+        ]
+        self.lazy_fields = {f.name for f in self.fields if self.sps[f.name].lazy}
+        for name in self.lazy_fields:
+            assert self.origins[name] is list, f"Lazy field {name} is not a list"
+            assert isinstance(
+                vars(t).get(name), LazyField
+            ), f"Lazy field {name} needs default=LazyField()"
+        self.encode_fields = sorted(
+            [(f, self.sps[f.name]) for f in self.fields if f != self.catch_all_field],
+            key=lambda x: (not x[1].positional, x[1].order),
+        )
+
+
+@once
+def _get_codec(t: type) -> _DataclassCodec:
+    return _DataclassCodec(t)
+
+
+@once
+def _get_lazy_keys(t: type) -> frozenset[str]:
+    """
+    Sexp keys of the lazy fields in the root expression of file type t
+    """
+    return frozenset(
+        name.removesuffix("s")
+        for f in _get_codec(t).fields
+        if is_dataclass(f.type)
+        for name in _get_codec(f.type).lazy_fields
+    )
+
+
+class LazyField:
+    """
+    Descriptor for sexp_field(lazy=True) list fields, used as their default:
+    `field(**sexp_field(multidict=True, lazy=True), default=LazyField())`
+
+    Decodes the raw sexp kept by _decode on first access.
+    Defaults to an empty list.
+    """
+
+    def __set_name__(self, owner, name: str):
+        self.name = name
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        d = vars(obj)
+        if self.name in d:
+            return d[self.name]
+
+        values, ignore_assertions = d["_lazy_fields"].pop(self.name)
+        out = _decode_key_field(
+            type(obj),
+            self.name,
+            [v.loads() if isinstance(v, RawSexp) else v for v in values],
+            None,
+            ignore_assertions,
+        )
+        for v in out:
+            setattr(v, "_parent", obj)
+        d[self.name] = out
+        # _encode writes the values as loaded while the hash doesn't change
+        d.setdefault("_lazy_originals", {})[self.name] = (values, _hash_value(out))
+        return out
+
+    def __set__(self, obj, value):
+        # dataclass __init__ passes the default
+        if value is self:
+            value = []
+        d = vars(obj)
+        d[self.name] = value
+        if lazy_fields := d.get("_lazy_fields"):
+            lazy_fields.pop(self.name, None)
+
+
 def _convert(
     val,
     t,
@@ -101,9 +248,10 @@ def _convert(
         if sp and sp.preprocessor:
             val = sp.preprocessor(val)
 
+        origin, args, is_dc = _type_info(t)
+
         # Recurse (GenericAlias e.g list[])
-        if (origin := get_origin(t)) is not None:
-            args = get_args(t)
+        if origin is not None:
             if origin is list:
                 return [
                     _convert(
@@ -133,7 +281,7 @@ def _convert(
             raise NotImplementedError(f"{origin} not supported")
 
         #
-        if is_dataclass(t):
+        if is_dc:
             return _decode(val, t, substack, ignore_assertions=ignore_assertions)
 
         # Primitive
@@ -186,49 +334,36 @@ def _decode[T: DataclassInstance](
         logger.debug(f"parse into: {t.__name__} {'-'*40}")
         logger.debug(f"sexp: {sexp}")
 
-    # check if t is dataclass type
-    if not hasattr(t, "__dataclass_fields__"):
-        # is_dataclass(t) trips mypy
-        raise TypeError(f"{t} is not a dataclass type")
+    codec = _get_codec(t)
 
     value_dict = {}
     unprocessed = {}
 
     # Fields
-    fs = fields(t)
-    key_fields = {f.name: f for f in fs if not sexp_field.from_field(f).positional}
-    positional_fields = {
-        i: f for i, f in enumerate(fs) if sexp_field.from_field(f).positional
-    }
-    catch_all_fields = [
-        f for f in fields(t) if f.type is CatchAllVar or f.type is CatchAll
-    ]
-    if len(catch_all_fields) == 0:
-        pass
-    elif len(catch_all_fields) == 1:
-        value_dict[catch_all_fields[0].name] = unprocessed
-    elif len(catch_all_fields) > 1:
-        raise ValueError(f"Multiple catch-all fields not allowed: {catch_all_fields}")
+    key_fields = codec.key_fields
+    positional_fields = codec.positional_fields
+    if codec.catch_all_field is not None:
+        value_dict[codec.catch_all_field.name] = unprocessed
 
     # Values
-    ungrouped_key_values = []
+    key_values: dict[str, list] = {}
+    key_groups = codec.key_groups
     # I'd prefer to do this through a filter/comprehension, but I don't see a good way
     for i, val in enumerate(sexp):
         if isinstance(val, list):
             if len(val):
                 if isinstance(key := val[0], Symbol):
-                    if str(key) in key_fields or str(key) + "s" in key_fields:
-                        ungrouped_key_values.append(val)
+                    if (s_name := key_groups.get(str(key))) is not None:
+                        key_values.setdefault(s_name, []).append(val)
                         continue
+        elif isinstance(val, RawSexp):
+            if (s_name := key_groups.get(val.key)) is not None:
+                key_values.setdefault(s_name, []).append(val)
+                continue
+            val = val.loads()
 
         unprocessed[i] = val
 
-    key_values = groupby(
-        ungrouped_key_values,
-        lambda val: (
-            str(val[0]) + "s" if str(val[0]) + "s" in key_fields else str(val[0])
-        ),
-    )
     pos_values = {
         i: val
         for i, val in enumerate(sexp)
@@ -251,89 +386,36 @@ def _decode[T: DataclassInstance](
     # Parse --------------------------------------------------------------
 
     # Key-Value
+    # name -> raw values, decoded on access by LazyField
+    lazy_fields: dict[str, tuple[list, bool]] = {}
     for s_name, f in key_fields.items():
         name = f.name
-        sp = sexp_field.from_field(f)
+        sp = codec.sps[name]
+        origin = codec.origins[name]
         if s_name not in key_values:
             if sp.multidict and not (f.default_factory or f.default):
-                base_type = get_origin(f.type) or f.type
+                base_type = origin or f.type
                 value_dict[name] = base_type()
             # will be automatically filled by factory
             continue
 
         values = key_values[s_name]
-        if sp.multidict:
-            origin = get_origin(f.type)
-            args = get_args(f.type)
-            if origin is list:
-                val_t = args[0]
-                value_dict[name] = [
-                    _convert(
-                        _val[1:],
-                        val_t,
-                        stack,
-                        name,
-                        sp,
-                        ignore_assertions=ignore_assertions,
-                    )
-                    for _val in values
-                ]
-            elif origin is dict:
-                if not sp.key:
-                    raise ValueError(f"Key function required for multidict: {f.name}")
-                key_t = args[0]
-                val_t = args[1]
-                converted_values = [
-                    _convert(
-                        _val[1:],
-                        val_t,
-                        stack,
-                        name,
-                        sp,
-                        ignore_assertions=ignore_assertions,
-                    )
-                    for _val in values
-                ]
-                values_with_key = [(sp.key(_val), _val) for _val in converted_values]
+        if name in codec.lazy_fields and any(isinstance(v, RawSexp) for v in values):
+            lazy_fields[name] = (values, ignore_assertions)
+            continue
 
-                if not all(isinstance(k, key_t) for k, _ in values_with_key):
-                    raise KeyError(
-                        f"Key function returned invalid type in field {f.name}:"
-                        f" {key_t=} types={[v[0] for v in values_with_key]}"
-                    )
-                if d := duplicates(values_with_key, key=lambda v: v[0]):
-                    raise ValueError(f"Duplicate keys: {d}")
-                value_dict[name] = dict(values_with_key)
-            else:
-                raise NotImplementedError(
-                    f"Multidict not supported for {origin} in field {f}"
-                )
-        else:
-            assert len(values) == 1, f"Duplicate key: {name}"
-            out = _convert(
-                values[0][1:],
-                f.type,
-                stack,
-                name,
-                sp,
-                ignore_assertions=ignore_assertions,
-            )
-            # if val is None, use default
-            if out is not None:
-                value_dict[name] = out
+        out = _decode_key_field(t, name, values, stack, ignore_assertions)
+        # if val is None, use default
+        if out is not None:
+            value_dict[name] = out
 
     # Positional
     for f, (sexp_i, v) in (
         it := zip_non_locked(positional_fields.values(), pos_values.items())
     ):
-        sp = sexp_field.from_field(f)
+        sp = codec.sps[f.name]
         # special case for missing positional empty StrEnum fields
-        if (
-            isinstance(f.type, type)
-            and issubclass(f.type, StrEnum)
-            and "" in f.type
-            and not isinstance(v, Symbol)
-        ):
+        if f.name in codec.empty_enum_fields and not isinstance(v, Symbol):
             out = _convert(
                 Symbol(""),
                 f.type,
@@ -348,8 +430,7 @@ def _decode[T: DataclassInstance](
                 raise ValueError(f"Unexpected symbol {v}")
         else:
             # positional list = var args
-            origin = get_origin(f.type)
-            if origin is list:
+            if codec.origins[f.name] is list:
                 vs = [v]
                 # consume all values
                 while (next_val := it.next(1, None)) is not None:
@@ -367,18 +448,16 @@ def _decode[T: DataclassInstance](
         value_dict[f.name] = out
 
     # Check assertions ----------------------------------------------------
-    for f in fs:
-        sp = sexp_field.from_field(f)
-        if sp.assert_value is not None:
-            assert value_dict[f.name] == sp.assert_value, (
-                f"Fileformat assertion! {f.name} has to be"
-                f" {sp.assert_value} but is {value_dict[f.name]}"
-            )
+    for name, assert_value in codec.assertions:
+        assert value_dict[name] == assert_value, (
+            f"Fileformat assertion! {name} has to be"
+            f" {assert_value} but is {value_dict[name]}"
+        )
 
     # Unprocessed values should be None if there aren't any,
     # so they don't get reproduced etc...
-    if catch_all_fields and not unprocessed:
-        value_dict[catch_all_fields[0].name] = None
+    if codec.catch_all_field is not None and not unprocessed:
+        value_dict[codec.catch_all_field.name] = None
 
     if logger.isEnabledFor(logging.DEBUG):
         logger.debug(f"value_dict: {value_dict}")
@@ -388,6 +467,12 @@ def _decode[T: DataclassInstance](
     except TypeError as e:
         raise TypeError(f"Failed to create {t} with {value_dict}") from e
 
+    if lazy_fields:
+        d = vars(out)
+        for name in lazy_fields:
+            del d[name]
+        d["_lazy_fields"] = lazy_fields
+
     # set parent pointers for all dataclasses in the tree
     for v in value_dict.values():
         if isinstance(v, list):
@@ -401,41 +486,137 @@ def _decode[T: DataclassInstance](
     return out
 
 
+def _decode_key_field(
+    t: type,
+    name: str,
+    values: list,
+    stack: list[tuple[str, type]] | None,
+    ignore_assertions: bool,
+) -> Any:
+    """
+    Decode the key-value sexps of key field name of dataclass t
+    """
+    codec = _get_codec(t)
+    f = codec.key_fields[name]
+    sp = codec.sps[name]
+    origin = codec.origins[name]
+
+    if not sp.multidict:
+        assert len(values) == 1, f"Duplicate key: {name}"
+        return _convert(
+            values[0][1:],
+            f.type,
+            stack,
+            name,
+            sp,
+            ignore_assertions=ignore_assertions,
+        )
+
+    args = codec.args[name]
+    if origin is list:
+        val_t = args[0]
+        return [
+            _convert(
+                _val[1:],
+                val_t,
+                stack,
+                name,
+                sp,
+                ignore_assertions=ignore_assertions,
+            )
+            for _val in values
+        ]
+    elif origin is dict:
+        if not sp.key:
+            raise ValueError(f"Key function required for multidict: {f.name}")
+        key_t = args[0]
+        val_t = args[1]
+        converted_values = [
+            _convert(
+                _val[1:],
+                val_t,
+                stack,
+                name,
+                sp,
+                ignore_assertions=ignore_assertions,
+            )
+            for _val in values
+        ]
+        values_with_key = [(sp.key(_val), _val) for _val in converted_values]
+
+        if not all(isinstance(k, key_t) for k, _ in values_with_key):
+            raise KeyError(
+                f"Key function returned invalid type in field {f.name}:"
+                f" {key_t=} types={[v[0] for v in values_with_key]}"
+            )
+        if d := duplicates(values_with_key, key=lambda v: v[0]):
+            raise ValueError(f"Duplicate keys: {d}")
+        return dict(values_with_key)
+    else:
+        raise NotImplementedError(f"Multidict not supported for {origin} in field {f}")
+
+
 def _convert2(val: Any) -> netlist_obj | None:
-    if val is None:
-        return None
-    if is_dataclass(val):
-        return _encode(val)
-    if isinstance(val, list):
-        return [_convert2(v) for v in val]
-    if isinstance(val, tuple):
-        return [_convert2(v) for v in val]
-    if isinstance(val, dict):
-        return [_convert2(v) for v in val.values()]
-    if isinstance(val, SymEnum):
-        return Symbol(val)
-    if isinstance(val, StrEnum):
-        return str(val)
-    if isinstance(val, IntEnum):
-        return int(val)
-    if isinstance(val, Enum):
-        return Symbol(val)
-    if isinstance(val, bool):
-        return Symbol("yes" if val else "no")
-    if isinstance(val, float):
-        if val.is_integer():
-            return int(val)
-        return val
-    if isinstance(val, (str, int)):
-        return val
-
-    return str(val)
+    return _get_converter2(type(val))(val)
+
+
+@once
+def _get_converter2(t: type) -> Callable[[Any], netlist_obj | None]:
+    """
+    Encoder for values of type t, checked in the order of precedence
+    """
+    if t is type(None):
+        return lambda val: None
+    if is_dataclass(t):
+        return _encode
+    if issubclass(t, (list, tuple)):
+        return lambda val: [_convert2(v) for v in val]
+    if issubclass(t, dict):
+        return lambda val: [_convert2(v) for v in val.values()]
+    if issubclass(t, SymEnum):
+        return Symbol
+    if issubclass(t, StrEnum):
+        return str
+    if issubclass(t, IntEnum):
+        return int
+    if issubclass(t, Enum):
+        return Symbol
+    if issubclass(t, bool):
+        return lambda val: Symbol("yes" if val else "no")
+    if issubclass(t, float):
+        return lambda val: int(val) if val.is_integer() else val
+    if issubclass(t, (str, int)):
+        return lambda val: val
+
+    return str
+
+
+def _encode_kvs(name: str, vs: Iterable) -> list:
+    out = []
+    for v in vs:
+        converted = _convert2(v)
+        if converted is None:
+            continue
+        if isinstance(converted, list):
+            out.append([Symbol(name), *converted])
+            continue
+        out.append([Symbol(name), converted])
+    return out
+
+
+def _hash_value(val) -> int:
+    """
+    Structural hash of the encoding of val
+    """
+    # repr runs in C and tells Symbols from strings
+    return hash(repr(_convert2(val)))
 
 
 def _encode(t) -> netlist_type:
     if not is_dataclass(t):
         raise TypeError(f"{t} is not a dataclass type")
 
+    codec = _get_codec(type(t))
     sexp: netlist_type = []
 
     def _append(_val):
@@ -443,22 +624,27 @@ def _encode(t) -> netlist_type:
             return
         sexp.append(_val)
 
-    catch_all_fields = [
-        f for f in fields(t) if f.type is CatchAllVar or f.type is CatchAll
-    ]
-    if len(catch_all_fields) == 0:
-        catch_all_field = None
-    elif len(catch_all_fields) == 1:
-        catch_all_field = catch_all_fields[0]
-    else:
-        raise ValueError(f"Multiple catch-all fields not allowed: {catch_all_fields}")
+    catch_all_field = codec.catch_all_field
+    lazy_fields = vars(t).get("_lazy_fields")
+    lazy_originals = vars(t).get("_lazy_originals")
 
-    fs = [(f, sexp_field.from_field(f)) for f in fields(t) if f != catch_all_field]
-
-    for f, sp in sorted(fs, key=lambda x: (not x[1].positional, x[1].order)):
+    for f, sp in codec.encode_fields:
         name = f.name
+        # untouched lazy fields are written as loaded
+        if lazy_fields and name in lazy_fields:
+            values, _ = lazy_fields[name]
+            sexp.extend(values)
+            continue
+
         val = getattr(t, name)
 
+        # decoded lazy fields that weren't changed are written as loaded
+        if lazy_originals and (original := lazy_originals.get(name)):
+            values, original_hash = original
+            if _hash_value(val) == original_hash:
+                sexp.extend(values)
+                continue
+
         if sp.positional:
             if isinstance(val, list):
                 for v in val:
@@ -467,29 +653,19 @@ def _encode(t) -> netlist_type:
             _append(_convert2(val))
             continue
 
-        def _append_kv(name, v):
-            converted = _convert2(v)
-            if converted is None:
-                return
-            if isinstance(converted, list):
-                _append([Symbol(name), *converted])
-                return
-            _append([Symbol(name), converted])
-
         if sp.multidict:
             if isinstance(val, list):
-                assert get_origin(f.type) is list
+                assert codec.origins[name] is list
                 _val = val
             elif isinstance(val, dict):
-                assert get_origin(f.type) is dict
+                assert codec.origins[name] is dict
                 _val = val
                 _val = val.values()
             else:
                 raise TypeError()
-            for v in _val:
-                _append_kv(f.name.removesuffix("s"), v)
+            sexp.extend(_encode_kvs(f.name.removesuffix("s"), _val))
         else:
-            _append_kv(f.name, val)
+            sexp.extend(_encode_kvs(f.name, [val]))
 
     if catch_all_field is not None:
         catch_all: dict[int, Any] = getattr(t, catch_all_field.name, {}) or {}
@@ -505,26 +681,44 @@ def _encode(t) -> netlist_type:
 
 
 def loads[T: DataclassInstance](
-    s: str | Path | list, t: type[T], ignore_assertions: bool = False
+    s: str | Path | list,
+    t: type[T],
+    ignore_assertions: bool = False,
+    lazy: bool = False,
 ) -> T:
-    text = s
+    """
+    :param lazy: Only decode fields marked with sexp_field(lazy=True) on access
+    """
     sexp = s
-    if isinstance(s, Path):
-        text = s.read_text()
-    if isinstance(text, str):
+    if isinstance(s, (Path, str)):
+        lazy_keys = _get_lazy_keys(t) if lazy else ()
         try:
-            sexp = sexpdata.loads(text)
+            sexp = (
+                sexp_parser.load(s, lazy_keys)
+                if isinstance(s, Path)
+                else sexp_parser.loads(s, lazy_keys)
+            )
         except Exception as e:
-            raise DecodeError(f"Failed to parse sexp: {text}") from e
+            raise DecodeError(f"Failed to parse sexp: {s}") from e
 
     return _decode([sexp], t, ignore_assertions=ignore_assertions)
 
 
+def dump(obj, path: PathLike) -> None:
+    """
+    Like dumps, but streams the text to path instead of building it.
+    """
+    sexp = _encode(obj)[0]
+    with Path(path).open("w") as f:
+        write_pretty_sexp(sexp, f)
+
+
 def dumps(obj, path: PathLike | None = None) -> str:
     path = Path(path) if path else None
     sexp = _encode(obj)[0]
-    text = sexpdata.dumps(sexp)
-    text = prettify_sexp_string(text)
+    buffer = io.StringIO()
+    write_pretty_sexp(sexp, buffer)
+    text = buffer.getvalue()
     if path:
         path.write_text(text)
     return text
@@ -542,18 +736,62 @@ def dump_single(obj) -> str:
 
 class SEXP_File:
     @classmethod
-    def loads(cls, path_or_string_or_data: Path | str | list):
-        return loads(path_or_string_or_data, cls)
+    def loads(cls, path_or_string_or_data: Path | str | list, lazy: bool = False):
+        return loads(path_or_string_or_data, cls, lazy=lazy)
 
     def dumps(self, path: PathLike | None = None):
         return dumps(self, path)
 
+    def dump(self, path: PathLike) -> None:
+        dump(self, path)
+
 
 def get_parent[T](obj, t: type[T]) -> T:
     assert hasattr(obj, "_parent")
     return cast_assert(t, obj._parent)
 
 
+def get_field_hashes(obj) -> dict[str, int]:
+    """
+    Structural hash of every decoded field of dataclass obj.
+    Pass the result to get_changed_fields to find the fields changed since.
+    """
+    lazy_fields = vars(obj).get("_lazy_fields") or {}
+    return {
+        f.name: _hash_value(getattr(obj, f.name))
+        for f in _get_codec(type(obj)).fields
+        if f.name not in lazy_fields
+    }
+
+
+def get_changed_fields(obj, hashes: dict[str, int]) -> list[str]:
+    """
+    Fields of dataclass obj that changed since hashes = get_field_hashes(obj).
+    Only decoded fields are encoded to compare them, lazy fields decoded after
+    get_field_hashes are compared to their hash at decode time.
+    """
+    lazy_originals = vars(obj).get("_lazy_originals") or {}
+    out = []
+    for name, value_hash in get_field_hashes(obj).items():
+        original = hashes.get(name)
+        if original is None and name in lazy_originals:
+            _, original = lazy_originals[name]
+        if value_hash != original:
+            out.append(name)
+    return out
+
+
+def get_undecoded(obj, name: str) -> list[RawSexp] | None:
+    """
+    Raw values of lazy field name of obj if it hasn't been decoded yet, else None
+    """
+    lazy_fields = vars(obj).get("_lazy_fields")
+    if not lazy_fields or name not in lazy_fields:
+        return None
+    values, _ = lazy_fields[name]
+    return values
+
+
 # TODO move
 class JSON_File:
     @classmethod
@@ -0,0 +1,186 @@
+# This file is part of the faebryk project
+# SPDX-License-Identifier: MIT
+
+"""
+Streaming s-expression parser for the subset of sexp written by KiCad.
+
+Produces the same trees as sexpdata.loads, but tokenizes with a single regex
+pass (so scanning runs in C) and shares one object per distinct atom.
+Syntax KiCad doesn't use (brackets, quotes, comments, escapes in symbols) is
+handed to sexpdata instead.
+"""
+
+import mmap
+import re
+from pathlib import Path
+from typing import Any, Collection
+
+import sexpdata
+from sexpdata import Symbol
+
+# string.whitespace, like sexpdata. \s would also match unicode spaces in str mode
+_WS = r"[ \t\n\r\x0b\x0c]*"
+_TOKEN = (
+    _WS + r"(?:"
+    r"(\()"  # 1: open
+    r"|(\))"  # 2: close
+    r'|"([^"\\]*(?:\\.[^"\\]*)*)"'  # 3: string
+    r"|([^ \t\n\r\x0b\x0c()\[\]\";\\'][^ \t\n\r\x0b\x0c()\[\]\";\\]*)"  # 4: atom
+    # whitespace is excluded so trailing whitespace doesn't end up here
+    r"|([^ \t\n\r\x0b\x0c]))"  # 5: anything else, not handled here
+)
+_TOKEN_STR = re.compile(_TOKEN, re.DOTALL)
+_TOKEN_BYTES = re.compile(_TOKEN.encode(), re.DOTALL)
+
+_ESCAPE_STR = re.compile(r"\\(.)", re.DOTALL)
+_UNESCAPE = sexpdata.String._lisp_quoted_to_raw
+
+
+class _Unsupported(Exception): ...
+
+
+class RawSexp:
+    """
+    Unparsed list in the tree returned by loads(lazy=...).
+    """
+
+    __slots__ = ("key", "data")
+
+    def __init__(self, key: str, data: str | bytes):
+        self.key = key
+        self.data = data
+
+    def loads(self) -> list:
+        return loads(self.data)
+
+    def dumps(self) -> str:
+        """
+        The text of the list as loaded
+        """
+        data = self.data
+        return data if isinstance(data, str) else data.decode()
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.key})"
+
+
+def _atom(token: str) -> Any:
+    # same conversion as sexpdata.Parser.atom
+    if token == "t":
+        return True
+    try:
+        return int(token)
+    except ValueError:
+        try:
+            return float(token)
+        except ValueError:
+            return Symbol(token)
+
+
+def _unescape(match: re.Match[str]) -> str:
+    return _UNESCAPE.get(match.group(0), match.group(0))
+
+
+def _parse(data: str | bytes | mmap.mmap, lazy: Collection[str] = ()) -> list:
+    binary = not isinstance(data, str)
+    pattern = _TOKEN_BYTES if binary else _TOKEN_STR
+    lazy_raw = {k.encode() for k in lazy} if binary else set(lazy)
+
+    # raw token -> value, atoms are immutable so they can be shared
+    atoms: dict[Any, Any] = {}
+    strings: dict[Any, str] = {}
+
+    top: list = []
+    current = top
+    stack: list[list] = []
+    open_start = 0
+    tokens = pattern.finditer(data)
+    for match in tokens:
+        kind = match.lastindex
+        if kind == 4:
+            raw = match.group(4)
+            # keep lazy children of the root expression as raw text
+            if lazy_raw and len(stack) == 2 and not current and raw in lazy_raw:
+                depth = 1
+                for match in tokens:
+                    kind = match.lastindex
+                    if kind == 1:
+                        depth += 1
+                    elif kind == 2:
+                        depth -= 1
+                        if not depth:
+                            break
+                    elif kind == 5:
+                        raise _Unsupported()
+                else:
+                    raise _Unsupported()
+                current = stack.pop()
+                current[-1] = RawSexp(
+                    raw.decode() if binary else raw, data[open_start : match.end()]
+                )
+                continue
+            value = atoms.get(raw)
+            if value is None:
+                token = raw.decode() if binary else raw
+                # nil is a fresh empty list each time
+                if token == "nil":
+                    current.append([])
+                    continue
+                value = atoms[raw] = _atom(token)
+            current.append(value)
+        elif kind == 1:
+            new: list = []
+            current.append(new)
+            stack.append(current)
+            current = new
+            open_start = match.start(1)
+        elif kind == 2:
+            if not stack:
+                raise _Unsupported()
+            current = stack.pop()
+        elif kind == 3:
+            raw = match.group(3)
+            value = strings.get(raw)
+            if value is None:
+                value = raw.decode() if binary else raw
+                if "\\" in value:
+                    value = _ESCAPE_STR.sub(_unescape, value)
+                strings[raw] = value
+            current.append(value)
+        else:
+            raise _Unsupported()
+
+    if stack:
+        raise _Unsupported()
+    return top
+
+
+def loads(data: str | bytes | mmap.mmap, lazy: Collection[str] = ()) -> Any:
+    """
+    Parse a single s-expression, see sexpdata.loads.
+
+    Children of the root expression starting with a key in lazy may be kept as
+    RawSexp instead of being parsed.
+    """
+    try:
+        out = _parse(data, lazy)
+        if len(out) == 1:
+            return out[0]
+    except _Unsupported:
+        pass
+
+    # also reports syntax errors
+    text = data if isinstance(data, str) else bytes(data).decode()
+    return sexpdata.loads(text)
+
+
+def load(path: Path, lazy: Collection[str] = ()) -> Any:
+    """
+    Parse the file at path without reading it into a python string.
+    """
+    with path.open("rb") as f:
+        # can't map empty files
+        if not path.stat().st_size:
+            return loads(b"", lazy)
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            return loads(data, lazy)
@@ -2,6 +2,14 @@
 # SPDX-License-Identifier: MIT
 
 import logging
+import re
+from functools import cache
+from typing import TextIO
+
+import sexpdata
+from sexpdata import String, Symbol
+
+from faebryk.libs.sexp.parser import RawSexp
 
 logger = logging.getLogger(__name__)
 
@@ -30,3 +38,160 @@ def prettify_sexp_string(raw: str) -> str:
     # if i > 0 no strip is a kicad bug(?) workaround
     out = "\n".join(x.rstrip() if i > 0 else x for i, x in enumerate(out.splitlines()))
     return out
+
+
+class _PrettyWriter:
+    """
+    Writes a sexp tree formatted like prettify_sexp_string(sexpdata.dumps(sexp)),
+    without building either string.
+    """
+
+    # chars prettify_sexp_string doesn't just copy
+    _SPECIAL = re.compile(r'["\n ()]')
+
+    def __init__(self, f: TextIO):
+        self.f = f
+        self.level = 0
+        self.in_quotes = False
+        self.last = ""
+        # output since the last inserted newline
+        self.pending: list[str] = []
+        self.first_line = True
+        # str/Symbol -> token, plain
+        self.tokens: dict[str, tuple[str, bool]] = {}
+
+    @staticmethod
+    @cache
+    def _indent(level: int) -> str:
+        return " " * 4 * level
+
+    def _flush(self, final: bool = False):
+        chunk = "".join(self.pending)
+        self.pending.clear()
+        # same lines as splitlines() of the whole output
+        lines = chunk.splitlines() if final else (chunk + "\n").splitlines()
+        for line in lines:
+            if self.first_line:
+                # no strip on the first line, see prettify_sexp_string
+                self.first_line = False
+                self.f.write(line)
+                continue
+            self.f.write("\n" + line.rstrip())
+
+    def _feed_char(self, c: str):
+        if c == '"':
+            self.in_quotes = not self.in_quotes
+        if self.in_quotes:
+            ...
+        elif c == "\n":
+            return
+        elif c == " " and self.last == " ":
+            return
+        elif c == "(":
+            if self.level != 0:
+                self._flush()
+                self.pending.append(self._indent(self.level))
+            self.level += 1
+        elif c == ")":
+            self.level -= 1
+        self.pending.append(c)
+        self.last = c
+
+    def _feed(self, text: str):
+        for c in text:
+            self._feed_char(c)
+
+    def _token(self, val) -> tuple[str, bool]:
+        """
+        Returns val as in sexpdata.tosexp, and whether it can be copied verbatim
+        (outside of quotes).
+        """
+        if isinstance(val, str):
+            out = self.tokens.get(val)
+            if out is None:
+                if isinstance(val, Symbol):
+                    token = Symbol.quote(val)
+                    plain = bool(token) and not self._SPECIAL.search(token)
+                else:
+                    quoted = String.quote(val)
+                    token = '"' + quoted + '"'
+                    plain = '"' not in quoted
+                out = self.tokens[val] = token, plain
+            return out
+        if val is None:
+            return "()", False
+        if isinstance(val, bool):
+            return ("t", True) if val else ("()", False)
+        if isinstance(val, (int, float)):
+            return str(val), True
+        token = sexpdata.tosexp(val)
+        return token, False
+
+    def _write_raw(self, text: str):
+        """
+        Write an unparsed list as loaded, on its own line like any other list.
+        """
+        if self.in_quotes:
+            self._feed(text)
+            return
+        if self.level != 0:
+            self._flush()
+            self.pending.append(self._indent(self.level))
+        self.pending.append(text)
+        self.last = text[-1]
+        # _feed_char would have flipped the quote state for every quote
+        if text.count('"') % 2:
+            self.in_quotes = True
+
+    def write(self, val):
+        # same structure as sexpdata.tosexp
+        # fast paths do the same as _feed_char outside of quotes
+        pending = self.pending
+        if isinstance(val, RawSexp):
+            self._write_raw(val.dumps())
+            return
+        if isinstance(val, list) or type(val) is tuple:
+            if self.in_quotes:
+                self._feed_char("(")
+            else:
+                if self.level != 0:
+                    self._flush()
+                    pending.append(self._indent(self.level))
+                self.level += 1
+                pending.append("(")
+                self.last = "("
+            for i, v in enumerate(val):
+                if i:
+                    if self.in_quotes:
+                        self._feed_char(" ")
+                    elif self.last != " ":
+                        pending.append(" ")
+                        self.last = " "
+                self.write(v)
+            if self.in_quotes:
+                self._feed_char(")")
+            else:
+                self.level -= 1
+                pending.append(")")
+                self.last = ")"
+            return
+
+        token, plain = self._token(val)
+        if plain and not self.in_quotes:
+            pending.append(token)
+            self.last = token[-1]
+        else:
+            self._feed(token)
+
+    def finish(self):
+        self._flush(final=True)
+
+
+def write_pretty_sexp(sexp, f: TextIO):
+    """
+    Write sexp to f, formatted like prettify_sexp_string(sexpdata.dumps(sexp)).
+    RawSexp lists are written as loaded.
+    """
+    writer = _PrettyWriter(f)
+    writer.write(sexp)
+    writer.finish()
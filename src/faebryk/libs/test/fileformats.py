@@ -62,6 +62,8 @@ def _PCB_DIR(version: int = DEFAULT_VERSION) -> Path:
 
 PRJFILE = _PRJ_DIR() / "test.kicad_pro"
 PCBFILE = _PCB_DIR() / "test.kicad_pcb"
+# PCBFILE as dumped before the sexp codecs were precompiled
+PCBDUMPFILE = _PCB_DIR() / "test_dump.kicad_pcb"
 FPFILE = _FP_DIR() / "test.kicad_mod"
 NETFILE = _NETLIST_DIR() / "test_e.net"
 FPLIBFILE = _FPLIB_DIR(7) / "fp-lib-table"
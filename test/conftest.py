@@ -1,6 +1,8 @@
 import logging
 import os
+import tracemalloc
 from pathlib import Path
+from typing import Any, Callable
 
 import pytest
 
@@ -31,3 +33,49 @@ def setup_project_config(tmp_path):
         entry="", paths=ProjectPaths(build=tmp_path / "build", root=tmp_path)
     )
     yield
+
+
+@pytest.fixture(params=["legacy", "new"])
+def compare_impls(request, benchmark):
+    """
+    Template for benchmarks of a new implementation against the legacy one,
+    parametrized over both.
+
+    Call it with both implementations and their arguments, it benchmarks the
+    selected one and returns its result.
+    With `size` (bytes, or a function of the result) the throughput is reported,
+    with `measure_memory` the peak memory of one run.
+    """
+
+    def _run(
+        legacy: Callable,
+        new: Callable,
+        *args,
+        size: int | Callable[[Any], int] | None = None,
+        measure_memory: bool = False,
+    ):
+        f = legacy if request.param == "legacy" else new
+
+        peak = None
+        if measure_memory:
+            tracemalloc.start()
+            f(*args)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            benchmark.extra_info["peak_memory_bytes"] = peak
+
+        result = benchmark(f, *args)
+
+        if size is not None:
+            size = size(result) if callable(size) else size
+            benchmark.extra_info["bytes"] = size
+            if benchmark.stats:
+                logging.getLogger(request.module.__name__).info(
+                    f"{request.node.name}:"
+                    f" {size / benchmark.stats.stats.mean / 1e6:.1f} MB/s"
+                    + (f", {peak / 1e6:.0f} MB peak" if peak is not None else "")
+                    + f" for {size / 1e6:.1f} MB"
+                )
+        return result
+
+    return _run
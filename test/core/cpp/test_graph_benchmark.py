@@ -0,0 +1,40 @@
+# This file is part of the faebryk project
+# SPDX-License-Identifier: MIT
+
+import pytest
+
+import faebryk.library._F as F
+from faebryk.core.graph import GraphFunctions
+from faebryk.core.module import Module
+from faebryk.core.node import Node
+from faebryk.core.parameter import Parameter
+from faebryk.libs.library import L
+
+
+# ~50k nodes
+def _design(count: int = 2000) -> Module:
+    class App(Module):
+        resistors = L.list_field(count, F.Resistor)
+
+    return App()
+
+
+def _scan[T: Node](graph: GraphFunctions, t: type[T]) -> set[T]:
+    # the node projection + isinstance scan the type index replaces
+    return {n for n in graph.graph.node_projection() if isinstance(n, t)}
+
+
+@pytest.mark.slow
+@pytest.mark.benchmark(min_rounds=3)
+@pytest.mark.parametrize("t", [F.Resistor, Parameter])
+def test_nodes_of_type_throughput(benchmark, compare_impls, t: type[Node]):
+    app = _design()
+    graph = GraphFunctions(app.get_graph())
+
+    nodes = GraphFunctions.nodes_of_type(graph, t)
+    assert nodes == _scan(graph, t)
+
+    compare_impls(_scan, GraphFunctions.nodes_of_type, graph, t)
+
+    benchmark.extra_info["nodes"] = len(graph.node_projection())
+    benchmark.extra_info["matches"] = len(nodes)
@@ -0,0 +1,51 @@
+# This file is part of the faebryk project
+# SPDX-License-Identifier: MIT
+
+import logging
+from typing import Callable
+
+import pytest
+
+import faebryk.library._F as F
+from faebryk.core.cpp import find_paths
+from faebryk.core.moduleinterface import ModuleInterface
+from faebryk.libs.util import times
+
+logger = logging.getLogger(__name__)
+
+
+def _hull(t: type[ModuleInterface], cnt: int = 30) -> ModuleInterface:
+    instances = times(cnt, t)
+    instances[0].connect(*instances[1:])
+    return instances[0]
+
+
+# same designs as in test_performance.py
+DESIGNS: dict[str, Callable[[], ModuleInterface]] = {
+    "hull_Electrical": lambda: _hull(F.Electrical),
+    "hull_ElectricPower": lambda: _hull(F.ElectricPower),
+    "hull_ElectricLogic": lambda: _hull(F.ElectricLogic),
+    "hull_I2C": lambda: _hull(F.I2C),
+    "RP2040_ReferenceDesign": lambda: F.RP2040_ReferenceDesign().rp2040.power_core,
+}
+
+
+@pytest.mark.slow
+@pytest.mark.benchmark(min_rounds=3)
+@pytest.mark.parametrize("design", DESIGNS.keys())
+def test_pathfinder_throughput(benchmark, design: str):
+    src = DESIGNS[design]()
+
+    paths, counters = benchmark(find_paths, src, [])
+    assert paths
+
+    total = next(c for c in counters if c.name == "total")
+    benchmark.extra_info["paths"] = total.in_cnt
+    benchmark.extra_info["path_memory_bytes"] = total.memory_bytes
+    if benchmark.stats:
+        paths_per_s = total.in_cnt / benchmark.stats.stats.mean
+        benchmark.extra_info["paths_per_s"] = paths_per_s
+        logger.info(
+            f"{design}: {total.in_cnt} paths, {paths_per_s:.0f} paths/s,"
+            f" {total.memory_bytes / 1024:.0f} KiB paths"
+        )
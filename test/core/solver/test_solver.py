@@ -3,6 +3,7 @@
 
 import logging
 import math
+import os
 from operator import add, mul, sub, truediv
 from typing import Any, Iterable
 
@@ -38,12 +39,16 @@ from faebryk.core.parameter import (
     SymmetricDifference,
     Union,
 )
+from faebryk.core.solver import cache, defaultsolver
+from faebryk.core.solver.cache import SolverResultCache
 from faebryk.core.solver.defaultsolver import DefaultSolver
+from faebryk.core.solver.mutator import Mutator
 from faebryk.core.solver.utils import (
     CanonicalExpression,
     CanonicalLiteral,
     Contradiction,
     ContradictionByLiteral,
+    get_graphs,
 )
 from faebryk.libs.library import L
 from faebryk.libs.library.L import DiscreteSet, Range, RangeWithGaps, Single
@@ -57,9 +62,9 @@ from faebryk.libs.sets.quantity_sets import (
     Quantity_Interval_Disjoint,
     Quantity_Set,
 )
-from faebryk.libs.sets.sets import BoolSet, EnumSet
+from faebryk.libs.sets.sets import BoolSet, EnumSet, P_Set
 from faebryk.libs.units import P, dimensionless, quantity
-from faebryk.libs.util import times
+from faebryk.libs.util import not_none, times
 
 logger = logging.getLogger(__name__)
 
@@ -89,6 +94,152 @@ def test_solve_phase_one():
     solver.simplify_symbolically(voltage1.get_graph())
 
 
+def test_solve_in_place_matches_copying():
+    p0, p1, p2 = times(3, lambda: Parameter(units=P.V))
+    p0.alias_is(p1 + p2)
+    p1.constrain_subset(Range(1 * P.V, 3 * P.V))
+    p2.alias_is(Range(2 * P.V, 6 * P.V))
+    (p0 * 2).constrain_le(20 * P.V)
+
+    solver = DefaultSolver()
+    # raises if the results of both modes differ
+    solver._simplify_symbolically_compare_in_place(p0.get_graph(), None)
+
+
+@pytest.mark.parametrize(
+    "module",
+    [F.RP2040, F.RP2040_ReferenceDesign, F.ESP32_C3_MINI_1_ReferenceDesign],
+    ids=lambda m: m.__name__,
+)
+def test_solve_realworld_in_place_matches_copying(module: type[Module]):
+    app = module()
+    F.is_bus_parameter.resolve_bus_parameters(app.get_graph())
+
+    solver = DefaultSolver()
+    # raises if the results of both modes differ
+    solver._simplify_symbolically_compare_in_place(app.get_graph(), None)
+
+
+def test_solve_worklist_skips_idle_algorithms(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(defaultsolver, "WORKLIST", True)
+    p0, p1, p2 = times(3, lambda: Parameter(units=P.V))
+    p0.alias_is(p1 + p2)
+    p1.alias_is(Range(1 * P.V, 3 * P.V))
+    p2.alias_is(Range(2 * P.V, 6 * P.V))
+
+    solver = DefaultSolver()
+    repr_map, _ = solver.simplify_symbolically(p0.get_graph())
+    assert repr_map.try_get_literal(p0, allow_subset=True) == Range(3 * P.V, 9 * P.V)
+
+    counters = solver.algorithm_counters
+    # nothing consumed by these got touched after their first run
+    assert counters["Involutory fold"].invocations == 1
+    assert counters["Fold Sin"].invocations == 1
+    assert sum(c.skipped for c in counters.values()) > 0
+    assert all(c.dirty <= c.invocations for c in counters.values())
+
+
+@pytest.mark.parametrize(
+    "module",
+    [F.RP2040, F.RP2040_ReferenceDesign, F.ESP32_C3_MINI_1_ReferenceDesign],
+    ids=lambda m: m.__name__,
+)
+def test_solve_worklist_matches_full_sweep(
+    module: type[Module], monkeypatch: pytest.MonkeyPatch
+):
+    def solve(worklist: bool) -> dict[str, Any]:
+        monkeypatch.setattr(defaultsolver, "WORKLIST", worklist)
+        app = module()
+        F.is_bus_parameter.resolve_bus_parameters(app.get_graph())
+        repr_map, _ = DefaultSolver().simplify_symbolically(app.get_graph())
+        return {
+            p.relative_address(app): repr_map.try_get_literal(p, allow_subset=True)
+            for p in app.get_children(direct_only=False, types=Parameter)
+        }
+
+    assert solve(worklist=True) == solve(worklist=False)
+
+
+def test_solver_result_cache(tmp_path, monkeypatch: pytest.MonkeyPatch):
+    class App(Module):
+        a = L.p_field(units=P.V)
+        b = L.p_field(units=P.V)
+        c = L.p_field(units=P.V)
+
+    app = App()
+    app.a.alias_is(app.b + app.c)
+    app.b.alias_is(Range(1 * P.V, 3 * P.V))
+    app.c.alias_is(Range(2 * P.V, 6 * P.V))
+
+    solver = DefaultSolver(cache_path=tmp_path)
+    assert solver.inspect_get_known_supersets(app.a) == Range(3 * P.V, 9 * P.V)
+    assert len(list(tmp_path.glob("*.json"))) == 1
+
+    # warm run: answered from disk without solving
+    solver = DefaultSolver(cache_path=tmp_path)
+    assert solver.inspect_get_known_supersets(app.a) == Range(3 * P.V, 9 * P.V)
+    assert not solver.algorithm_counters
+
+    # changed constraint invalidates the cached result
+    app.a.constrain_le(100 * P.V)
+    solver = DefaultSolver(cache_path=tmp_path)
+    assert solver.inspect_get_known_supersets(app.a).is_subset_of(
+        Range(3 * P.V, 9 * P.V)
+    )
+    assert solver.algorithm_counters
+    assert len(list(tmp_path.glob("*.json"))) == 2
+
+    # results of a different solver version are not picked up
+    monkeypatch.setattr(cache, "_get_solver_hash", lambda: "other")
+    solver = DefaultSolver(cache_path=tmp_path)
+    solver.inspect_get_known_supersets(app.a)
+    assert solver.algorithm_counters
+    assert len(list(tmp_path.glob("*.json"))) == 3
+
+
+def test_solver_result_cache_lookup(tmp_path):
+    class App(Module):
+        a = L.p_field(units=P.V)
+        b = L.p_field(units=P.V)
+
+    app = App()
+    app.a.alias_is(app.b)
+    G = app.get_graph()
+    fingerprint = not_none(SolverResultCache.fingerprint(G))
+
+    result_cache = SolverResultCache(tmp_path)
+    assert not result_cache.might_contain(G)
+    assert result_cache.load(fingerprint) is None
+
+    result_cache.store(fingerprint, {"a": P_Set.from_value(Range(1 * P.V, 2 * P.V))})
+    assert result_cache.might_contain(G)
+
+    # fresh instances pick up persisted entries
+    result_cache = SolverResultCache(tmp_path)
+    assert result_cache.load(fingerprint) == {"a": Range(1 * P.V, 2 * P.V)}
+
+    # graphs of a size that was never stored are rejected without hashing
+    app.a.alias_is(app.b + app.b)
+    assert not result_cache.might_contain(G)
+
+
+def test_solver_result_cache_eviction(tmp_path):
+    result_cache = SolverResultCache(tmp_path, max_entries=2)
+    supersets = {"p": P_Set.from_value(Range(1 * P.V, 2 * P.V))}
+
+    for i, key in enumerate(["1-a", "1-b"]):
+        result_cache.store(key, supersets)
+        os.utime(tmp_path / f"{key}.json", (i, i))
+
+    # loading marks an entry as recently used
+    assert result_cache.load("1-a") is not None
+    result_cache.store("1-c", supersets)
+
+    assert {p.stem for p in tmp_path.glob("*.json")} == {"1-a", "1-c"}
+    assert result_cache.load("1-b") is None
+    assert not list(tmp_path.glob("*.tmp"))
+
+
 def test_simplify():
     class App(Module):
         ops = L.list_field(
@@ -125,6 +276,9 @@ def test_simplify():
     solver.simplify_symbolically(G)
     # TODO actually test something
 
+    # raises if the results of both modes differ
+    solver._simplify_symbolically_compare_in_place(G, None)
+
 
 def test_simplify_logic_and():
     class App(Module):
@@ -617,17 +771,16 @@ def test_voltage_divider_find_resistances(Vin, Vout):
     v_in = Parameter(units=P.V)
     v_out = Parameter(units=P.V)
     r_eq = Parameter(units=P.ohm)
-    
 
     v_in.alias_is(Vin)
     v_out.alias_is(Vout)
 
-    ratio = (Vin-Vout)/Vout
+    ratio = (Vin - Vout) / Vout
 
     base_resistance = 10000 * P.ohm
 
     r_bottom = base_resistance
-    r_top = base_resistance*ratio
+    r_top = base_resistance * ratio
 
     r_bottom.alias_is(r_bottom)
     r_top.alias_is(r_top)
@@ -637,7 +790,7 @@ def test_voltage_divider_find_resistances(Vin, Vout):
 
     # Solving for the Resistances (given Voltage input and output), we find that RU/RW = (Vi-Vo)/Vo
 
-    # With this ratio, we can multiply both values by a standard 10k ohms to find a general resistor configuration that would 
+    # With this ratio, we can multiply both values by a standard 10k ohms to find a general resistor configuration that would
     # allow for Vin and Vout to work.
 
 
@@ -702,6 +855,47 @@ def test_assert_any_predicate_super_basic(predicate_type: type[Predicate]):
     assert result.unknown_predicates == []
 
 
+def test_assert_any_predicate_shared_graph_unchanged(
+    monkeypatch: pytest.MonkeyPatch,
+):
+    monkeypatch.setattr(defaultsolver, "SHARED_PREFIX", True)
+
+    p0 = Parameter(units=P.V)
+    p0.alias_is(Range(0 * P.V, 10 * P.V))
+    preds = [IsSubset(p0, Range((i + 20) * P.V, (i + 30) * P.V)) for i in range(5)]
+
+    solver = DefaultSolver()
+    shared: list[Mutator.ReprMap] = []
+    node_counts: list[int] = []
+
+    simplify_shared_prefix = solver._simplify_shared_prefix
+
+    def _simplify_shared_prefix(predicates):
+        out = simplify_shared_prefix(predicates)
+        assert out is not None
+        shared.append(out)
+        return out
+
+    simplify_symbolically = solver.simplify_symbolically
+
+    def _simplify_symbolically(g, *args, **kwargs):
+        if shared:
+            node_counts.extend(
+                G.node_count for G in get_graphs(shared[0].repr_map.values())
+            )
+        return simplify_symbolically(g, *args, **kwargs)
+
+    monkeypatch.setattr(solver, "_simplify_shared_prefix", _simplify_shared_prefix)
+    monkeypatch.setattr(solver, "simplify_symbolically", _simplify_symbolically)
+
+    result = solver.assert_any_predicate([(pred, None) for pred in preds], lock=False)
+    assert result.false_predicates == [(pred, None) for pred in preds]
+
+    # candidates are solved on copies, the shared graph never grows
+    assert len(node_counts) == len(preds)
+    assert len(set(node_counts)) == 1
+
+
 def test_congruence_filter():
     A = Parameter(domain=L.Domains.ENUM(F.LED.Color))
     x = Is(A, EnumSet(F.LED.Color.EMERALD))
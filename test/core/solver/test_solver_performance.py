@@ -0,0 +1,78 @@
+# This file is part of the faebryk project
+# SPDX-License-Identifier: MIT
+
+import logging
+from itertools import combinations
+
+import pytest
+
+from faebryk.core.parameter import Add, Expression, Multiply, Parameter
+from faebryk.core.parameter import ParameterOperatable as PO
+from faebryk.core.solver.analytical import remove_congruent_expressions
+from faebryk.core.solver.mutator import Mutator
+from faebryk.core.solver.utils import get_graphs
+from faebryk.libs.library import L
+from faebryk.libs.test.times import Times
+from faebryk.libs.util import groupby, times
+
+logger = logging.getLogger(__name__)
+
+
+def _congruent_design(expr_count: int, duplicate_every: int = 10):
+    """
+    Chain of `A_i + A_i+1` and `A_i * A_i+1` expressions.
+    Every `duplicate_every`-th sum gets a commutated congruent twin.
+    """
+    params = times(
+        expr_count // 2 + 1, lambda: Parameter(domain=L.Domains.Numbers.REAL())
+    )
+    exprs: list[Expression] = []
+    twins: list[tuple[Expression, Expression]] = []
+    for i, (a, b) in enumerate(zip(params, params[1:])):
+        add = Add(a, b)
+        exprs += [add, Multiply(a, b)]
+        if i % duplicate_every == 0:
+            twin = Add(b, a)
+            exprs.append(twin)
+            twins.append((add, twin))
+    return exprs, twins
+
+
+@pytest.mark.slow
+@pytest.mark.parametrize("expr_count", [10_000, 30_000, 100_000])
+def test_remove_congruent_expressions_scaling(expr_count: int):
+    timings = Times()
+
+    exprs, twins = _congruent_design(expr_count)
+    timings.add("construct")
+
+    # pairs the old per-type all-pairs comparison would have checked
+    by_type = groupby(exprs, type)
+    pairs_by_type = sum(len(v) * (len(v) - 1) // 2 for v in by_type.values())
+    by_hash = groupby(exprs, Expression.get_congruence_hash, only_multi=True)
+    pairs_by_hash = sum(len(v) * (len(v) - 1) // 2 for v in by_hash.values())
+    timings.add("hash")
+
+    mutator = Mutator(
+        *get_graphs(exprs),
+        algo=remove_congruent_expressions,
+        print_context=PO.ReprContext(),
+    )
+    timings.add("setup mutator")
+
+    mutator.run()
+    timings.add("remove congruent")
+
+    for add, twin in twins:
+        assert mutator.get_mutated(add) is mutator.get_mutated(twin)
+    for e1, e2 in combinations(exprs[:50], 2):
+        if e1.get_congruence_hash() != e2.get_congruence_hash():
+            assert not e1.is_congruent_to(e2)
+
+    per_expr = timings.times["remove congruent"] / len(exprs)
+    logger.info(f"\n{timings}")
+    logger.info(
+        f"|E|={len(exprs)} compared pairs: {pairs_by_hash} (was {pairs_by_type})"
+    )
+    logger.info(f"----> Avg/expr: {per_expr * 1e6:.2f} us")
+    assert pairs_by_hash == len(twins)
@@ -102,3 +102,110 @@ def test_mutator_no_graph_merge():
     assert alias_new.get_graph() is G_new
     assert p3_new.get_graph() is not G_new
     assert cast_assert(Parameter, mutator.get_mutated(p1)).get_graph() is G_new
+
+
+def test_mutator_in_place_rewrites_dependents():
+    A, B, C = times(3, lambda: Parameter(units=P.V))
+    inner = A + B
+    outer = inner + C
+    alias = C.alias_is(A)
+
+    context = ParameterOperatable.ReprContext()
+
+    @algorithm("")
+    def algo(mutator: Mutator):
+        mutator.mutate_expression(inner, operands=[A, C])
+
+    mutator = Mutator(A.get_graph(), print_context=context, algo=algo, in_place=True)
+    mutator.run()
+    result = mutator.close()
+
+    inner_new = cast_assert(Add, result.get_repr(inner))
+    outer_new = cast_assert(Add, result.get_repr(outer))
+
+    # only the mutated expression and its dependents got rewritten
+    assert set(result.repr_map) == {inner, outer}
+    assert inner_new.operands == (A, C)
+    assert outer_new.operands == (inner_new, C)
+    for untouched in (A, B, C, alias):
+        assert result.get_repr(untouched) is untouched
+
+    # stale expressions got detached from the graph
+    G = A.get_graph()
+    assert outer_new.get_graph() is G
+    assert inner.get_graph() is not G
+    assert outer not in C.get_operations()
+    assert result.graphs == [G]
+
+
+@pytest.mark.parametrize("in_place", [False, True])
+def test_mutator_skips_removed_congruent_expression(in_place: bool):
+    A, B, C = times(3, lambda: Parameter(units=P.V))
+    removed = A + B
+    expr = A + C
+
+    context = ParameterOperatable.ReprContext()
+
+    @algorithm("")
+    def algo(mutator: Mutator):
+        mutator.remove(removed)
+        # removed is congruent to the target, but must not be reused
+        mutator.mutate_expression(expr, operands=[A, B])
+
+    mutator = Mutator(
+        A.get_graph(), print_context=context, algo=algo, in_place=in_place
+    )
+    mutator.run()
+    result = mutator.close()
+
+    expr_new = cast_assert(Add, result.get_repr(expr))
+    assert expr_new is not removed
+    assert expr_new.operands == (result.get_repr(A), result.get_repr(B))
+    assert removed not in result.repr_map
+
+
+def test_mutator_in_place_rewrites_stale_mutation_target():
+    A, B, C = times(3, lambda: Parameter(units=P.V))
+    k = A + C
+    # deeper than e, so it gets rewritten after e
+    target = ((A + B) + B) + B
+    e = k + C
+
+    context = ParameterOperatable.ReprContext()
+
+    @algorithm("")
+    def algo(mutator: Mutator):
+        mutator.mutate_parameter(A)
+        mutator._mutate(k, target)
+
+    mutator = Mutator(A.get_graph(), print_context=context, algo=algo, in_place=True)
+    mutator.run()
+    result = mutator.close()
+
+    e_new = cast_assert(Add, result.get_repr(e))
+    target_new = cast_assert(Add, result.get_repr(target))
+    assert target_new is not target
+    assert e_new.operands == (target_new, C)
+    assert e_new in target_new.get_operations()
+
+
+def test_mutator_in_place_override_repr_needs_copy():
+    A, B, C = times(3, lambda: Parameter(units=P.V))
+    expr = A + B
+    context = ParameterOperatable.ReprContext()
+
+    @algorithm("")
+    def algo(mutator: Mutator):
+        pass
+
+    mutator = Mutator(A.get_graph(), print_context=context, algo=algo, in_place=True)
+    assert mutator.mutate_expression(expr) is expr
+    # expr would stay referenced after going stale
+    with pytest.raises(ValueError):
+        mutator._override_repr(expr, C)
+
+    copy = mutator.mutate_expression(expr, force_copy=True)
+    assert copy is not expr
+    assert copy.operands == expr.operands
+    mutator._override_repr(expr, C)
+    assert mutator.get_mutated(expr) is C
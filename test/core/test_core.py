@@ -70,6 +70,26 @@ class TestGraph(unittest.TestCase):
 
         self.assertEqual(n1.self_gif.G, n2.self_gif.G)
 
+    def test_graph_version(self):
+        from faebryk.core.graphinterface import GraphInterface as GIF
+
+        gif1 = GIF()
+        gif2 = GIF()
+        v1, v2 = gif1.G.version, gif2.G.version
+        self.assertNotEqual(v1, v2)
+
+        # unchanged graph keeps its version
+        self.assertEqual(gif1.G.version, v1)
+
+        gif1.connect(gif2)
+        v_merged = gif1.G.version
+        self.assertNotIn(v_merged, (v1, v2))
+
+        gif3 = GIF()
+        self.assertEqual(gif1.G.version, v_merged)
+        gif1.connect(gif3)
+        self.assertGreater(gif1.G.version, v_merged)
+
     # TODO move to own file
     def test_fab_ll_simple_hierarchy(self):
         class N(Node):
@@ -270,3 +290,69 @@ def test_get_children_modules_tree():
         types=F.Capacitor, f_filter=lambda x: type(x) is F.Capacitor
     )
     assert mods == {cap1, cap2, *cap3.capacitors}
+
+
+def test_nodes_of_type():
+    from faebryk.core.graph import GraphFunctions
+    from faebryk.core.trait import Trait
+
+    class ModuleSpecial(Module):
+        pass
+
+    class trait1(Trait):
+        pass
+
+    class trait1impl(trait1.impl()):
+        pass
+
+    class App(Module):
+        m: Module
+        special: ModuleSpecial
+        mif: ModuleInterface
+
+    app = App()
+    # added after the graph was queried
+    graph = GraphFunctions(app.get_graph())
+    assert graph.nodes_of_type(ModuleSpecial) == {app.special}
+    app.m.add(trait1impl())
+
+    def scan(t):
+        return {n for n in app.get_graph().node_projection() if isinstance(n, t)}
+
+    graph = GraphFunctions(app.get_graph())
+    for t in (Node, Module, ModuleSpecial, ModuleInterface):
+        assert graph.nodes_of_type(t) == scan(t)
+    assert graph.nodes_of_types((ModuleSpecial, ModuleInterface)) == scan(
+        (ModuleSpecial, ModuleInterface)
+    )
+    assert graph.nodes_of_types(ModuleSpecial | ModuleInterface) == scan(
+        (ModuleSpecial, ModuleInterface)
+    )
+    assert [n for n, _ in graph.nodes_with_trait(trait1)] == [app.m]
+
+
+def test_iter_children():
+    class App(Module):
+        m: Module
+        mif: ModuleInterface
+        ms = L.list_field(3, Module)
+
+    app = App()
+
+    for direct_only in (True, False):
+        for types in (Node, Module, (Module, ModuleInterface)):
+            for include_root in (True, False):
+                children = list(
+                    app.iter_children(
+                        direct_only=direct_only,
+                        types=types,
+                        include_root=include_root,
+                    )
+                )
+                assert len(children) == len(set(children))
+                assert set(children) == app.get_children(
+                    direct_only=direct_only, types=types, include_root=include_root
+                )
+
+    assert app.get_first_child_of_type(Module) is app
+    assert app.get_first_child_of_type(ModuleInterface) is app.mif
@@ -1,12 +1,14 @@
 # This file is part of the faebryk project
 # SPDX-License-Identifier: MIT
 
+import json
 import logging
-from itertools import chain
+from itertools import chain, pairwise
 
 import pytest
 
 import faebryk.library._F as F
+from faebryk.core.cpp import find_all_buses, set_indiv_measure
 from faebryk.core.link import (
     LinkDirect,
     LinkDirectConditional,
@@ -16,6 +18,12 @@ from faebryk.core.link import (
 from faebryk.core.module import Module
 from faebryk.core.moduleinterface import IMPLIED_PATHS, ModuleInterface
 from faebryk.core.node import NodeException
+from faebryk.core.pathfinder import (
+    INDIV_MEASURE,
+    Counters,
+    find_paths,
+    find_paths_batch,
+)
 from faebryk.libs.app.erc import (
     ERCFaultShortedModuleInterfaces,
     ERCPowerSourcesShortedError,
@@ -1219,3 +1227,194 @@ def test_connect_incompatible_hierarchical_regression():
 
     with pytest.raises(NodeException):
         x.connect(y)  # type: ignore
+
+
+def test_connectivity_index():
+    class Low(ModuleInterface): ...
+
+    class High(ModuleInterface):
+        lower1: Low
+        lower2: Low
+
+    class App(Module):
+        high = L.list_field(6, High)
+
+    app = App()
+    high1, high2, high3, high4, high5, high6 = app.high
+
+    # split
+    high1.lower1.connect(high2.lower1)
+    high1.lower2.connect(high3.lower2)
+    high2.connect(high3)
+    # flip
+    high4.lower1.connect(high5.lower2)
+    high4.lower2.connect(high5.lower1)
+
+    G = app.get_graph()
+    for a, b in [
+        (high1, high3),
+        (high1.lower2, high2.lower2),
+        (high4, high5),
+        (high1, high4),
+        (high1.lower1, high1.lower2),
+    ]:
+        assert G.same_bus(a, b) is bool(a.is_connected_to(b))
+        assert a.same_bus(b) is bool(a.is_connected_to(b))
+
+    assert high1.get_bus() == set(high1.get_connected()) == {high2, high3}
+    assert high6.get_bus(include_self=True) == {high6}
+
+    buses, unresolved = G.get_buses(High)
+    assert not unresolved
+    assert {frozenset(bus) for bus in buses} == {
+        frozenset({high1, high2, high3}),
+        frozenset({high4}),
+        frozenset({high5}),
+        frozenset({high6}),
+    }
+
+    # conditional links are left to the pathfinder
+    high5.connect_shallow(high6)
+    assert G.same_bus(high5, high6) is None
+    assert G.same_bus(high1, high2) is True
+    assert high5.same_bus(high6)
+    assert not high5.lower1.same_bus(high6.lower1)
+    assert G.get_buses(High)[1] == {high4, high5, high6}
+
+    # split needs all children connected
+    class Extra(High):
+        lower3: Low
+
+    extra1, extra2 = Extra(), Extra()
+    extra1.lower1.connect(extra2.lower1)
+    extra1.lower2.connect(extra2.lower2)
+    assert not extra1.same_bus(extra2)
+    extra1.lower3.connect(extra2.lower3)
+    assert extra1.same_bus(extra2)
+
+
+def test_connectivity_index_short():
+    power1, power2 = F.ElectricPower(), F.ElectricPower()
+    power1.hv.connect(power1.lv)
+    power1.hv.connect(power2.hv)
+    power1.connect(power2)
+
+    # the pathfinder only finds power2.lv -> power1.hv through the short,
+    # the index is symmetric and transitive
+    assert power2.lv.same_bus(power1.hv)
+    assert power1.hv.same_bus(power2.lv)
+    assert power2.lv.get_bus() == {power1.hv, power1.lv, power2.hv}
+    assert power1.hv.get_bus() == {power1.lv, power2.hv, power2.lv}
+
+
+def test_paths_after_incremental_mutations():
+    class App(Module):
+        mifs = L.list_field(100, F.Electrical)
+
+    mifs = App().mifs
+    other = times(100, F.Electrical)
+    for a, b in pairwise(other):
+        a.connect(b)
+
+    # the first query builds the adjacency, the following ones patch it
+    for i, (a, b) in enumerate(pairwise(mifs[:20]), start=1):
+        a.connect(b)
+        assert set(mifs[0].get_connected()) == set(mifs[1 : i + 1])
+
+    # merging a large graph rebuilds it
+    mifs[19].connect(other[0])
+    assert set(mifs[0].get_connected()) == set(mifs[1:20] + other)
+
+
+def test_group_into_buses():
+    class High(ModuleInterface):
+        lower1: F.Electrical
+        lower2: F.Electrical
+
+    high1, high2, high3, high4, high5 = times(5, High)
+
+    high1.connect(high2)
+    high3.connect_shallow(high4)
+    high4.lower1.connect(high5.lower1)
+    high4.lower2.connect(high5.lower2)
+
+    mifs = [high1, high2, high3, high4, high5, high1]
+    ids = find_all_buses(mifs)
+    assert ids[0] == ids[1] == ids[5]
+    assert ids[2] == ids[3] == ids[4] != ids[0]
+    assert sorted(set(ids)) == [0, 1]
+
+    assert ModuleInterface._group_into_buses(mifs) == {
+        high1: {high1, high2},
+        high3: {high3, high4, high5},
+    }
+
+    lows = [high1.lower1, high3.lower1, high4.lower1, high5.lower1]
+    assert ModuleInterface._group_into_buses(lows) == {
+        high1.lower1: {high1.lower1},
+        high3.lower1: {high3.lower1},
+        high4.lower1: {high4.lower1, high5.lower1},
+    }
+
+
+def test_find_paths_batch():
+    class High(ModuleInterface):
+        lower1: F.Electrical
+        lower2: F.Electrical
+
+    high1, high2, high3, high4 = times(4, High)
+    high1.connect(high2)
+    high2.connect_shallow(high3)
+    high3.lower1.connect(high4.lower1)
+
+    srcs = [high1, high3.lower1, high4, high1.lower2]
+    for paths, expected in zip(
+        find_paths_batch(srcs), (find_paths(src, []) for src in srcs)
+    ):
+        assert {p[-1].node for p in paths} == {p[-1].node for p in expected}
+
+    # shallow link filter runs in python from the worker threads
+    paths_high1, paths_high3 = find_paths_batch([high1, high3], [[high3], [high1]])
+    assert high3 in {p[-1].node for p in paths_high1}
+    assert high1 in {p[-1].node for p in paths_high3}
+
+    assert find_paths_batch([]) == []
+
+
+def test_pathfinder_stats(tmp_path):
+    high1, high2 = times(2, F.ElectricPower)
+    high1.connect(high2)
+
+    set_indiv_measure(True)
+    try:
+        Counters.reset_aggregated()
+        find_paths(high1, [])
+        find_paths_batch([high1, high2.hv])
+        stats = Counters.aggregated()
+    finally:
+        set_indiv_measure(bool(INDIV_MEASURE))
+
+    assert stats.calls == 3
+    assert stats.counters["total"].in_cnt > 0
+
+    out = tmp_path / "stats.json"
+    stats.dump_json(out)
+    data = json.loads(out.read_text())
+    assert data["calls"] == 3
+    assert data["counters"]["total"]["in"] == stats.counters["total"].in_cnt
+
+
+def test_path_cache():
+    mif1, mif2, mif3 = times(3, F.Electrical)
+    mif1.connect(mif2)
+
+    Counters.reset_aggregated()
+    paths = find_paths(mif1, [])
+    assert {p[-1].node for p in find_paths(mif1, [])} == {p[-1].node for p in paths}
+    stats = Counters.aggregated()
+    assert (stats.cache_hits, stats.cache_misses) == (1, 1)
+
+    # any mutation invalidates
+    mif2.connect(mif3)
+    assert mif3 in {p[-1].node for p in find_paths(mif1, [])}
+    assert Counters.aggregated().cache_misses == 2
@@ -259,3 +259,32 @@ def test_trait_decless_inherit_2():
     assert n.has_trait(T1)
     assert n.has_trait(T2)
     assert n.get_trait(T2).data == "test"
+
+
+def test_trait_index():
+    class T1(Trait):
+        pass
+
+    class T1_1(T1):
+        pass
+
+    class T2(Trait):
+        pass
+
+    class T1_1impl(T1_1.impl()):
+        pass
+
+    obj = Node()
+    impl = T1_1impl()
+    obj.add(impl)
+    obj.add(Node())
+
+    # impls are indexed under their trait and all base traits
+    assert obj.get_trait_fast(T1_1) == [impl]
+    assert obj.get_trait_fast(T1) == [impl]
+    assert obj.get_trait_fast(T2) == []
+    assert obj.get_trait(T1) is impl
+
+    obj.del_trait(T1_1)
+    assert obj.get_trait_fast(T1) == []
+    assert not obj.has_trait(T1)
@@ -4,8 +4,10 @@
 import unittest
 
 import faebryk.library._F as F  # noqa: F401
+from faebryk.core.module import Module
 from faebryk.exporters.pcb.kicad.transformer import PCB_Transformer
 from faebryk.libs.kicad.fileformats import C_kicad_pcb_file
+from faebryk.libs.sexp.dataclass_sexp import get_undecoded
 from faebryk.libs.test.fileformats import PCBFILE
 from faebryk.libs.util import find
 
@@ -21,3 +23,23 @@ class TestTransformer(unittest.TestCase):
 
         bbox_silk = PCB_Transformer.get_footprint_silkscreen_bbox(fp)
         self.assertEqual(bbox_silk, ((-0.94, -0.5), (0.94, 0.5)))
+
+    def test_net_edits_lazy(self):
+        pcb = C_kicad_pcb_file.loads(PCBFILE, lazy=True).kicad_pcb
+        app = Module()
+        transformer = PCB_Transformer(pcb, app.get_graph(), app)
+
+        def _net(name: str):
+            return find(pcb.nets, lambda n: n.name == name)
+
+        # no zone is on this net, so the zones aren't decoded
+        transformer.rename_net(_net("B1-1-R1-2"), "renamed")
+        transformer.remove_net(_net("renamed"))
+        self.assertIsNotNone(get_undecoded(pcb, "zones"))
+
+        transformer.rename_net(_net("GND"), "GND2")
+        self.assertIsNone(get_undecoded(pcb, "zones"))
+        self.assertEqual([z.net_name for z in pcb.zones], ["", "GND2"])
+
+        transformer.remove_net(_net("GND2"))
+        self.assertEqual([(z.net, z.net_name) for z in pcb.zones], [(0, ""), (0, "")])
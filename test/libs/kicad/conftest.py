@@ -0,0 +1,21 @@
+# This file is part of the faebryk project
+# SPDX-License-Identifier: MIT
+
+from pathlib import Path
+
+import pytest
+
+from faebryk.libs.test.fileformats import FILEFORMATS_PATH
+
+KICAD_SUFFIXES = (".kicad_pcb", ".kicad_mod", ".kicad_sch", ".kicad_sym", ".net")
+
+
+@pytest.fixture(
+    params=[
+        p for p in sorted(FILEFORMATS_PATH.rglob("*")) if p.suffix in KICAD_SUFFIXES
+    ],
+    ids=lambda p: p.name,
+)
+def kicad_file(request) -> Path:
+    """Every KiCad s-expression file in the fileformat test resources"""
+    return request.param
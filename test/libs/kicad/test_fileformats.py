@@ -18,7 +18,13 @@ from faebryk.libs.kicad.fileformats import (
 )
 from faebryk.libs.kicad.fileformats_sch import C_kicad_sch_file, C_kicad_sym_file
 from faebryk.libs.kicad.fileformats_version import kicad_footprint_file
-from faebryk.libs.sexp.dataclass_sexp import JSON_File, SEXP_File
+from faebryk.libs.sexp.dataclass_sexp import (
+    JSON_File,
+    SEXP_File,
+    get_changed_fields,
+    get_field_hashes,
+    get_undecoded,
+)
 from faebryk.libs.test.fileformats import (
     _FP_DIR,
     _FPLIB_DIR,  # noqa: F401
@@ -32,6 +38,7 @@ from faebryk.libs.test.fileformats import (
     FPFILE,
     FPLIBFILE,
     NETFILE,
+    PCBDUMPFILE,
     PCBFILE,
     PRJFILE,
     SCHFILE,
@@ -137,6 +144,86 @@ def test_write():
     assert _d1(pcb_reload).propertys["Value"].value == "LED2"
 
 
+def test_dump_byte_identical():
+    dump = C_kicad_pcb_file.loads(PCBFILE).dumps()
+    assert dump == PCBDUMPFILE.read_text()
+
+    # load -> dump is a fixpoint
+    assert C_kicad_pcb_file.loads(dump).dumps() == dump
+
+
+def test_lazy_load():
+    eager = C_kicad_pcb_file.loads(PCBFILE)
+    pcb = C_kicad_pcb_file.loads(PCBFILE, lazy=True)
+
+    def _lazy(pcb: C_kicad_pcb_file):
+        return set(vars(pcb.kicad_pcb).get("_lazy_fields", {}))
+
+    assert "zones" in _lazy(pcb)
+    assert pcb.kicad_pcb.footprints == eager.kicad_pcb.footprints
+
+    # untouched sections are written as loaded
+    pcb_reload = C_kicad_pcb_file.loads(pcb.dumps())
+    assert "zones" in _lazy(pcb)
+    assert pcb_reload == eager
+
+    # decoded on access
+    assert pcb.kicad_pcb.zones == eager.kicad_pcb.zones
+    assert "zones" not in _lazy(pcb)
+    assert all(zone._parent is pcb.kicad_pcb for zone in pcb.kicad_pcb.zones)
+
+    pcb.kicad_pcb.zones[0].name = "lazy"
+    pcb_reload = C_kicad_pcb_file.loads(pcb.dumps())
+    assert pcb_reload.kicad_pcb.zones[0].name == "lazy"
+
+
+def test_lazy_dump_unchanged():
+    pcb = C_kicad_pcb_file.loads(PCBFILE, lazy=True)
+    dump = pcb.dumps()
+
+    # decoding alone doesn't change the output
+    zone = pcb.kicad_pcb.zones[0]
+    assert pcb.dumps() == dump
+
+    name = zone.name
+    zone.name = "changed"
+    assert pcb.dumps() != dump
+    zone.name = name
+    assert pcb.dumps() == dump
+
+
+def test_lazy_dump_matches_eager():
+    eager = C_kicad_pcb_file.loads(PCBDUMPFILE).dumps()
+    pcb = C_kicad_pcb_file.loads(PCBDUMPFILE, lazy=True)
+    assert pcb.dumps() == eager
+
+    pcb.kicad_pcb.zones
+    pcb.kicad_pcb.gr_lines
+    assert pcb.dumps() == eager
+
+    # untouched sections keep the text they were loaded with
+    pcb = C_kicad_pcb_file.loads(PCBFILE, lazy=True)
+    zone = get_undecoded(pcb.kicad_pcb, "zones")[0].dumps()
+    assert zone in PCBFILE.read_text()
+    assert zone in pcb.dumps()
+
+
+def test_changed_fields():
+    pcb = C_kicad_pcb_file.loads(PCBFILE, lazy=True).kicad_pcb
+    hashes = get_field_hashes(pcb)
+    assert "footprints" in hashes
+    assert "zones" not in hashes
+    assert get_changed_fields(pcb, hashes) == []
+
+    # decoding alone isn't a change
+    zone = pcb.zones[0]
+    assert get_changed_fields(pcb, hashes) == []
+
+    zone.name = "changed"
+    pcb.footprints[0].name = "changed"
+    assert get_changed_fields(pcb, hashes) == ["footprints", "zones"]
+
+
 def test_empty_enum_positional():
     pcb = C_kicad_pcb_file.loads(PCBFILE)
 
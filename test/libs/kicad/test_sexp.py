@@ -156,3 +156,29 @@ def test_print_sexp():
     for obj, path, name_path in level2:
         name = "".join(name_path)
         logger.debug(f"{name:70}  {[type(p).__name__ for p in path + [obj]]}")
+
+
+def test_plural_keys_and_order():
+    @dataclass
+    class Container:
+        @dataclass
+        class SomeDataclass:
+            pts: list[int] = field(**sexp_field(multidict=True), default_factory=list)
+            name: str = field(**sexp_field(positional=True), default="")
+            a: int = 0
+
+        some_dataclass: SomeDataclass
+
+    cereal = '(some_dataclass "x" (pt 1) (a 2) (pt 3))'
+
+    # decode twice, the field layout is cached per type
+    for _ in range(2):
+        container = loads(cereal, Container)
+        assert container.some_dataclass.pts == [1, 3]
+        assert container.some_dataclass.name == "x"
+        assert container.some_dataclass.a == 2
+
+        # positional fields are dumped first
+        assert _unformat(dumps(container)) == _unformat(
+            '(some_dataclass "x" (pt 1) (pt 3) (a 2))'
+        )
@@ -0,0 +1,105 @@
+# This file is part of the faebryk project
+# SPDX-License-Identifier: MIT
+
+import math
+from pathlib import Path
+
+import pytest
+import sexpdata
+
+from faebryk.libs.sexp import parser as sexp_parser
+from faebryk.libs.test.fileformats import PCBFILE
+
+
+def _assert_same(a, b):
+    assert type(a) is type(b), (a, b)
+    if isinstance(a, list):
+        assert len(a) == len(b)
+        for x, y in zip(a, b):
+            _assert_same(x, y)
+    elif isinstance(a, float) and math.isnan(a):
+        assert math.isnan(b)
+    else:
+        assert a == b
+
+
+def test_parser_matches_sexpdata(kicad_file: Path):
+    expected = sexpdata.loads(kicad_file.read_text())
+    # KiCad files must not need the sexpdata fallback
+    _assert_same(sexp_parser._parse(kicad_file.read_bytes()), [expected])
+    _assert_same(sexp_parser.load(kicad_file), expected)
+    _assert_same(sexp_parser.loads(kicad_file.read_text()), expected)
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        '(a "x\\"y\\n\\q" nil t 1 -2 1.5e3 nan inf 1_0 +3 .5 a\'b)',
+        '(a "é ü" ä)',
+        " (a\tb)\n",
+        "a",
+        '"s"',
+        # handed to sexpdata
+        "(a 'b)",
+        "(a ; comment\n b)",
+        "(a \\( b)",
+    ],
+)
+def test_parser_edge_cases(text: str):
+    expected = sexpdata.loads(text)
+    _assert_same(sexp_parser.loads(text), expected)
+    _assert_same(sexp_parser.loads(text.encode()), expected)
+
+
+@pytest.mark.parametrize("binary", [False, True])
+def test_parser_lazy(binary: bool):
+    text = '(a (b 1) (c (b 2) "(c") (c) c)'
+    data = text.encode() if binary else text
+
+    out = sexp_parser.loads(data, lazy={"c"})
+    expected = sexpdata.loads(text)
+
+    assert isinstance(out[2], sexp_parser.RawSexp)
+    assert isinstance(out[3], sexp_parser.RawSexp)
+    assert out[2].key == "c"
+    assert out[2].data in ('(c (b 2) "(c")', b'(c (b 2) "(c")')
+    out[2] = out[2].loads()
+    out[3] = out[3].loads()
+    _assert_same(out, expected)
+
+
+@pytest.mark.parametrize("text", ['(a "unterminated', "(a))", "((a)", ""])
+def test_parser_errors(text: str):
+    with pytest.raises(Exception):
+        sexpdata.loads(text)
+    with pytest.raises(Exception):
+        sexp_parser.loads(text)
+
+
+@pytest.fixture(scope="module")
+def large_pcb(tmp_path_factory) -> Path:
+    sexp = sexpdata.loads(PCBFILE.read_text())
+    items = [
+        item
+        for item in sexp
+        if isinstance(item, list)
+        and item
+        and item[0] in (sexpdata.Symbol("footprint"), sexpdata.Symbol("segment"))
+    ]
+    sexp.extend(items * 200)
+
+    path = tmp_path_factory.mktemp("sexp") / "large.kicad_pcb"
+    path.write_text(sexpdata.dumps(sexp))
+    return path
+
+
+@pytest.mark.slow
+@pytest.mark.benchmark(min_rounds=3)
+def test_parser_throughput(compare_impls, large_pcb: Path):
+    compare_impls(
+        lambda path: sexpdata.loads(path.read_text()),
+        sexp_parser.load,
+        large_pcb,
+        size=large_pcb.stat().st_size,
+        measure_memory=True,
+    )
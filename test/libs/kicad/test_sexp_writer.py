@@ -0,0 +1,58 @@
+# This file is part of the faebryk project
+# SPDX-License-Identifier: MIT
+
+import io
+from pathlib import Path
+
+import pytest
+import sexpdata
+from sexpdata import Symbol
+
+from faebryk.libs.sexp import parser as sexp_parser
+from faebryk.libs.sexp.util import prettify_sexp_string, write_pretty_sexp
+from faebryk.libs.test.fileformats import PCBFILE
+
+
+def _legacy(sexp) -> str:
+    return prettify_sexp_string(sexpdata.dumps(sexp))
+
+
+def _write(sexp) -> str:
+    buffer = io.StringIO()
+    write_pretty_sexp(sexp, buffer)
+    return buffer.getvalue()
+
+
+def test_writer_matches_prettify(kicad_file: Path):
+    sexp = sexp_parser.load(kicad_file)
+    assert _write(sexp) == _legacy(sexp)
+
+
+@pytest.mark.parametrize(
+    "sexp",
+    [
+        [Symbol("a")],
+        [Symbol("a"), [Symbol("b"), 1, 2.5, True, False, None], []],
+        [Symbol("a"), [Symbol("b"), ["c", "d e"], ("f",)], [Symbol("g")]],
+        # inner quotes flip the quote state of prettify_sexp_string
+        [Symbol("a"), 'x"y', [Symbol("b"), [Symbol("c")]], "z"],
+        # line breaks and trailing whitespace inside atoms
+        [Symbol("a"), [Symbol("b\t")], "c\x0b", [Symbol("d\r")], [Symbol("e\n")]],
+        [Symbol("a  b"), Symbol(""), [Symbol("(")], "  "],
+    ],
+)
+def test_writer_edge_cases(sexp):
+    assert _write(sexp) == _legacy(sexp)
+
+
+@pytest.fixture(scope="module")
+def large_pcb() -> list:
+    sexp = sexp_parser.load(PCBFILE)
+    items = [item for item in sexp if isinstance(item, list)]
+    return sexp + items * 200
+
+
+@pytest.mark.slow
+@pytest.mark.benchmark(min_rounds=3)
+def test_writer_throughput(compare_impls, large_pcb: list):
+    compare_impls(_legacy, _write, large_pcb, size=len)
@@ -1,24 +1,36 @@
 # This file is part of the faebryk project
 # SPDX-License-Identifier: MIT
 
+import json
 import logging
 import sys
+import threading
 from pathlib import Path
 from tempfile import mkdtemp
 from typing import TYPE_CHECKING
 
 import pytest
+import requests
 
 import faebryk.library._F as F
 import faebryk.libs.picker.lcsc as lcsc
 from faebryk.core.module import Module
 from faebryk.core.solver.defaultsolver import DefaultSolver
 from faebryk.libs.library import L
-from faebryk.libs.picker.api.picker_lib import get_candidates, pick_atomically
+from faebryk.libs.picker.api import api, picker_lib
+from faebryk.libs.picker.api.api import ApiClient, ApiHTTPError, ApiOfflineError
+from faebryk.libs.picker.api.models import Component, LCSCParams
+from faebryk.libs.picker.api.picker_lib import (
+    _find_modules,
+    _prune_by_known_supersets,
+    get_candidates,
+    pick_atomically,
+)
 from faebryk.libs.picker.picker import PickError, pick_part_recursively
+from faebryk.libs.sets.quantity_sets import Quantity_Interval_Disjoint
 from faebryk.libs.sets.sets import EnumSet
 from faebryk.libs.units import P
-from faebryk.libs.util import groupby
+from faebryk.libs.util import Tree, groupby
 
 sys.path.append(str(Path(__file__).parent))
 
@@ -106,6 +118,200 @@ def test_type_pick():
     assert module.has_trait(F.has_part_picked)
 
 
+def _part(lcsc: int, **attributes: Quantity_Interval_Disjoint):
+    return Component(
+        lcsc=lcsc,
+        manufacturer_name="",
+        part_number="",
+        package="",
+        datasheet_url="",
+        description="",
+        is_basic=0,
+        is_preferred=0,
+        stock=0,
+        price=[],
+        attributes={k: v.serialize() for k, v in attributes.items()},
+    )
+
+
+def test_prune_by_known_supersets():
+    module = F.Resistor()
+    module.resistance.constrain_subset(L.Range.from_center_rel(100 * P.ohm, 0.1))
+
+    def _resistance(value):
+        return Quantity_Interval_Disjoint(L.Range.from_center_rel(value, 0.01))
+
+    parts = [
+        _part(1, resistance=_resistance(1 * P.kohm)),
+        _part(2, resistance=_resistance(100 * P.ohm)),
+        _part(3),
+        _part(4, resistance=_resistance(105 * P.ohm)),
+        _part(5, resistance=_resistance(10 * P.ohm)),
+    ]
+
+    pruned = _prune_by_known_supersets(module, parts, DefaultSolver())
+    assert [p.lcsc for p in pruned] == [2, 3, 4]
+
+
+def test_prune_by_known_supersets_small_values():
+    # pF bounds are far below numpy's default absolute tolerance
+    module = F.Capacitor()
+    module.capacitance.constrain_subset(L.Range.from_center_rel(10 * P.pF, 0.1))
+
+    def _capacitance(value):
+        return Quantity_Interval_Disjoint(L.Range.from_center_rel(value, 0.01))
+
+    parts = [
+        _part(1, capacitance=_capacitance(100 * P.pF)),
+        _part(2, capacitance=_capacitance(10 * P.pF)),
+        _part(3, capacitance=_capacitance(1 * P.pF)),
+        _part(4, capacitance=_capacitance(1 * P.nF)),
+        _part(5, capacitance=_capacitance(10.5 * P.pF)),
+    ]
+
+    pruned = _prune_by_known_supersets(module, parts, DefaultSolver())
+    assert [p.lcsc for p in pruned] == [2, 5]
+
+
+def test_find_compatible_parts_prefetches_lazily(monkeypatch):
+    module = F.Resistor()
+    module.resistance.constrain_subset(L.Range.from_center_rel(100 * P.ohm, 0.1))
+    resistance = Quantity_Interval_Disjoint(L.Range.from_center_rel(100 * P.ohm, 0.01))
+    parts = [_part(i, resistance=resistance) for i in range(1, 8)]
+    no_data = {parts[0].lcsc_display, parts[1].lcsc_display}
+
+    prefetched = []
+
+    def _get_raw(lcsc_id: str):
+        if lcsc_id in no_data:
+            raise lcsc.LCSC_NoDataException(lcsc_id)
+        return {}
+
+    monkeypatch.setattr(picker_lib, "CHECK_BATCH_SIZE", 2)
+    monkeypatch.setattr(picker_lib, "get_raw", _get_raw)
+    monkeypatch.setattr(
+        picker_lib, "prefetch_raw", lambda ids: prefetched.append(list(ids))
+    )
+
+    compatible = picker_lib.find_compatible_parts(module, parts, DefaultSolver())
+    assert next(compatible) is parts[2]
+    # batches after the first compatible part are not fetched
+    assert prefetched == [
+        [p.lcsc_display for p in parts[:2]],
+        [p.lcsc_display for p in parts[2:4]],
+    ]
+
+
+def test_find_modules_deduplicates_queries(monkeypatch):
+    class FakeClient:
+        def __init__(self):
+            self.queries = []
+
+        def fetch_parts_multiple(self, params):
+            self.queries.extend(params)
+            return [[] for _ in params]
+
+    client = FakeClient()
+    monkeypatch.setattr(picker_lib, "client", client)
+
+    resistors = [F.Resistor() for _ in range(4)]
+    for r in resistors[:3]:
+        r.resistance.constrain_subset(L.Range.from_center_rel(100 * P.ohm, 0.1))
+    resistors[3].resistance.constrain_subset(L.Range.from_center_rel(1 * P.kohm, 0.1))
+
+    saved = picker_lib.query_counter.saved
+    result = _find_modules(Tree({r: Tree() for r in resistors}), DefaultSolver())
+
+    assert result.keys() == set(resistors)
+    assert len(client.queries) == 2
+    assert picker_lib.query_counter.saved - saved == 2
+
+
+@pytest.mark.usefixtures("setup_project_config")
+def test_query_cache_offline():
+    from atopile.config import config
+
+    fetched = []
+
+    def _fetch(queries: list[dict], session: requests.Session) -> list[list[dict]]:
+        fetched.extend(queries)
+        return [[] for _ in queries]
+
+    client = ApiClient()
+    params = [LCSCParams(lcsc=i, quantity=1) for i in range(3)]
+
+    assert client._fetch_cached(params[:2], _fetch) == [[], []]
+    assert len(fetched) == 2
+
+    # only the uncached query is sent
+    assert client._fetch_cached(params, _fetch) == [[], [], []]
+    assert fetched[2:] == [params[2].serialize()]
+
+    config.project.services.components.offline = True
+    assert client._fetch_cached(params, _fetch) == [[], [], []]
+    with pytest.raises(ApiOfflineError):
+        client._fetch_cached([LCSCParams(lcsc=3, quantity=1)], _fetch)
+    with pytest.raises(ApiOfflineError):
+        client.fetch_part_by_lcsc(3)
+    assert len(fetched) == 3
+
+
+@pytest.mark.usefixtures("setup_project_config")
+def test_query_cache_partial_error():
+    fetched = []
+
+    def _fetch(queries: list[dict], session: requests.Session) -> list[list[dict]]:
+        fetched.extend(queries)
+        if len(queries) == 1:
+            return [[]]
+        response = requests.Response()
+        response.status_code = 400
+        response._content = json.dumps(
+            {"detail": {"errors": [None, {"message": "bad query"}]}}
+        ).encode()
+        raise ApiHTTPError(requests.exceptions.HTTPError(response=response))
+
+    client = ApiClient()
+    params = [LCSCParams(lcsc=i, quantity=1) for i in range(4)]
+    client._fetch_cached(params[1:2], _fetch)
+
+    # only the uncached queries are sent, errors are reported for all queries
+    with pytest.raises(ApiHTTPError) as e:
+        client._fetch_cached(params[:3], _fetch)
+    assert fetched[1:] == [params[0].serialize(), params[2].serialize()]
+    assert e.value.errors == [None, None, {"message": "bad query"}]
+
+
+@pytest.mark.usefixtures("setup_project_config")
+def test_query_cache_revalidation(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(api, "QUERY_CACHE_TTL", -1)
+
+    fetched = []
+    sessions = set()
+    release = threading.Event()
+
+    def _fetch(queries: list[dict], session: requests.Session) -> list[list[dict]]:
+        if fetched:
+            release.wait(timeout=10)
+        fetched.extend(queries)
+        sessions.add(session)
+        return [[] for _ in queries]
+
+    client = ApiClient()
+    params = [LCSCParams(lcsc=i, quantity=1) for i in range(2)]
+    client._fetch_cached(params, _fetch)
+    assert sessions == {client._client}
+
+    # stale entries are refreshed once in the background, while still in flight
+    for _ in range(3):
+        assert client._fetch_cached(params, _fetch) == [[], []]
+    release.set()
+    client.finish_revalidation()
+
+    assert fetched == [p.serialize() for p in params] * 2
+    assert sessions == {client._client, client._revalidation_client}
+
+
 def test_no_pick():
     module = Module()
     module.add(F.has_part_removed())
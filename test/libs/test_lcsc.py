@@ -2,14 +2,22 @@
 # SPDX-License-Identifier: MIT
 
 import atexit
+import json
+import random
 import shutil
+import sqlite3
+import threading
 import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
 from tempfile import mkdtemp
 
 import pytest
+from easyeda2kicad.easyeda import easyeda_api
 
 import faebryk.libs.picker.lcsc as lcsc
+from faebryk.libs.picker.api.api import ApiOfflineError
+from faebryk.libs.picker.easyeda_cache import EasyedaCache
 
 """
 This mode is for when you want to check the models in kicad.
@@ -64,3 +72,154 @@ class TestLCSC(unittest.TestCase):
             self.assertEqual(
                 (translation.x, translation.y, translation.z), expected, f"{part}"
             )
+
+
+@pytest.fixture
+def easyeda_cache(tmp_path, monkeypatch):
+    cache = EasyedaCache(tmp_path / "easyeda.db", max_size=2**20)
+    monkeypatch.setattr(lcsc, "_get_shared_cache", lambda: cache)
+    return cache
+
+
+class _Requested(list[str]):
+    def __init__(self):
+        super().__init__()
+        self.clients: set[tuple[str, int]] = set()
+
+
+@pytest.fixture
+def easyeda_stub(monkeypatch):
+    requested = _Requested()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            lcsc_id = self.path.split("/")[-1]
+            requested.append(lcsc_id)
+            requested.clients.add(self.client_address)
+            if lcsc_id == "C0":
+                body = {"success": False, "code": 404}
+            else:
+                body = {"success": True, "result": {"lcsc": lcsc_id}}
+            data = json.dumps(body).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(
+        easyeda_api,
+        "API_ENDPOINT",
+        f"http://127.0.0.1:{server.server_port}/{{lcsc_id}}",
+    )
+    yield requested
+    server.shutdown()
+
+
+@pytest.mark.usefixtures("setup_project_config", "easyeda_cache")
+def test_prefetch_raw(easyeda_stub):
+    ids = [f"C{i}" for i in range(1, 20)]
+
+    assert lcsc.prefetch_raw(ids, max_workers=4) == len(ids)
+    assert sorted(easyeda_stub) == sorted(ids)
+    # connections are reused across parts
+    assert len(easyeda_stub.clients) <= 4
+    assert lcsc.get_raw("C7") == {"lcsc": "C7"}
+
+    # cached parts are not fetched again
+    assert lcsc.prefetch_raw([*ids, "C0"], max_workers=4) == 1
+    assert len(easyeda_stub) == len(ids) + 1
+    with pytest.raises(lcsc.LCSC_NoDataException):
+        lcsc.get_raw("C0")
+
+
+@pytest.mark.usefixtures("setup_project_config", "easyeda_cache")
+def test_raw_offline(easyeda_stub):
+    from atopile.config import config
+
+    assert lcsc.prefetch_raw(["C1"], max_workers=4) == 1
+
+    config.project.services.components.offline = True
+    assert lcsc.prefetch_raw(["C2"], max_workers=4) == 0
+    assert lcsc.get_raw("C1") == {"lcsc": "C1"}
+    with pytest.raises(ApiOfflineError):
+        lcsc.get_raw("C2")
+    assert easyeda_stub == ["C1"]
+
+
+def test_easyeda_cache_lru(tmp_path):
+    def _part(i: int) -> dict:
+        # incompressible, roughly 360 bytes in the store
+        return {"data": random.Random(i).randbytes(300).hex()}
+
+    cache = EasyedaCache(tmp_path / "easyeda.db", max_size=1000)
+    # record every access
+    cache.ACCESS_RESOLUTION = -1
+    cache.put("C1", _part(1))
+    cache.put("C2", _part(2))
+    assert cache.get("C1") == _part(1)
+
+    # exceeds the limit, least recently used part goes
+    cache.put("C3", _part(3))
+
+    # a fresh instance only sees what is in the store
+    reopened = EasyedaCache(tmp_path / "easyeda.db", max_size=1000)
+    assert "C1" in reopened
+    assert "C2" not in reopened
+    assert "C3" in reopened
+    assert reopened.get("C3") == _part(3)
+
+
+def test_easyeda_cache_migrate(tmp_path):
+    legacy = tmp_path / "build" / "cache" / "easyeda"
+    legacy.mkdir(parents=True)
+    (legacy / "C1").write_text(json.dumps({"a": 1}))
+    (legacy / "C2").write_text(json.dumps({}))
+
+    cache = EasyedaCache(tmp_path / "easyeda.db", max_size=2**20)
+    assert cache.migrate(legacy) == 1
+    assert not legacy.exists()
+    assert cache.get("C1") == {"a": 1}
+    assert cache.get("C2") is None
+
+
+def test_easyeda_cache_negative_entries(tmp_path):
+    cache = EasyedaCache(tmp_path / "easyeda.db", max_size=2**20)
+    cache.put("C1", {})
+    assert "C1" in cache
+    assert cache.get("C1") == {}
+
+    # only remembered by this process
+    reopened = EasyedaCache(tmp_path / "easyeda.db", max_size=2**20)
+    assert "C1" not in reopened
+
+
+def test_easyeda_cache_reads(tmp_path):
+    def _last_access(lcsc_id: str) -> float:
+        with sqlite3.connect(tmp_path / "easyeda.db") as conn:
+            return conn.execute(
+                "SELECT last_access FROM parts WHERE lcsc_id = ?", (lcsc_id,)
+            ).fetchone()[0]
+
+    cache = EasyedaCache(tmp_path / "easyeda.db", max_size=2**20, max_decoded=2)
+    for i in range(3):
+        cache.put(f"C{i}", {"i": i})
+    stored = _last_access("C0")
+
+    # recent access times are not rewritten
+    for i in range(3):
+        assert cache.get(f"C{i}") == {"i": i}
+    assert _last_access("C0") == stored
+    assert list(cache._decoded) == ["C1", "C2"]
+
+    cache.ACCESS_RESOLUTION = -1
+    assert cache.get("C0") == {"i": 0}
+    assert _last_access("C0") > stored
+    assert list(cache._decoded) == ["C2", "C0"]